@@ -4,28 +4,19 @@ Command Line Interface for CodePolice
 
 import os
 import sys
-import json
 import argparse
+from contextlib import contextmanager, nullcontext
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Optional, Any
-from dataclasses import asdict
+from typing import TYPE_CHECKING, Callable, List, Dict, Iterable, Iterator, Optional, Tuple, Any
 import logging
 import importlib.util
 
-# Local imports
-try:
-    from core.parser import CodeParser
+# Heavy modules (libcst, yaml, rules, Copilot) are imported by the commands
+# that need them, so --help, config and hook commands start quickly
+if TYPE_CHECKING:
+    from core.issue import Issue
     from core.rule_engine import RuleEngine
-    from core.fixer import CodeFixer
-    from integrations.git_hook import GitHookManager
-    from models.copilot_proxy import CopilotFixer, load_copilot_config
-except ImportError:
-    # Fallback for direct script execution
-    from parser import CodeParser
-    from rule_engine import RuleEngine
-    from fixer import CodeFixer
-    from integrations.git_hook import GitHookManager
-    from models.copilot_proxy import CopilotFixer, load_copilot_config
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,16 +31,41 @@ class CLI:
     def __init__(self):
         self.parser = self._create_parser()
         self.args = self.parser.parse_args()
-        self.config = self._load_config()
-        self.rule_engine = RuleEngine()
-
-        # Initialize optional modules
-        self.copilot = None
-        if self.config.get('use_copilot', True):
-            try:
-                self.copilot = CopilotFixer(load_copilot_config())
-            except Exception as e:
-                logger.warning(f"Copilot initialization failed: {e}")
+        if self.args.command == 'fix' and self.args.transactional and not self.args.apply:
+            self.parser.error("fix --transactional requires --apply")
+        self._config: Optional[Dict[str, Any]] = None
+        self._rule_engine: Optional["RuleEngine"] = None
+        self._copilot: Any = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        if self._config is None:
+            self._config = self._load_config()
+        return self._config
+
+    @property
+    def rule_engine(self) -> "RuleEngine":
+        """Rule engine, compiled on first use"""
+        if self._rule_engine is None:
+            from core.rule_engine import RuleEngine
+            self._rule_engine = RuleEngine()
+        return self._rule_engine
+
+    @property
+    def copilot(self) -> Any:
+        """Copilot fixer, constructed on first use; None if disabled or unavailable"""
+        if self._copilot is None:
+            self._copilot = False
+            if self.config.get('use_copilot', True):
+                try:
+                    from models.copilot_proxy import CopilotFixer, load_copilot_config
+                    config = load_copilot_config()
+                    if getattr(self.args, 'ai_normalize', False):
+                        config.normalize_snippets = True
+                    self._copilot = CopilotFixer(config)
+                except Exception as e:
+                    logger.warning(f"Copilot initialization failed: {e}")
+        return self._copilot or None
 
     def _create_parser(self) -> argparse.ArgumentParser:
         """Create and configure the argument parser"""
@@ -62,23 +78,94 @@ class CLI:
 
         # Check command
         check_parser = subparsers.add_parser('check', help='Check code quality')
-        check_parser.add_argument('path', nargs='?', default='.', help='Path to check (file or directory)')
-        check_parser.add_argument('--format', choices=['text', 'json', 'html'], default='text', help='Output format')
+        check_parser.add_argument('paths', nargs='*', default=['.'], metavar='path',
+                                  help='Paths to check (files or directories)')
+        check_parser.add_argument('--format', choices=['text', 'json', 'ndjson', 'html'], default='text',
+                                  help='Output format (text, json and ndjson are streamed as files finish)')
         check_parser.add_argument('--output', type=str, help='Output file path')
         check_parser.add_argument('--no-copilot', action='store_true', help='Disable AI suggestions')
+        check_parser.add_argument('--ai-budget', type=float, default=None, metavar='SECONDS',
+                                  help='Stop waiting for AI suggestions after this long; later issues get fallbacks')
+        check_parser.add_argument('--ai-normalize', action='store_true',
+                                  help='Share AI suggestions between snippets that differ only in names, '
+                                       'literals or layout')
+        check_parser.add_argument('--ai-queue', type=int, default=256, metavar='N',
+                                  help='Issues allowed to wait for AI suggestions before scanning pauses')
         check_parser.add_argument('--list-rules', action='store_true', help='List all available rules')
+        check_parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the result cache')
+        check_parser.add_argument('--cache-dir', type=str, default='.codepolice_cache', help='Result cache directory')
+        check_parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+        check_parser.add_argument('--incremental', action='store_true',
+                                  help='Only re-analyze files whose size, mtime or inode changed')
+        check_parser.add_argument('--daemon', action='store_true',
+                                  help='Forward the check to a running codepolice daemon if available')
+        check_parser.add_argument('--no-git', action='store_true',
+                                  help='Walk directories instead of asking git ls-files for the file list')
+        diff_group = check_parser.add_mutually_exclusive_group()
+        diff_group.add_argument('--diff', type=str, metavar='REV_RANGE',
+                                help='Only analyze and report lines changed by git diff REV_RANGE')
+        diff_group.add_argument('--staged', action='store_true',
+                                help='Only analyze and report staged lines, reading the staged content')
+        check_parser.add_argument('--profile', action='store_true', help='Print a stage timing breakdown to stderr')
+        check_parser.add_argument('--profile-json', type=str, metavar='PATH', help='Write the timing breakdown as JSON')
 
         # Fix command
         fix_parser = subparsers.add_parser('fix', help='Apply automatic fixes')
         fix_parser.add_argument('path', nargs='?', default='.', help='Path to fix')
         fix_parser.add_argument('--apply', action='store_true', help='Apply fixes (dry run by default)')
         fix_parser.add_argument('--only', type=str, help='Apply only specific rule (e.g., unused_import)')
+        fix_parser.add_argument('--until-stable', action='store_true',
+                                help='Re-check and fix again until no fix applies (fixes that unlock fixes)')
+        fix_parser.add_argument('--max-passes', type=int, default=10,
+                                help='Fix passes per file with --until-stable (default: 10)')
+        fix_parser.add_argument('--transactional', action='store_true',
+                                help='With --apply, change no file unless every file can be fixed and written')
+        fix_parser.add_argument('--patch', type=str, metavar='PATH',
+                                help='Write all diffs to one patch file instead of stdout')
+        fix_parser.add_argument('--no-git', action='store_true',
+                                help='Walk directories instead of asking git ls-files for the file list')
+        fix_parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes (default: CPU count)')
+        fix_parser.add_argument('--profile', action='store_true', help='Print a stage timing breakdown to stderr')
+        fix_parser.add_argument('--profile-json', type=str, metavar='PATH', help='Write the timing breakdown as JSON')
+
+        # Bench command
+        bench_parser = subparsers.add_parser('bench', help='Benchmark parser, rule engine and fixer throughput')
+        bench_parser.add_argument('--shape', action='append', choices=['small', 'huge', 'nested', 'strings'],
+                                  help='Synthetic corpus shape (repeatable, default: all)')
+        bench_parser.add_argument('--scale', type=float, default=1.0, help='Corpus size multiplier')
+        bench_parser.add_argument('--seed', type=int, default=0, help='Seed for corpus generation')
+        bench_parser.add_argument('--corpus', type=str, help='Benchmark an existing directory instead')
+        bench_parser.add_argument('--write-corpus', type=str, metavar='DIR',
+                                  help='Also write the generated corpora to DIR')
+        bench_parser.add_argument('--startup', action='store_true',
+                                  help='Time CLI startup with python -X importtime (alone unless --shape/--corpus)')
+        bench_parser.add_argument('--ai-keys', action='store_true',
+                                  help='Also report AI suggestion cache hit rates with raw and normalized snippets')
+        bench_parser.add_argument('--repeat', type=int, default=3, help='Runs per corpus (median is reported)')
+        bench_parser.add_argument('--output', type=str, help='Write results as JSON')
+        bench_parser.add_argument('--compare', type=str, metavar='BASELINE', help='Compare against a previous JSON run')
+        bench_parser.add_argument('--threshold', type=float, default=0.10,
+                                  help='Allowed slowdown before --compare fails (default: 0.10)')
 
         # Hook command
         hook_parser = subparsers.add_parser('hook', help='Manage Git hooks')
         hook_subparsers = hook_parser.add_subparsers(dest='hook_command', required=True)
         hook_subparsers.add_parser('install', help='Install Git pre-commit hook')
         hook_subparsers.add_parser('uninstall', help='Uninstall Git pre-commit hook')
+        hook_run_parser = hook_subparsers.add_parser('run', help='Check the staged content of Python files')
+        hook_run_parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the result cache')
+        hook_run_parser.add_argument('--cache-dir', type=str, default='.codepolice_cache', help='Result cache directory')
+        hook_run_parser.add_argument('--jobs', '-j', type=int, default=1, help='Worker processes (default: 1)')
+        hook_run_parser.add_argument('--no-daemon', action='store_true',
+                                     help='Check in-process even if a daemon is running')
+        hook_run_parser.set_defaults(format='text', output=None)
+
+        # Daemon command
+        daemon_parser = subparsers.add_parser('daemon', help='Run a long-lived analysis server')
+        daemon_subparsers = daemon_parser.add_subparsers(dest='daemon_command', required=True)
+        daemon_subparsers.add_parser('start', help='Serve requests in the foreground')
+        daemon_subparsers.add_parser('stop', help='Stop the running daemon')
+        daemon_subparsers.add_parser('status', help='Show whether a daemon is running')
 
         # Config command
         config_parser = subparsers.add_parser('config', help='Manage configuration')
@@ -93,6 +180,7 @@ class CLI:
         config_path = Path("codepolice.yaml")
         if config_path.exists():
             try:
+                import yaml
                 with open(config_path, 'r') as f:
                     return yaml.safe_load(f)
             except Exception as e:
@@ -110,8 +198,12 @@ class CLI:
                 return self._run_check()
             elif self.args.command == 'fix':
                 return self._run_fix()
+            elif self.args.command == 'bench':
+                return self._run_bench()
             elif self.args.command == 'hook':
                 return self._run_hook()
+            elif self.args.command == 'daemon':
+                return self._run_daemon()
             elif self.args.command == 'config':
                 return self._run_config()
             else:
@@ -120,95 +212,492 @@ class CLI:
         except KeyboardInterrupt:
             print("\nOperation cancelled by user")
             return 130
+        except RuntimeError as e:
+            # e.g. a crashed worker pool; never report a partial run as clean
+            logger.error(str(e))
+            return 1
+        except BrokenPipeError:
+            # Reader of a streamed report (e.g. head) went away; silence the final flush
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 1
+        finally:
+            if self._copilot:
+                self._copilot.close()
 
     def _run_check(self) -> int:
         """Run code quality checks"""
-        from core.parser import CodeParser
-
         # List rules if requested
         if self.args.list_rules:
             self._list_rules()
             return 0
 
+        profiler = self._create_profiler()
+        if self.args.diff or self.args.staged:
+            return self._run_diff_check(profiler)
+
         # Process files
-        path = Path(self.args.path)
-        issues = []
+        files = self._collect_files(self.args.paths, profiler)
+        if self.args.daemon:
+            files = list(files)
+            failures = []
+            results = self._check_via_daemon(
+                files, failures, lambda client: client.check([str(py_file) for py_file in files])
+            )
+            if results is not None:
+                with self._open_report() as writer:
+                    for py_file, file_issues in results:
+                        writer.write_file(str(py_file), file_issues)
+                self._report_failures(failures)
+                return 1 if writer.total or failures else 0
+
+        # Only now pay for libcst and the rules: the daemon path stays a thin client
+        from core.cache import FileStateIndex, ResultCache
+        from core.scanner import Scanner
+
+        cache = None
+        index = None
+        fingerprint = self.rule_engine.fingerprint()
+        if not self.args.no_cache:
+            cache = ResultCache(Path(self.args.cache_dir), fingerprint)
+        if self.args.incremental:
+            index = FileStateIndex(Path(self.args.cache_dir), fingerprint)
+
+        jobs = self._jobs_for(self.args.paths)
+        seen = []
+        try:
+            with Scanner(self.rule_engine, cache, jobs, index, profiler) as scanner, self._open_report() as writer:
+                results = scanner.scan(self._remember(files, seen))
+                self._write_results(results, lambda py_file: py_file.read_bytes(), writer, profiler)
+            if index:
+                for path in map(Path, self.args.paths):
+                    if path.is_dir():
+                        index.prune(str(path), seen)
+        finally:
+            if cache:
+                cache.close()
+            if index:
+                index.close()
+
+        if cache:
+            print(cache.summary(), file=sys.stderr)
+        if index:
+            print(index.summary(), file=sys.stderr)
+        self._report_profile(profiler)
+        self._report_failures(scanner.failures)
+
+        return 1 if writer.total or scanner.failures else 0
+
+    def _run_diff_check(self, profiler: Optional[Any]) -> int:
+        """Check only the lines touched by a git diff, as they are on the diff's new side"""
+        from contextlib import ExitStack
+        from core.discovery import IgnoreRules
+        from core.scanner import Scanner
+        from integrations.git_hook import GitBlobReader, changed_lines, diff_blobs, repository_root
 
-        if path.is_dir():
-            for py_file in path.rglob("*.py"):
-                parser = CodeParser(str(py_file))
-                module = parser.get_ast()
-                issues.extend(self.rule_engine.run_rules(module))
-        else:
-            parser = CodeParser(str(path))
-            module = parser.get_ast()
-            issues.extend(self.rule_engine.run_rules(module))
+        try:
+            root = repository_root()
+            changes = changed_lines(root, self.args.diff, self.args.staged)
+            # Line numbers belong to the new side: a blob unless it is the working tree
+            blobs = dict(diff_blobs(root, self.args.diff, self.args.staged))
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
 
-        # Apply Copilot suggestions if enabled
-        if self.copilot and not self.args.no_copilot:
-            for issue in issues:
-                if hasattr(parser, 'get_code_snippet'):
-                    snippet = parser.get_code_snippet(issue['node'])
-                    issue['ai_suggestion'] = self.copilot.get_suggestion(snippet)
+        # Restrict to the requested paths, labelling files relative to the working directory
+        scope = [Path(path).resolve() for path in self.args.paths]
+        ignore = IgnoreRules.for_git(root)
+        names = {}
+        for name in sorted(changes):
+            path = root / name
+            if name not in blobs or ignore.is_ignored(path):
+                continue
+            if any(path == prefix or prefix in path.parents for prefix in scope):
+                names[os.path.relpath(path)] = name
+        changed = {label: changes[name] for label, name in names.items()}
+
+        with ExitStack() as stack:
+            # Open the blob reader first: forked workers inherit its pipe, so
+            # it can only see EOF after the pool has shut down
+            reader = None
+            if any(blobs[name] is not None for name in names.values()):
+                reader = stack.enter_context(GitBlobReader(root))
+            scanner = stack.enter_context(
+                Scanner(self.rule_engine, jobs=self.args.jobs, profiler=profiler, changed=changed)
+            )
+            writer = stack.enter_context(self._open_report())
+            loaders = {
+                label: Path(label).read_bytes if blobs[name] is None else partial(reader.read, blobs[name])
+                for label, name in names.items()
+            }
+            results = scanner.scan_sources((label, "", load) for label, load in loaders.items())
+            self._write_results(results, lambda label: loaders[str(label)](), writer, profiler)
+
+        self._report_profile(profiler)
+        self._report_failures(scanner.failures)
+        return 1 if writer.total or scanner.failures else 0
+
+    def _write_results(
+            self,
+            results: Iterable[Tuple[Any, List["Issue"]]],
+            load_source: Callable[[Any], bytes],
+            writer: Any,
+            profiler: Optional[Any]
+    ) -> None:
+        """
+        Write each file's issues in scan order, with Copilot suggestions
+
+        Suggestions for a file are requested as soon as it is scanned and the
+        scan moves on; a file is written once its suggestions arrive, so
+        network time overlaps scanning. Scanning pauses while more than
+        --ai-queue issues are waiting, and after --ai-budget seconds the
+        remaining issues get fallback suggestions.
+        """
+        import time
+        from collections import deque
+
+        copilot = None if self.args.no_copilot else self.copilot
+        if copilot is None:
+            for label, file_issues in results:
+                with self._stage(profiler, 'report'):
+                    writer.write_file(str(label), file_issues)
+            return
+
+        deadline = time.monotonic() + self.args.ai_budget if self.args.ai_budget is not None else None
+        pending = deque()
+        waiting = 0
+        for label, file_issues in results:
+            future = None
+            if file_issues:
+                source = load_source(label)
+                future = copilot.submit_suggestions(
+                    [issue.snippet(source) for issue in file_issues],
+                    deadline=deadline,
+                    rules=[issue.rule for issue in file_issues]
+                )
+                waiting += len(file_issues)
+            pending.append((label, file_issues, future))
+            # Write finished files, blocking on the oldest one only under backpressure
+            while pending and (waiting > self.args.ai_queue or pending[0][2] is None or pending[0][2].done()):
+                waiting -= self._write_next(pending, writer, profiler)
+
+        while pending:
+            self._write_next(pending, writer, profiler)
+
+    def _write_next(self, pending: Any, writer: Any, profiler: Optional[Any]) -> int:
+        """Write the oldest pending file once its suggestions are in; returns its issue count"""
+        label, file_issues, future = pending.popleft()
+        if future is None:
+            count = 0
+        else:
+            # Only the time spent blocked on suggestions is charged here
+            with self._stage(profiler, 'copilot'):
+                suggestions = future.result()
+            for issue, suggestion in zip(file_issues, suggestions):
+                issue.ai_suggestion = suggestion
+            count = len(file_issues)
+        with self._stage(profiler, 'report'):
+            writer.write_file(str(label), file_issues)
+        return count
+
+    @contextmanager
+    def _open_report(self) -> Iterator[Any]:
+        """Report writer for --format, targeting --output or stdout"""
+        from core.report import create_writer
+
+        stream = open(self.args.output, 'w') if self.args.output else sys.stdout
+        writer = create_writer(self.args.format, stream)
+        try:
+            yield writer
+        finally:
+            writer.close()
+            if self.args.output:
+                stream.close()
+        if self.args.output:
+            print(f"✅ Report saved to {self.args.output}")
 
-        # Output results
-        self._output_results(issues)
+    @staticmethod
+    def _report_failures(failures: List[str]) -> None:
+        """Summarize files that could not be analyzed; each was already logged"""
+        if failures:
+            print(f"❌ {len(failures)} files could not be analyzed", file=sys.stderr)
+
+    def _create_profiler(self) -> Optional[Any]:
+        """Create a StageProfiler if --profile or --profile-json was given"""
+        if not (self.args.profile or self.args.profile_json):
+            return None
+        from core.profiler import StageProfiler
+        return StageProfiler()
+
+    @staticmethod
+    def _stage(profiler: Optional[Any], name: str):
+        """Time a CLI-side stage when profiling, no-op otherwise"""
+        return profiler.stage(name) if profiler is not None else nullcontext()
+
+    def _report_profile(self, profiler: Optional[Any]) -> None:
+        """Emit the collected profile"""
+        if profiler is None:
+            return
+        profiler.finish()
+        if self.args.profile:
+            print(profiler.format_summary(), file=sys.stderr)
+        if self.args.profile_json:
+            profiler.write_json(self.args.profile_json)
+
+    def _collect_files(self, paths: List[str], profiler: Optional[Any] = None) -> Iterator[Path]:
+        """Lazily expand files and directories into the Python files to analyze"""
+        from core.discovery import FileDiscovery
+
+        files = FileDiscovery(paths, use_git=not self.args.no_git)
+        return profiler.timed_iter('discovery', files) if profiler is not None else iter(files)
+
+    @staticmethod
+    def _remember(files: Iterable[Path], seen: List[str]) -> Iterator[Path]:
+        """Pass files through, recording them for index pruning"""
+        for py_file in files:
+            seen.append(str(py_file))
+            yield py_file
 
-        return 1 if issues else 0
+    def _jobs_for(self, paths: List[str]) -> Optional[int]:
+        """Worker count; a single named file is not worth starting a pool for"""
+        if len(paths) == 1 and not Path(paths[0]).is_dir():
+            return 1
+        return self.args.jobs
+
+    def _check_via_daemon(
+            self,
+            labels: List[Any],
+            failures: List[str],
+            request: Callable[[Any], Iterator[Dict[str, Any]]]
+    ) -> Optional[Iterator[Tuple[Any, List["Issue"]]]]:
+        """
+        Run the check in a warm daemon; returns None if none is running
+        Args:
+            labels: Names to report each file under, in request order
+            failures: Receives an error for each file the daemon could not analyze
+            request: Sends the check through a DaemonClient, yielding its records
+        """
+        from core.issue import Issue
+        from integrations.daemon import DaemonClient
+
+        client = DaemonClient()
+        if not client.is_running():
+            logger.info("No codepolice daemon running - checking in-process")
+            return None
+
+        def results() -> Iterator[Tuple[Any, List[Issue]]]:
+            # Records come back in request order; keep the paths as the user gave them
+            for label, record in zip(labels, request(client)):
+                if 'error' in record:
+                    logger.error(record['error'])
+                    failures.append(record['error'])
+                yield label, [Issue.from_dict(dict(issue, file=str(label))) for issue in record['issues']]
+
+        return results()
+
+    def _run_daemon(self) -> int:
+        """Manage the analysis daemon"""
+        from integrations.daemon import AnalysisDaemon, DaemonClient
+
+        client = DaemonClient()
+        if self.args.daemon_command == 'start':
+            AnalysisDaemon().serve_forever()
+        elif self.args.daemon_command == 'stop':
+            if client.is_running():
+                client.shutdown()
+                print("✅ CodePolice daemon stopped")
+            else:
+                print("No CodePolice daemon running")
+        elif self.args.daemon_command == 'status':
+            if client.is_running():
+                print(f"CodePolice daemon running on {client.socket_path}")
+            else:
+                print("No CodePolice daemon running")
+                return 1
+        return 0
 
     def _run_fix(self) -> int:
         """Apply automatic fixes"""
-        from core.parser import CodeParser
-        from core.fixer import CodeFixer
+        from core.atomic_write import FixTransaction
+        from core.scanner import Scanner
 
         path = Path(self.args.path)
         if not path.exists():
             logger.error(f"Path not found: {path}")
             return 1
 
-        # Process files
-        if path.is_dir():
-            files = path.rglob("*.py")
-        else:
-            files = [path]
-
-        for py_file in files:
-            parser = CodeParser(str(py_file))
-            module = parser.get_ast()
-            issues = self.rule_engine.run_rules(module)
-
-            if issues:
-                print(f"\nProcessing {py_file}:")
-
-                # Filter issues if --only specified
-                if self.args.only:
-                    issues = [i for i in issues if i['rule'] == self.args.only]
-
-                fixer = CodeFixer(module)
-                fixed_module = fixer.apply_fixes(issues)
-
-                # Show diff
-                diff = fixer.generate_diff()
-                print(diff)
+        profiler = self._create_profiler()
 
-                # Write changes
-                if self.args.apply:
-                    with open(py_file, 'w') as f:
-                        f.write(fixed_module.code)
-                    print(f"✅ Applied fixes to {py_file}")
+        # Process files
+        files = self._collect_files([str(path)], profiler)
+        jobs = self._jobs_for([str(path)])
+
+        # Workers write fixed files themselves; transactional runs stage them
+        # and replace every file only once all of them staged
+        write = None
+        transaction = None
+        if self.args.apply:
+            write = 'stage' if self.args.transactional else 'apply'
+            if self.args.transactional:
+                transaction = FixTransaction()
+
+        # Diffs are written as each file finishes, so a patch for any number
+        # of files never sits in memory
+        patch = open(self.args.patch, 'w', encoding='utf-8', newline='') if self.args.patch else None
+        changed = failed = deferred = 0
+        try:
+            with Scanner(self.rule_engine, jobs=jobs, profiler=profiler) as scanner:
+                max_passes = self.args.max_passes if self.args.until_stable else 1
+                for py_file, result in scanner.fix(files, self.args.only, max_passes, write):
+                    if result is None:
+                        continue
+                    changed += 1
+
+                    # Show diff
+                    with self._stage(profiler, 'report'):
+                        if patch is not None:
+                            patch.write(result.diff)
+                        else:
+                            print(f"\nProcessing {py_file}:")
+                            sys.stdout.write(result.diff)
+                            sys.stdout.flush()
+
+                    for issue in result.deferred:
+                        deferred += 1
+                        print(f"⏭️  {py_file}:{issue.line}: {issue.rule} fix deferred, it overlaps another fix")
+
+                    if result.error:
+                        failed += 1
+                        logger.error(result.error)
+                    elif result.temp:
+                        transaction.add(str(py_file), result.temp)
+                    elif write and patch is None:
+                        print(f"✅ Applied fixes to {py_file}")
+
+            if transaction is not None:
+                # All or nothing: a file that failed to parse or fix fails the transaction too
+                if failed or scanner.failures:
+                    transaction.abort()
+                    print(f"❌ {failed + len(scanner.failures)} files could not be fixed - no files were changed")
                 else:
-                    print("💡 Use --apply to apply these changes")
-
+                    with self._stage(profiler, 'write'):
+                        transaction.commit()
+                    print(f"✅ Applied fixes to {changed} files")
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
+        finally:
+            if transaction is not None:
+                transaction.abort()
+            if patch is not None:
+                patch.close()
+
+        if patch is not None:
+            print(f"✅ Patch for {changed} files saved to {self.args.patch}")
+        if changed and not self.args.apply:
+            print("💡 Use --apply to apply these changes")
+        if deferred:
+            print(f"💡 {deferred} fixes were deferred; apply these changes and run fix again, or use --until-stable")
+
+        self._report_profile(profiler)
+        self._report_failures(scanner.failures)
+        return 1 if failed or scanner.failures else 0
+
+    def _run_bench(self) -> int:
+        """Run the benchmark suite"""
+        import json
+        from core import bench
+
+        if self.args.corpus:
+            corpora = {Path(self.args.corpus).name or 'corpus': bench.load_corpus(Path(self.args.corpus))}
+        elif self.args.startup and not self.args.shape:
+            corpora = {}
+        else:
+            corpora = {
+                shape: bench.generate_corpus(shape, self.args.scale, self.args.seed)
+                for shape in self.args.shape or list(bench.SHAPES)
+            }
+            if self.args.write_corpus:
+                for shape, corpus in corpora.items():
+                    bench.write_corpus(corpus, Path(self.args.write_corpus) / shape)
+
+        results = bench.run_benchmark(self.rule_engine, corpora, self.args.repeat)
+        if self.args.startup:
+            results['startup'] = bench.measure_startup(Path(__file__).resolve(), repeat=max(5, self.args.repeat))
+        if self.args.ai_keys:
+            results['snippet_keys'] = bench.measure_snippet_keys(self.rule_engine, corpora)
+        print(bench.format_results(results))
+        if self.args.output:
+            with open(self.args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+
+        if self.args.compare:
+            regressions = bench.compare_results(results, bench.load_results(self.args.compare), self.args.threshold)
+            for item in regressions:
+                print(f"❌ {item['corpus']} {item['metric']}: {item['baseline']:.4f}s -> "
+                      f"{item['current']:.4f}s ({item['change']:+.0%})")
+            if regressions:
+                return 1
+            print(f"✅ No regressions beyond {self.args.threshold:.0%}")
         return 0
 
     def _run_hook(self) -> int:
         """Manage Git hooks"""
+        from integrations.git_hook import GitHookManager
+
+        if self.args.hook_command == 'run':
+            return self._run_hook_check()
         if self.args.hook_command == 'install':
             GitHookManager.install()
         elif self.args.hook_command == 'uninstall':
             GitHookManager.uninstall()
         return 0
 
+    def _run_hook_check(self) -> int:
+        """Check staged blobs, in a running daemon or through one git cat-file --batch process"""
+        from core.discovery import IgnoreRules
+        from integrations.git_hook import GitBlobReader, repository_root, staged_blobs
+
+        try:
+            root = repository_root()
+        except RuntimeError as e:
+            logger.error(str(e))
+            return 1
+
+        ignore = IgnoreRules.for_git(root)
+        blobs = [(path, sha) for path, sha in staged_blobs(root) if not ignore.is_ignored(root / path)]
+        if not blobs:
+            return 0
+
+        if not self.args.no_daemon:
+            failures = []
+            results = self._check_via_daemon(
+                [path for path, _ in blobs], failures, lambda client: client.check_blobs(str(root), blobs)
+            )
+            if results is not None:
+                with self._open_report() as writer:
+                    for path, issues in results:
+                        writer.write_file(path, issues)
+                self._report_failures(failures)
+                return 1 if writer.total or failures else 0
+
+        # Only now pay for libcst and the rules: the daemon path stays a thin client
+        from core.cache import ResultCache
+        from core.scanner import Scanner
+
+        # Blob SHAs already identify content, so a recommit of unchanged blobs is all cache hits
+        cache = None if self.args.no_cache else ResultCache(root / self.args.cache_dir, self.rule_engine.fingerprint())
+        try:
+            with GitBlobReader(root) as reader, Scanner(self.rule_engine, cache, self.args.jobs) as scanner, \
+                    self._open_report() as writer:
+                sources = ((path, f"git-blob:{sha}", partial(reader.read, sha)) for path, sha in blobs)
+                for path, issues in scanner.scan_sources(sources):
+                    writer.write_file(path, issues)
+        finally:
+            if cache:
+                cache.close()
+        self._report_failures(scanner.failures)
+        return 1 if writer.total or scanner.failures else 0
+
     def _run_config(self) -> int:
         """Manage configuration"""
         config_path = Path("codepolice.yaml")
@@ -229,6 +718,7 @@ class CLI:
                 }
             }
 
+            import yaml
             with open(config_path, 'w') as f:
                 yaml.dump(default_config, f, default_flow_style=False)
             print(f"✅ Created configuration file at {config_path}")
@@ -262,88 +752,10 @@ class CLI:
             for rule in rule_list:
                 print(f"  - {rule}")
 
-    def _output_results(self, issues: List[Dict]) -> None:
-        """Output results in specified format"""
-        if self.args.format == 'json':
-            output = json.dumps(issues, indent=2)
-        elif self.args.format == 'html':
-            output = self._generate_html_report(issues)
-        else:
-            output = self._generate_text_report(issues)
-
-        # Print or save to file
-        if self.args.output:
-            with open(self.args.output, 'w') as f:
-                f.write(output)
-            print(f"✅ Report saved to {self.args.output}")
-        else:
-            print(output)
-
-    def _generate_text_report(self, issues: List[Dict]) -> str:
-        """Generate human-readable text report"""
-        output = ""
-
-        for issue in issues:
-            node = issue.pop('node', None)
-            location = f"{issue['line']}:{issue['column']}"
-            color = "\033[91m" if issue['severity'] == 'error' else "\033[93m"
-            reset = "\033[0m"
-
-            output += f"{color}{issue['rule']} ({location}){reset}\n"
-            output += f"  Message: {issue['message']}\n"
-            output += f"  Suggestion: {issue['suggestion']}\n"
-            output += "-" * 50 + "\n"
-
-        return output
-
-    def _generate_html_report(self, issues: List[Dict]) -> str:
-        """Generate HTML formatted report"""
-        template = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>CodePolice Report</title>
-    <style>
-        body { font-family: Arial, sans-serif; padding: 20px; }
-        .issue { border: 1px solid #ddd; padding: 15px; margin-bottom: 15px; }
-        .rule { font-weight: bold; color: #2c3e50; }
-        .location { color: #7f8c8d; float: right; }
-        .message { margin-top: 10px; }
-        .suggestion { margin-top: 10px; color: #27ae60; }
-    </style>
-</head>
-<body>
-    <h1>CodePolice Report</h1>
-    <p>Total Issues: {total}</p>
-
-    {issues}
-</body>
-</html>
-"""
-
-        issue_template = """
-<div class="issue">
-    <div class="rule">{rule} <span class="location">Line {line}:{column}</span></div>
-    <div class="message">{message}</div>
-    <div class="suggestion">Suggestion: {suggestion}</div>
-</div>
-"""
-
-        html_issues = ""
-        for issue in issues:
-            html_issues += issue_template.format(**issue)
-
-        return template.format(
-            total=len(issues),
-            issues=html_issues
-        )
-
 
 # Main entry point
 if __name__ == "__main__":
-    try:
-        import yaml
-    except ImportError:
+    if importlib.util.find_spec("yaml") is None:
         print("Error: PyYAML is required for CodePolice")
         print("Please install it using: pip install pyyaml")
         sys.exit(1)
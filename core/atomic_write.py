@@ -0,0 +1,183 @@
+"""
+Atomic File Writes for CodePolice
+Crash-safe replacement of source files, singly or as an all-or-nothing transaction
+"""
+
+import os
+import stat
+import shutil
+import logging
+import tempfile
+import tokenize
+from typing import List, Tuple
+
+logger = logging.getLogger("CodePoliceWriter")
+
+
+def encode_like(text: str, original: bytes) -> bytes:
+    """
+    Encode fixed source the way the original file was encoded
+    Args:
+        text: Source with '\\n' line endings, as the parser read it
+        original: Raw bytes of the file being replaced
+    Returns:
+        text in the original's encoding (coding cookie or BOM) and line endings
+    """
+    lines = original.splitlines(keepends=True)
+    encoding, _ = tokenize.detect_encoding(iter(lines).__next__)
+    if lines and lines[0].endswith(b"\r\n"):
+        text = text.replace("\n", "\r\n")
+    elif lines and lines[0].endswith(b"\r"):
+        text = text.replace("\n", "\r")
+    # The parser kept a BOM as text; utf-8-sig adds its own
+    if encoding == 'utf-8-sig':
+        text = text.lstrip("\ufeff")
+    return text.encode(encoding)
+
+
+def _fsync_directory(directory: str) -> None:
+    """Make a rename durable; not every platform can open directories"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def stage_file(path: str, text: str) -> str:
+    """
+    Write fixed source to a temporary file beside path, ready to replace it
+    Args:
+        path: File being fixed (symlinks are followed)
+        text: Fixed source
+    Returns:
+        Path of the fsynced temporary file, with path's mode and owner
+    """
+    path = os.path.realpath(path)
+    with open(path, 'rb') as f:
+        original = f.read()
+        info = os.fstat(f.fileno())
+    data = encode_like(text, original)
+
+    directory, name = os.path.split(path)
+    fd, temp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp, stat.S_IMODE(info.st_mode))
+        if hasattr(os, 'chown'):
+            try:
+                os.chown(temp, info.st_uid, info.st_gid)
+            except OSError:
+                pass
+    except BaseException:
+        _remove(temp)
+        raise
+    return temp
+
+
+def commit_file(temp: str, path: str) -> None:
+    """Atomically replace path with a file from stage_file"""
+    path = os.path.realpath(path)
+    os.replace(temp, path)
+    _fsync_directory(os.path.dirname(path))
+
+
+def atomic_write(path: str, text: str) -> None:
+    """
+    Replace a source file so readers and crashes only ever see the old or
+    the new content, never a partial write
+    """
+    commit_file(stage_file(path, text), path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class FixTransaction:
+    """
+    All-or-nothing replacement of many files
+
+    Files are staged (written and fsynced to temporary files, typically by
+    pool workers) and only replaced by commit(), once every file staged
+    successfully. Originals are kept as hard links until the commit ends,
+    so a failure part-way through restores every file already replaced.
+    """
+
+    def __init__(self):
+        self.staged: List[Tuple[str, str]] = []  # (path, temp file)
+
+    def add(self, path: str, temp: str) -> None:
+        self.staged.append((path, temp))
+
+    def abort(self) -> None:
+        """Discard staged files, leaving every original untouched"""
+        for _, temp in self.staged:
+            _remove(temp)
+        self.staged = []
+
+    def commit(self) -> None:
+        """
+        Replace every staged file
+        Raises:
+            RuntimeError: a file could not be replaced; all files were rolled back
+        """
+        replaced: List[Tuple[str, str]] = []  # (path, backup of the original)
+        try:
+            for path, temp in self.staged:
+                path = os.path.realpath(path)
+                backup = self._backup(path)
+                try:
+                    os.replace(temp, path)
+                except BaseException:
+                    _remove(backup)
+                    raise
+                replaced.append((path, backup))
+        except BaseException as e:
+            failures = self._rollback(replaced)
+            self.abort()
+            if failures:
+                logger.error(f"Rollback incomplete, originals kept at: {', '.join(failures)}")
+            if isinstance(e, Exception):
+                raise RuntimeError(f"Failed to apply fixes, all files rolled back: {e}") from e
+            raise
+
+        for directory in {os.path.dirname(path) for path, _ in replaced}:
+            _fsync_directory(directory)
+        for _, backup in replaced:
+            _remove(backup)
+        self.staged = []
+
+    @staticmethod
+    def _backup(path: str) -> str:
+        directory, name = os.path.split(path)
+        backup = os.path.join(directory, f".{name}.{os.getpid()}.orig")
+        _remove(backup)
+        try:
+            os.link(path, backup)
+        except OSError:
+            # No hard links on this filesystem
+            shutil.copy2(path, backup)
+        return backup
+
+    @staticmethod
+    def _rollback(replaced: List[Tuple[str, str]]) -> List[str]:
+        """Put originals back; returns backups that could not be restored"""
+        failures = []
+        for path, backup in reversed(replaced):
+            try:
+                os.replace(backup, path)
+            except OSError:
+                failures.append(backup)
+        return failures
@@ -0,0 +1,425 @@
+"""
+Benchmark Module for CodePolice
+Generates synthetic corpora and measures parser, rule engine and fixer throughput
+"""
+
+import sys
+import json
+import time
+import random
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from core.parser import CodeParser
+from core.profiler import StageProfiler
+from core.rule_engine import RuleEngine
+
+BENCH_FORMAT_VERSION = 1
+
+# Timings below this many seconds are too noisy to flag as regressions
+NOISE_FLOOR = 0.005
+
+
+def _small_file(rng: random.Random, index: int) -> str:
+    """A short module of the kind most projects are made of"""
+    lines = ["import os", "import sys", "from typing import List", ""]
+    for n in range(rng.randint(2, 5)):
+        name = f"handleItem{index}_{n}" if rng.random() < 0.3 else f"handle_item_{index}_{n}"
+        lines += [
+            f"def {name}(values: List[int]) -> int:",
+            f"    total = sum(v * {n + 1} for v in values)",
+            "    squares = [abs(v) for v in values]",
+            "    return total + len(squares)",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _huge_file(rng: random.Random, functions: int) -> str:
+    """One very long module with many functions and classes"""
+    lines = ["import json", "import re", "import collections", ""]
+    for n in range(functions):
+        if n % 10 == 0:
+            lines += [f"class Service{n}:", "    def run(self, data):", "        return json.dumps(data)", ""]
+        lines += [
+            f"def compute_{n}(rows):",
+            "    result = []",
+            "    for row in rows:",
+            f"        if row > {rng.randint(0, 100)}:",
+            "            result.append(row * 2)",
+            "    matrix = [[x * y for x in row] for y in rows]",
+            "    return result, matrix",
+            "",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _nested_file(rng: random.Random, depth: int) -> str:
+    """Deeply nested control flow and comprehensions"""
+    lines = ["def nested(data):"]
+    indent = "    "
+    for level in range(depth):
+        keyword = rng.choice(["if data:", f"for item{level} in data:", "while data:", f"with data as ctx{level}:"])
+        lines.append(f"{indent}{keyword}")
+        indent += "    "
+        if keyword == "while data:":
+            lines.append(f"{indent}data = data[1:]")
+    lines.append(f"{indent}value = [[[a + b + c for a in data] for b in data] for c in data]")
+    lines.append(f"{indent}return [len(str(v)) for v in value]")
+    lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def _string_file(rng: random.Random, count: int) -> str:
+    """String-heavy module, including values that look like secrets"""
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot"]
+    keys = ["message", "title", "password", "api_key", "label", "token"]
+    lines = []
+    for n in range(count):
+        key = rng.choice(keys)
+        value = " ".join(rng.choice(words) for _ in range(rng.randint(3, 30)))
+        lines.append(f"{key}_{n} = '{value}'")
+        if n % 25 == 0:
+            lines.append(f"{key} = 'secret-{n}'")
+            lines.append(f"TEMPLATE_{n} = f\"{{{key}}} {value}\"")
+    return "\n".join(lines) + "\n"
+
+
+# Shape name -> (description, generator(rng, scale) -> [(relative path, source)])
+SHAPES: Dict[str, Tuple[str, Callable[[random.Random, float], List[Tuple[str, str]]]]] = {
+    'small': (
+        "many small files",
+        lambda rng, scale: [(f"pkg/mod_{i}.py", _small_file(rng, i)) for i in range(max(1, int(200 * scale)))]
+    ),
+    'huge': (
+        "a few huge files",
+        lambda rng, scale: [(f"huge_{i}.py", _huge_file(rng, max(1, int(300 * scale)))) for i in range(2)]
+    ),
+    'nested': (
+        "deeply nested code",
+        lambda rng, scale: [(f"nested_{i}.py", _nested_file(rng, 30)) for i in range(max(1, int(20 * scale)))]
+    ),
+    'strings': (
+        "string-heavy code",
+        lambda rng, scale: [(f"strings_{i}.py", _string_file(rng, max(1, int(300 * scale)))) for i in range(5)]
+    ),
+}
+
+
+def generate_corpus(shape: str, scale: float = 1.0, seed: int = 0) -> List[Tuple[str, bytes]]:
+    """
+    Generate a deterministic synthetic corpus
+    Args:
+        shape: One of SHAPES
+        scale: Size multiplier
+        seed: Random seed, so the same arguments always give the same corpus
+    Returns:
+        List of (relative path, content)
+    """
+    if shape not in SHAPES:
+        raise RuntimeError(f"Unknown corpus shape: {shape}")
+    rng = random.Random(f"{seed}:{shape}")
+    return [(path, source.encode('utf-8')) for path, source in SHAPES[shape][1](rng, scale)]
+
+
+def load_corpus(root: Path) -> List[Tuple[str, bytes]]:
+    """Load every parseable Python file under root as a corpus"""
+    root = Path(root)
+    files = sorted(root.rglob("*.py")) if root.is_dir() else [root]
+    corpus = []
+    for path in files:
+        content = path.read_bytes()
+        try:
+            CodeParser(str(path), source=content.decode('utf-8'))
+        except (RuntimeError, UnicodeDecodeError):
+            # Benchmarks need every stage to run on every file
+            continue
+        corpus.append((str(path.relative_to(root) if root.is_dir() else path), content))
+    return corpus
+
+
+def write_corpus(corpus: Iterable[Tuple[str, bytes]], root: Path) -> None:
+    """Materialize a generated corpus on disk, e.g. to benchmark check end to end"""
+    for relative, content in corpus:
+        target = Path(root) / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+
+
+def _measure_once(engine: RuleEngine, corpus: List[Tuple[str, bytes]]) -> Dict[str, Any]:
+    """Run every stage once over the corpus"""
+    from libcst.metadata import PositionProvider
+    from core.fixer import CodeFixer
+    from core.scanner import analyze_source
+
+    profiler = StageProfiler()
+    parse = rules = fix = 0.0
+
+    start = time.perf_counter()
+    for path, content in corpus:
+        analyze_source(engine, path, content)
+    end_to_end = time.perf_counter() - start
+
+    for path, content in corpus:
+        source = content.decode('utf-8')
+        start = time.perf_counter()
+        parser = CodeParser(path, source=source)
+        parse += time.perf_counter() - start
+
+        start = time.perf_counter()
+        issues = engine.run_rules(parser, path, profiler=profiler)
+        rules += time.perf_counter() - start
+
+        start = time.perf_counter()
+        CodeFixer(parser.get_ast(), parser.resolve_metadata(PositionProvider)).apply_fixes(issues)
+        fix += time.perf_counter() - start
+
+    metadata = profiler.stages['metadata']
+    return {
+        'end_to_end_seconds': end_to_end,
+        'parse_seconds': parse,
+        'metadata_seconds': metadata,
+        'rules_seconds': rules - metadata,
+        'fix_seconds': fix,
+        'rules': dict(profiler.rules),
+    }
+
+
+# CLI invocations whose startup cost is tracked
+STARTUP_COMMANDS = (
+    ('--help',),
+    ('config', 'show'),
+    ('hook', '--help'),
+)
+
+
+def _parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Parse `python -X importtime` output
+    Returns:
+        (total import seconds, [(module, self seconds)])
+    """
+    total = 0.0
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        modules.append((name.strip(), int(own) / 1e6))
+        # Top-level imports are not indented; their cumulative time covers the rest
+        if not name.startswith('  ', 1):
+            total += int(cumulative) / 1e6
+    return total, modules
+
+
+def measure_startup(
+        entry_point: Path,
+        commands: Iterable[Tuple[str, ...]] = STARTUP_COMMANDS,
+        repeat: int = 5,
+        top: int = 10
+) -> Dict[str, Any]:
+    """
+    Measure CLI startup in fresh interpreters
+    Args:
+        entry_point: Path to cli.py
+        commands: Argument lists to time
+        repeat: Runs per command (median is kept)
+        top: Number of most expensive imports to report
+    Returns:
+        Command line -> wall and import time
+    """
+    results = {}
+    for command in commands:
+        walls, imports, costs = [], [], {}
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, '-X', 'importtime', str(entry_point), *command],
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+            )
+            walls.append(time.perf_counter() - start)
+            total, modules = _parse_importtime(completed.stderr)
+            imports.append(total)
+            for name, seconds in modules:
+                costs.setdefault(name, []).append(seconds)
+
+        slowest = sorted(((statistics.median(v), name) for name, v in costs.items()), reverse=True)[:top]
+        results[' '.join(command)] = {
+            'wall_seconds': statistics.median(walls),
+            'import_seconds': statistics.median(imports),
+            'modules_imported': len(costs),
+            'slowest_imports': [{'module': name, 'seconds': seconds} for seconds, name in slowest],
+        }
+    return results
+
+
+def run_benchmark(
+        engine: RuleEngine,
+        corpora: Dict[str, List[Tuple[str, bytes]]],
+        repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Benchmark each corpus, keeping the median of several runs
+    Args:
+        engine: Rule engine under test
+        corpora: Corpus name -> files
+        repeat: Runs per corpus
+    Returns:
+        JSON-serializable results
+    """
+    import libcst
+
+    results = {
+        'format': BENCH_FORMAT_VERSION,
+        'environment': {
+            'python': sys.version.split()[0],
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'libcst': getattr(libcst, '__version__', 'unknown'),
+            'engine_fingerprint': engine.fingerprint(),
+        },
+        'repeat': repeat,
+        'corpora': {},
+    }
+
+    for name, corpus in corpora.items():
+        runs = [_measure_once(engine, corpus) for _ in range(max(1, repeat))]
+        size = sum(len(content) for _, content in corpus)
+        lines = sum(content.count(b"\n") for _, content in corpus)
+        summary = {
+            key: statistics.median(run[key] for run in runs)
+            for key in runs[0] if key != 'rules'
+        }
+        summary['rules'] = {
+            rule_id: statistics.median(run['rules'].get(rule_id, 0.0) for run in runs)
+            for rule_id in runs[0]['rules']
+        }
+        elapsed = summary['end_to_end_seconds']
+        summary.update({
+            'files': len(corpus),
+            'bytes': size,
+            'lines': lines,
+            'files_per_second': len(corpus) / elapsed if elapsed else 0.0,
+            'bytes_per_second': size / elapsed if elapsed else 0.0,
+        })
+        results['corpora'][name] = summary
+
+    return results
+
+
+def measure_snippet_keys(engine: RuleEngine, corpora: Dict[str, List[Tuple[str, bytes]]]) -> Dict[str, Any]:
+    """
+    Suggestion cache hit rate with raw and with normalized snippet keys
+    A cold cache is assumed: every issue after the first with a given key
+    is a hit (or joins a request already in flight).
+    """
+    import hashlib
+    from core.scanner import analyze_source
+    from models.snippet_normalizer import normalize_snippet
+
+    results = {}
+    for name, corpus in corpora.items():
+        total = 0
+        raw_keys, normalized_keys = set(), set()
+        for path, content in corpus:
+            for issue in analyze_source(engine, path, content):
+                snippet = issue.snippet(content)
+                total += 1
+                raw_keys.add(hashlib.sha256(snippet.encode()).hexdigest())
+                normalized = normalize_snippet(snippet)
+                normalized_keys.add(normalized.key(issue.rule) if normalized else f"raw:{snippet}")
+        results[name] = {
+            'issues': total,
+            'raw_keys': len(raw_keys),
+            'normalized_keys': len(normalized_keys),
+            'raw_hit_rate': 1 - len(raw_keys) / total if total else 0.0,
+            'normalized_hit_rate': 1 - len(normalized_keys) / total if total else 0.0,
+        }
+    return results
+
+
+def compare_results(
+        current: Dict[str, Any],
+        baseline: Dict[str, Any],
+        threshold: float = 0.10
+) -> List[Dict[str, Any]]:
+    """
+    Find timings that got slower than a baseline run
+    Args:
+        current: run_benchmark() output
+        baseline: A previous run_benchmark() output
+        threshold: Allowed slowdown as a fraction (0.10 = 10%)
+    Returns:
+        One record per regressed metric
+    """
+    regressions = []
+    sections = [
+        (name, now, baseline.get('corpora', {}).get(name)) for name, now in current.get('corpora', {}).items()
+    ] + [
+        (f"startup:{command}", now, baseline.get('startup', {}).get(command))
+        for command, now in current.get('startup', {}).items()
+    ]
+    for name, now, before in sections:
+        if before is None:
+            continue
+
+        metrics = [(key, now[key], before.get(key)) for key in now if key.endswith('_seconds')]
+        metrics += [
+            (f"rule:{rule_id}", seconds, before.get('rules', {}).get(rule_id))
+            for rule_id, seconds in now.get('rules', {}).items()
+        ]
+        for metric, value, old in metrics:
+            if old is None or max(value, old) < NOISE_FLOOR:
+                continue
+            change = (value - old) / old if old else float('inf')
+            if change > threshold:
+                regressions.append({
+                    'corpus': name,
+                    'metric': metric,
+                    'baseline': old,
+                    'current': value,
+                    'change': change,
+                })
+    return regressions
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """Human-readable benchmark table"""
+    lines = []
+    if results.get('startup'):
+        lines.append(f"{'startup command':<20} {'wall':>9} {'imports':>9} {'modules':>8}")
+        for command, data in results['startup'].items():
+            lines.append(f"{command:<20} {data['wall_seconds'] * 1000:>7.1f}ms "
+                         f"{data['import_seconds'] * 1000:>7.1f}ms {data['modules_imported']:>8}")
+        if not results['corpora']:
+            return "\n".join(lines)
+        lines.append("")
+    lines += [f"{'corpus':<10} {'files':>6} {'KiB':>8} {'total':>9} {'parse':>9} "
+             f"{'metadata':>9} {'rules':>9} {'fix':>9} {'files/s':>9}"]
+    for name, data in results['corpora'].items():
+        lines.append(
+            f"{name:<10} {data['files']:>6} {data['bytes'] / 1024:>8.1f} "
+            f"{data['end_to_end_seconds']:>8.3f}s {data['parse_seconds']:>8.3f}s "
+            f"{data['metadata_seconds']:>8.3f}s {data['rules_seconds']:>8.3f}s "
+            f"{data['fix_seconds']:>8.3f}s {data['files_per_second']:>9.1f}"
+        )
+    if results.get('snippet_keys'):
+        lines += ["", f"{'corpus':<10} {'issues':>7} {'raw keys':>9} {'raw hits':>9} {'norm keys':>10} {'norm hits':>10}"]
+        for name, data in results['snippet_keys'].items():
+            lines.append(
+                f"{name:<10} {data['issues']:>7} {data['raw_keys']:>9} {data['raw_hit_rate']:>9.1%} "
+                f"{data['normalized_keys']:>10} {data['normalized_hit_rate']:>10.1%}"
+            )
+    return "\n".join(lines)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Read a previously written benchmark JSON file"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"Failed to load benchmark baseline {path}: {e}")
@@ -0,0 +1,286 @@
+"""
+Result Cache Module for CodePolice
+Stores per-file issue lists keyed by content and rule configuration
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from core.issue import Issue
+
+logger = logging.getLogger("CodePoliceCache")
+
+# Bump when the on-disk layout or issue serialization changes
+CACHE_FORMAT_VERSION = 2
+
+# Results kept by ResultCache; least recently used entries are evicted beyond it
+RESULT_CACHE_MAX_ENTRIES = 100_000
+
+# Files modified this close to when their state was recorded may have
+# changed again within the filesystem's timestamp granularity
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def content_digest(content: bytes) -> str:
+    """SHA-256 hex digest of raw file content"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _dump_issues(issues: List[Issue]) -> str:
+    """Serialize issues without their file paths"""
+    return json.dumps([
+        {k: v for k, v in issue.to_dict().items() if k != 'file'} for issue in issues
+    ])
+
+
+def _load_issues(data: str) -> List[Issue]:
+    """Inverse of _dump_issues"""
+    return [Issue.from_dict(item) for item in json.loads(data)]
+
+
+def _open_database(path: Path, schema: str) -> Optional[sqlite3.Connection]:
+    """Open (and create if needed) a cache database in WAL mode"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path))
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(schema)
+        return conn
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Cache disabled: {e}")
+        return None
+
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of analysis results
+
+    Entries are keyed by (file content hash, rule engine fingerprint), so a
+    cached result is reused for any file with identical bytes and is
+    invalidated automatically when rules or their configuration change.
+    Several configurations or checkouts can share one cache directory, so
+    entries are never dropped for their fingerprint; instead, on close the
+    cache is trimmed to max_entries by last use, so it never grows without
+    bound.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Path = Path(".codepolice_cache"),
+            fingerprint: str = "",
+            max_entries: int = RESULT_CACHE_MAX_ENTRIES
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._used: List[str] = []  # Keys hit this run, to refresh their last use on close
+        self._conn = _open_database(
+            self.cache_dir / "results.sqlite",
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                used_at INTEGER NOT NULL,
+                issues TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+            """
+        )
+
+    def key_for(self, content: bytes) -> str:
+        """Build the cache key for a file's raw content"""
+        return self.key_for_digest(content_digest(content))
+
+    def key_for_digest(self, digest: str) -> str:
+        """Build the cache key from a precomputed content digest"""
+        return hashlib.sha256(
+            f"{CACHE_FORMAT_VERSION}:{self.fingerprint}:{digest}".encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Issue]]:
+        """Return cached issues for key, or None on a miss"""
+        row = None
+        if self._conn is not None:
+            try:
+                row = self._conn.execute(
+                    "SELECT issues FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Cache load error: {e}")
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._used.append(key)
+        return _load_issues(row[0])
+
+    def put(self, key: str, issues: List[Issue]) -> None:
+        """Store the serialized issues for key (without file paths)"""
+        if self._conn is None:
+            return
+
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, used_at, issues) VALUES (?, ?, ?)",
+                (key, int(time.time()), _dump_issues(issues))
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache save error: {e}")
+
+    def _evict(self) -> None:
+        """Refresh last use of this run's hits and trim to max_entries"""
+        try:
+            now = int(time.time())
+            self._conn.executemany("UPDATE entries SET used_at = ? WHERE key = ?", ((now, key) for key in self._used))
+            self._used = []
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache eviction error: {e}")
+
+    def close(self) -> None:
+        """Flush pending writes, evict old entries and close the database"""
+        if self._conn is not None:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def summary(self) -> str:
+        """Human-readable hit/miss counters"""
+        return f"Cache: {self.hits} hits, {self.misses} misses"
+
+
+class FileStateIndex:
+    """
+    Persistent path -> (size, mtime_ns, inode, content hash, issues) index
+
+    Used by incremental checks: a file whose stat data is unchanged since
+    the last run is not even read. When stat data is ambiguous (the file
+    was modified within RACY_WINDOW_NS of being recorded, or only the
+    timestamps changed) the content hash decides instead.
+    """
+
+    def __init__(self, cache_dir: Path = Path(".codepolice_cache"), fingerprint: str = ""):
+        self.cache_dir = Path(cache_dir)
+        self.fingerprint = fingerprint
+        self.stat_hits = 0
+        self.hash_hits = 0
+        self.misses = 0
+        self._conn = _open_database(
+            self.cache_dir / "file_state.sqlite",
+            """
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                checked_ns INTEGER NOT NULL,
+                issues TEXT NOT NULL
+            );
+            """
+        )
+        self._reset_if_stale()
+
+    def _reset_if_stale(self) -> None:
+        """Drop all entries recorded under a different rule fingerprint"""
+        if self._conn is None:
+            return
+
+        key = f"{CACHE_FORMAT_VERSION}:{self.fingerprint}"
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+        if row is None or row[0] != key:
+            self._conn.execute("DELETE FROM files")
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('fingerprint', ?)", (key,))
+
+    def _row(self, path: str) -> Optional[Tuple]:
+        if self._conn is None:
+            return None
+        return self._conn.execute(
+            "SELECT size, mtime_ns, inode, digest, checked_ns, issues FROM files WHERE path = ?",
+            (os.path.abspath(path),)
+        ).fetchone()
+
+    def lookup_stat(self, path: str, stat: os.stat_result) -> Optional[List[Issue]]:
+        """
+        Return the recorded issues if stat data proves the file unchanged
+        Returns None when the file is new, changed or ambiguous
+        """
+        row = self._row(path)
+        if row is None:
+            return None
+
+        size, mtime_ns, inode, _, checked_ns, issues = row
+        if (size, mtime_ns, inode) != (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            return None
+        if checked_ns - mtime_ns < RACY_WINDOW_NS:
+            return None
+
+        self.stat_hits += 1
+        return _load_issues(issues)
+
+    def lookup_digest(self, path: str, digest: str) -> Optional[List[Issue]]:
+        """Return the recorded issues if the content hash is unchanged"""
+        row = self._row(path)
+        if row is None or row[3] != digest:
+            self.misses += 1
+            return None
+
+        self.hash_hits += 1
+        return _load_issues(row[5])
+
+    def put(self, path: str, stat: os.stat_result, digest: str, issues: List[Issue]) -> None:
+        """Record the current state and issues of a file"""
+        if self._conn is None:
+            return
+
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino,
+                 digest, time.time_ns(), _dump_issues(issues))
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Index save error: {e}")
+
+    def prune(self, root: str, seen: Iterable[str]) -> None:
+        """Forget files under root that were not seen in this run"""
+        if self._conn is None:
+            return
+
+        seen_paths = {os.path.abspath(path) for path in seen}
+        prefix = os.path.join(os.path.abspath(root), "")
+        stale = [
+            (path,) for (path,) in self._conn.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            )
+            if path not in seen_paths
+        ]
+        self._conn.executemany("DELETE FROM files WHERE path = ?", stale)
+
+    def close(self) -> None:
+        """Flush pending writes and close the database"""
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def summary(self) -> str:
+        """Human-readable counters"""
+        return (f"Incremental: {self.stat_hits} unchanged (stat), "
+                f"{self.hash_hits} unchanged (hash), {self.misses} analyzed")
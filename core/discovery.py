@@ -0,0 +1,339 @@
+"""
+File Discovery Module for CodePolice
+Finds the Python files to analyze while honoring .gitignore and .codepoliceignore
+"""
+
+import os
+import re
+import logging
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger("CodePoliceDiscovery")
+
+IGNORE_FILES = ('.gitignore', '.codepoliceignore')
+
+# Ignore files for paths git lists: git already leaves out untracked files its
+# own ignore files match, and files it tracks are checked wherever they live
+GIT_IGNORE_FILES = ('.codepoliceignore',)
+
+# Never worth descending into when walking the filesystem, whatever the ignore
+# files say. Files git lists or has staged are checked wherever they live.
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    '.git', '.hg', '.svn', '__pycache__', '.venv', 'venv', 'node_modules',
+    '.tox', '.nox', '.mypy_cache', '.pytest_cache', '.ruff_cache',
+    '.codepolice_cache', 'site-packages', 'build', 'dist',
+})
+
+
+def _translate(pattern: str) -> str:
+    """Translate one gitignore glob into a regular expression body"""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append(f"[{body}]")
+                i = end
+        elif char == '\\' and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return ''.join(parts)
+
+
+class IgnoreFile:
+    """
+    Compiled patterns of one ignore file
+
+    Follows gitignore semantics: later patterns override earlier ones, '!'
+    re-includes, a trailing '/' matches directories only, and patterns
+    containing a '/' are anchored to the directory holding the file.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.patterns: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip(' ') if not line.endswith('\\ ') else line
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+            anchored = '/' in line
+            body = _translate(line.lstrip('/'))
+            prefix = '' if anchored else '(?:.*/)?'
+            self.patterns.append((re.compile(f"^{prefix}{body}$"), negated, dir_only))
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IgnoreFile"]:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                ignore = cls(f)
+        except OSError:
+            return None
+        return ignore if ignore.patterns else None
+
+    def match(self, relative: str, is_dir: bool) -> Optional[bool]:
+        """
+        Check a path relative to this file's directory
+        Returns:
+            True if ignored, False if explicitly re-included, None if no pattern applies
+        """
+        verdict = None
+        for regex, negated, dir_only in self.patterns:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                verdict = not negated
+        return verdict
+
+
+class IgnoreRules:
+    """
+    Stack of ignore files from a base directory downwards
+
+    Ignore files are loaded lazily, once per directory, and each one applies
+    to paths below its own directory, deeper files taking precedence.
+    """
+
+    def __init__(self, base: Path, names: Iterable[str] = IGNORE_FILES):
+        self.base = Path(base).resolve()
+        self.names = tuple(names)
+        self._files: Dict[Path, List[IgnoreFile]] = {}
+        self._dirs: Dict[Path, bool] = {}
+
+    @classmethod
+    def for_git(cls, root: Path) -> "IgnoreRules":
+        """Rules for paths listed by git (ls-files, diff, the index) in the repository at root"""
+        return cls(root, GIT_IGNORE_FILES)
+
+    def _ignore_files(self, directory: Path) -> List[IgnoreFile]:
+        files = self._files.get(directory)
+        if files is None:
+            files = [f for f in (IgnoreFile.load(directory / name) for name in self.names) if f]
+            self._files[directory] = files
+        return files
+
+    def _match(self, path: Path, is_dir: bool) -> bool:
+        """Apply the ignore files of every directory between base and path"""
+        verdict = False
+        directory = self.base
+        relative_parts = path.relative_to(self.base).parts
+        for depth in range(len(relative_parts)):
+            relative = '/'.join(relative_parts[depth:])
+            for ignore in self._ignore_files(directory):
+                result = ignore.match(relative, is_dir)
+                if result is not None:
+                    verdict = result
+            directory = directory / relative_parts[depth]
+        return verdict
+
+    def is_ignored(self, path: Path, is_dir: bool = False) -> bool:
+        """
+        Check whether path is excluded, including through an excluded parent
+        Args:
+            path: Absolute path below base
+            is_dir: Whether path is a directory
+        """
+        try:
+            parents = path.relative_to(self.base).parts[:-1]
+        except ValueError:
+            return False
+
+        directory = self.base
+        for part in parents:
+            directory = directory / part
+            if self.is_dir_ignored(directory):
+                return True
+        if is_dir:
+            return self.is_dir_ignored(path)
+        return self.is_file_ignored(path)
+
+    def is_file_ignored(self, path: Path) -> bool:
+        """Check a file alone (callers walking top-down already checked its parents)"""
+        return self._match(path, False)
+
+    def is_dir_ignored(self, directory: Path) -> bool:
+        """Check a directory alone (callers walking top-down already checked its parents)"""
+        verdict = self._dirs.get(directory)
+        if verdict is None:
+            verdict = self._match(directory, True)
+            self._dirs[directory] = verdict
+        return verdict
+
+
+def find_repository_root(path: Path) -> Optional[Path]:
+    """Nearest enclosing directory holding a .git entry"""
+    path = Path(path).resolve()
+    for candidate in (path, *path.parents):
+        if (candidate / '.git').exists():
+            return candidate
+    return None
+
+
+class FileDiscovery:
+    """
+    Streams the files to analyze under a set of paths
+
+    Directories are walked with os.scandir, and excluded directories are
+    pruned before descending. Virtualenvs (anything holding pyvenv.cfg) are
+    skipped, symlinked directories are not followed, and files reached twice
+    (through file symlinks or overlapping paths) are yielded once.
+    Inside a git repository, `git ls-files` can list candidates instead of
+    walking; git then applies .gitignore, and tracked files are only
+    excluded by .codepoliceignore. Explicitly named files are always yielded.
+    """
+
+    def __init__(
+            self,
+            paths: Iterable[str],
+            suffixes: Tuple[str, ...] = ('.py',),
+            use_git: bool = True
+    ):
+        self.paths = [Path(path) for path in paths]
+        self.suffixes = suffixes
+        self.use_git = use_git
+        self._seen: Set[Tuple[int, int]] = set()
+
+    def __iter__(self) -> Iterator[Path]:
+        for path in self.paths:
+            if path.is_dir():
+                yield from self._discover(path)
+            elif self._first_visit(path):
+                yield path
+
+    def _first_visit(self, path: Path) -> bool:
+        """Remember path's inode; False if it was already yielded"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Let the analysis stage report unreadable paths
+            return True
+        key = (stat.st_dev, stat.st_ino)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def _discover(self, root: Path) -> Iterator[Path]:
+        repository = find_repository_root(root)
+        if self.use_git and repository is not None:
+            listed = self._git_files(root, IgnoreRules.for_git(repository))
+            if listed is not None:
+                yield from listed
+                return
+        yield from self._walk(root, IgnoreRules(repository or self._ignore_base(root)))
+
+    @staticmethod
+    def _ignore_base(root: Path) -> Path:
+        """Outside a repository, ignore files apply from the working directory down"""
+        cwd = Path.cwd()
+        resolved = root.resolve()
+        return cwd if resolved == cwd or cwd in resolved.parents else resolved
+
+    def _walk(self, root: Path, rules: IgnoreRules) -> Iterator[Path]:
+        """Depth-first os.scandir walk in sorted order"""
+        # The root itself was named explicitly, so it is walked even if excluded
+        stack = [(root, root.resolve())]
+        while stack:
+            directory, resolved = stack.pop()
+            if not self._first_visit(directory):
+                continue
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"Cannot read directory {directory}: {e}")
+                continue
+
+            if any(entry.name == 'pyvenv.cfg' for entry in entries):
+                continue
+
+            subdirectories = []
+            for entry in entries:
+                try:
+                    # Symlinked directories are not followed, like git and rglob
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    child = resolved / entry.name
+                    if entry.name not in DEFAULT_EXCLUDED_DIRS and not rules.is_dir_ignored(child):
+                        subdirectories.append((Path(entry.path), child))
+                elif entry.name.endswith(self.suffixes):
+                    if not rules.is_file_ignored(resolved / entry.name) and self._first_visit(Path(entry.path)):
+                        yield Path(entry.path)
+
+            # Reverse so the stack pops subdirectories in sorted order
+            stack.extend(reversed(subdirectories))
+
+    def _git_files(self, root: Path, rules: IgnoreRules) -> Optional[Iterator[Path]]:
+        """Stream tracked and unignored untracked files from git, or None if git is unavailable"""
+        try:
+            process = subprocess.Popen(
+                ['git', 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+                cwd=root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            return None
+
+        # Fall back to walking if git rejects the directory
+        first = process.stdout.peek(1) if hasattr(process.stdout, 'peek') else b''
+        if not first and process.wait() != 0:
+            return None
+        return self._read_git_output(root, rules, process)
+
+    def _read_git_output(self, root: Path, rules: IgnoreRules, process: subprocess.Popen) -> Iterator[Path]:
+        resolved_root = root.resolve()
+        buffer = b''
+        try:
+            while True:
+                chunk = process.stdout.read1(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                *names, buffer = buffer.split(b'\0')
+                for name in names:
+                    relative = os.fsdecode(name)
+                    if not relative.endswith(self.suffixes):
+                        continue
+                    path = root / relative
+                    # Skip files deleted from the work tree but still in the index
+                    if not path.is_file():
+                        continue
+                    if rules.is_ignored(resolved_root / relative) or not self._first_visit(path):
+                        continue
+                    yield path
+        finally:
+            process.stdout.close()
+            process.wait()
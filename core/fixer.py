@@ -3,20 +3,179 @@ Auto-Fixer Module for CodePolice
 Provides code fix suggestions based on detected issues
 """
 
-from typing import Dict, List, Optional
+import re
+import difflib
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Set, Tuple, Type
+
+import libcst as cst
 from libcst import Module, CSTNode
+from libcst.metadata import Assignment, CodeRange, FunctionScope, MetadataWrapper, PositionProvider, ScopeProvider
+from libcst.helpers import get_full_name_for_node
+
+from core.intervals import SpanIndex
+from core.issue import Issue
+
+# Fix payloads the rules put in their messages
+_UNUSED_IMPORT = re.compile(r"^Unused import: (\S+)$")
+_BAD_NAME = re.compile(r"name '([^']+)' should be")
+
+# Builtins that can observe a function's local names, which renaming would break
+_INTROSPECTION = ('locals', 'vars', 'eval', 'exec')
+
+# When proposed edits overlap or nest, the higher priority wins and the
+# others are deferred to the next pass over the fixed module
+FIX_PRIORITY = {
+    'unused_import': 2,
+    'naming_convention': 1,
+}
+
+
+def unified_diff(original: str, fixed: str, path: str) -> Iterator[str]:
+    """
+    Stream a unified diff between two versions of a file
+    Args:
+        original: Source before fixing
+        fixed: Source after fixing
+        path: Path shown in the a/ and b/ headers, relative to the patch root
+    Returns:
+        Diff lines, each ending in a newline; nothing if the versions are identical
+    """
+    if original == fixed:
+        return
+    path = path.replace('\\', '/')
+    for line in difflib.unified_diff(
+            original.splitlines(keepends=True),
+            fixed.splitlines(keepends=True),
+            fromfile=f"a/{path}",
+            tofile=f"b/{path}"
+    ):
+        if line.endswith('\n'):
+            yield line
+        else:
+            # Keep the patch applicable when a file lacks a final newline
+            yield line + "\n\\ No newline at end of file\n"
+
+
+def _binding(alias: cst.ImportAlias, statement: CSTNode) -> str:
+    """Name an import alias binds, as UnusedImportRule reports it"""
+    if alias.asname:
+        return alias.asname.name.value
+    if isinstance(statement, cst.Import):
+        return get_full_name_for_node(alias.name).split('.')[0]
+    return alias.name.value
+
+
+class FixPlan:
+    """
+    Every edit planned for one module, applied later in a single pass
+
+    Import removals are keyed by the (line, column) where the import
+    statement starts. Renames are requested per issue and, once scopes are
+    resolved, become the exact Name nodes of one function-local binding.
+    """
+
+    def __init__(self):
+        self.removed_aliases: Dict[Tuple[int, int], Dict[str, Issue]] = {}
+        self.rename_requests: List[Tuple[Issue, str]] = []
+        # Binding (scope id, old name) -> (new name, issues, Name nodes to rewrite)
+        self.renames: Dict[Tuple[int, str], Tuple[str, List[Issue], List[cst.Name]]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.removed_aliases or self.rename_requests or self.renames)
+
+
+class _FixTransformer(cst.CSTTransformer):
+    """Applies a FixPlan in one traversal, recording the issues it fixed"""
+
+    def __init__(self, plan: FixPlan, positions: Mapping[CSTNode, CodeRange]):
+        super().__init__()
+        self.plan = plan
+        self.positions = positions
+        # Renames rewrite exactly the Name nodes resolved for each binding
+        self.renames: Dict[int, Tuple[str, List[Issue]]] = {
+            id(name): (new, issues) for new, issues, names in plan.renames.values() for name in names
+        }
+        self.applied: Dict[int, Issue] = {}
+        # Classes of replaced or removed nodes; replacing a node replaces its ancestors too
+        self.changed_types: Set[Type[CSTNode]] = set()
+
+    def on_leave(self, original_node: CSTNode, updated_node: CSTNode):
+        result = super().on_leave(original_node, updated_node)
+        if result is not original_node:
+            self.changed_types.add(type(original_node))
+        return result
+
+    def leave_Name(self, original_node: cst.Name, updated_node: cst.Name) -> cst.Name:
+        rename = self.renames.get(id(original_node))
+        if rename is None:
+            return updated_node
+        new, issues = rename
+        for issue in issues:
+            self.applied[id(issue)] = issue
+        return updated_node.with_changes(value=new)
+
+    def leave_Import(self, original_node: cst.Import, updated_node: cst.Import):
+        return self._remove_aliases(original_node, updated_node)
+
+    def leave_ImportFrom(self, original_node: cst.ImportFrom, updated_node: cst.ImportFrom):
+        module = get_full_name_for_node(original_node.module) if original_node.module else None
+        if module == '__future__':
+            return updated_node
+        return self._remove_aliases(original_node, updated_node)
+
+    def _remove_aliases(self, original_node: CSTNode, updated_node: CSTNode):
+        if isinstance(updated_node.names, cst.ImportStar):
+            return updated_node
+        start = self.positions[original_node].start
+        unused = self.plan.removed_aliases.get((start.line, start.column))
+        if not unused:
+            return updated_node
+
+        kept = []
+        for alias in updated_node.names:
+            issue = unused.get(_binding(alias, original_node))
+            if issue is None:
+                kept.append(alias)
+            else:
+                self.applied[id(issue)] = issue
+        if not kept:
+            return cst.RemovalSentinel.REMOVE
+        if len(kept) == len(updated_node.names):
+            return updated_node
+        kept[-1] = kept[-1].with_changes(comma=cst.MaybeSentinel.DEFAULT)
+        return updated_node.with_changes(names=kept)
 
 
 class CodeFixer:
     """
     Handles automatic code fixing operations
+
+    Issues are first collected into a FixPlan by the _plan_<fix_type>
+    methods, then the plan is applied by one transformer pass, so the
+    module is rebuilt once however many fixes a file gets. Fix types
+    without a planner (e.g. refactor) are left for the user.
     """
 
-    def __init__(self, module: Module):
+    def __init__(
+            self,
+            module: Module,
+            positions: Optional[Mapping[CSTNode, CodeRange]] = None,
+            scopes: Optional[Mapping[CSTNode, Any]] = None
+    ):
+        """
+        Args:
+            module: Module to fix
+            positions: PositionProvider metadata for module, if already resolved
+            scopes: ScopeProvider metadata for module, if already resolved
+        """
         self.module = module
+        self.positions = positions
+        self.scopes = scopes
         self.changes = []  # Store applied fixes
+        self.deferred: List[Issue] = []  # Fixes held back by a conflicting edit
+        self.changed_types: Set[Type[CSTNode]] = set()  # Node classes the fixes touched
 
-    def apply_fixes(self, issues: List[Dict]) -> Module:
+    def apply_fixes(self, issues: List[Issue]) -> Module:
         """
         Apply all applicable fixes to the AST
         Args:
@@ -24,58 +183,160 @@ class CodeFixer:
         Returns:
             Modified AST module
         """
+        plan = FixPlan()
         for issue in issues:
-            if 'fix_type' not in issue:
+            if not issue.fix_type:
                 continue
 
-            fix_method = getattr(self, f"_fix_{issue['fix_type']}", None)
-            if fix_method and callable(fix_method):
-                try:
-                    self.module = fix_method(issue)
-                    self.changes.append(issue)
-                except Exception as e:
-                    print(f"Failed to fix {issue['rule']}: {e}")
+            planner = getattr(self, f"_plan_{issue.fix_type}", None)
+            if planner and callable(planner):
+                planner(issue, plan)
 
-        return self.module
+        if not plan:
+            return self.module
 
-    def _fix_remove_node(self, issue: Dict) -> Module:
-        """
-        Remove the problematic AST node
-        Args:
-            issue: Issue dictionary with node reference
-        Returns:
-            Modified AST
-        """
-        # Implementation would remove the specified node
+        if self.positions is None:
+            self.positions = MetadataWrapper(self.module, unsafe_skip_copy=True).resolve(PositionProvider)
+        if plan.rename_requests:
+            self._resolve_renames(plan)
+        self._defer_overlapping_edits(plan)
+
+        transformer = _FixTransformer(plan, self.positions)
+        try:
+            fixed = self.module.visit(transformer)
+        except Exception as e:
+            print(f"Failed to apply fixes: {e}")
+            return self.module
+
+        self.changes.extend(transformer.applied.values())
+        self.changed_types |= transformer.changed_types
+        self.module = fixed
         return self.module
 
-    def _fix_replace_node(self, issue: Dict) -> Module:
+    def _plan_remove(self, issue: Issue, plan: FixPlan) -> None:
+        """Plan removal of an unused import alias (other removals need a human)"""
+        match = _UNUSED_IMPORT.match(issue.message)
+        if issue.rule != 'unused_import' or not match:
+            return
+        plan.removed_aliases.setdefault((issue.line, issue.column), {})[match.group(1)] = issue
+
+    def _plan_rename(self, issue: Issue, plan: FixPlan) -> None:
+        """Request renaming the binding an issue reports to the suggested name"""
+        match = _BAD_NAME.search(issue.message)
+        new = issue.suggestion
+        if not match or not new or not new.isidentifier() or match.group(1).isupper():
+            return
+        plan.rename_requests.append((issue, new))
+
+    def _resolve_renames(self, plan: FixPlan) -> None:
         """
-        Replace node with suggested code
-        Args:
-            issue: Issue dictionary with replacement info
-        Returns:
-            Modified AST
+        Turn rename requests into the Name nodes of function-local bindings
+
+        Only names bound inside a function by assignment or a nested def are
+        renamed, together with every reference ScopeProvider resolves to
+        them (closures included). Module-level and class-level names and
+        parameters are visible to other code and are never renamed, nor are
+        names declared global or nonlocal, locals of functions that call
+        locals()/vars()/eval()/exec(), or renames onto a name already used
+        anywhere in the module or claimed by another rename.
         """
-        # Implementation would replace node with new value
-        return self.module
+        if self.scopes is None:
+            self.scopes = MetadataWrapper(self.module, unsafe_skip_copy=True).resolve(ScopeProvider)
+
+        definitions: Dict[Tuple[int, int], cst.Name] = {}
+        names: Set[str] = set()
+        for node, code_range in self.positions.items():
+            if isinstance(node, cst.Name):
+                names.add(node.value)
+            elif isinstance(node, cst.FunctionDef):
+                definitions[(code_range.start.line, code_range.start.column)] = node.name
+            elif isinstance(node, cst.Assign) and len(node.targets) == 1 and isinstance(node.targets[0].target, cst.Name):
+                definitions[(code_range.start.line, code_range.start.column)] = node.targets[0].target
+
+        claimed = set()
+        for issue, new in plan.rename_requests:
+            name = definitions.get((issue.line, issue.column))
+            scope = self.scopes.get(name) if name is not None else None
+            if not isinstance(scope, FunctionScope):
+                continue
+            binding = (id(scope), name.value)
+            if binding in plan.renames:
+                target, issues, _ = plan.renames[binding]
+                if target == new:
+                    issues.append(issue)
+                continue
+            if new in names or new in claimed or any(scope.accesses[builtin] for builtin in _INTROSPECTION):
+                continue
+            nodes = self._binding_names(scope, name.value)
+            if nodes:
+                plan.renames[binding] = (new, [issue], nodes)
+                claimed.add(new)
+        plan.rename_requests = []
+
+    @staticmethod
+    def _binding_names(scope: FunctionScope, name: str) -> List[cst.Name]:
+        """Name nodes binding or referencing a local, or [] if any use cannot be renamed safely"""
+        assignments = scope.assignments[name]
+        nodes: Dict[int, cst.Name] = {}
+        for assignment in assignments:
+            if not isinstance(assignment, Assignment):
+                return []
+            if isinstance(assignment.node, cst.Name):
+                nodes[id(assignment.node)] = assignment.node
+            elif isinstance(assignment.node, cst.FunctionDef):
+                nodes[id(assignment.node.name)] = assignment.node.name
+            else:
+                # Parameters, imports, classes, ...
+                return []
+            for access in assignment.references:
+                if not isinstance(access.node, cst.Name):
+                    # e.g. a reference inside a string annotation
+                    return []
+                nodes[id(access.node)] = access.node
+        return list(nodes.values())
 
-    def _fix_insert_code(self, issue: Dict) -> Module:
+    def _defer_overlapping_edits(self, plan: FixPlan) -> None:
         """
-        Insert new code at specified location
-        Args:
-            issue: Issue dictionary with insertion details
-        Returns:
-            Modified AST
+        Keep only edits whose spans of rewritten code are disjoint
+
+        An import edit claims the span of its statement; a rename claims
+        the span of every Name token it rewrites, not the whole definition
+        it was reported on. Edits are accepted in priority order, then
+        source order; one that overlaps or nests with an accepted edit is
+        removed from the plan and its issues are deferred.
         """
-        # Implementation would insert code at target position
-        return self.module
+        edits = []
+        for key, aliases in plan.removed_aliases.items():
+            issues = list(aliases.values())
+            spans = {((i.line, i.column), (i.end_line, i.end_column)) for i in issues}
+            edits.append(('import', key, issues, spans))
+        for binding, (_, issues, names) in plan.renames.items():
+            spans = set()
+            for name in names:
+                code_range = self.positions[name]
+                spans.add(((code_range.start.line, code_range.start.column), (code_range.end.line, code_range.end.column)))
+            edits.append(('rename', binding, issues, spans))
+        edits.sort(key=lambda edit: (-FIX_PRIORITY.get(edit[2][0].rule, 0), min(edit[3])))
 
-    def generate_diff(self) -> str:
+        accepted = SpanIndex()
+        for kind, key, edit_issues, spans in edits:
+            if any(accepted.overlaps(start, end) for start, end in spans):
+                if kind == 'import':
+                    del plan.removed_aliases[key]
+                else:
+                    del plan.renames[key]
+                self.deferred.extend(edit_issues)
+                continue
+            for start, end in spans:
+                accepted.add(start, end)
+
+    def generate_diff(self, original_code: str, path: str) -> str:
         """
         Generate a diff of all applied changes
+        Args:
+            original_code: Source the fixes started from, possibly several passes ago
+            path: Path shown in the diff headers
         Returns:
-            Unified diff string
+            Unified diff string, empty if the fixed module matches original_code
         """
-        # Implementation would show code changes
-        return "No changes applied"
\ No newline at end of file
+        return "".join(unified_diff(original_code, self.module.code, path))
@@ -0,0 +1,81 @@
+"""
+Interval Module for CodePolice
+Sorted interval sets with logarithmic overlap queries
+"""
+
+from bisect import bisect_right
+from typing import Any, Iterable, Iterator, List, Tuple
+
+
+class IntervalSet:
+    """
+    Immutable set of closed integer intervals
+
+    Overlapping and adjacent intervals are merged on construction, so a
+    query is one binary search over the interval starts. Used for the
+    changed line ranges of a diff.
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        for start, end in sorted(intervals):
+            if end < start:
+                continue
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Check whether [start, end] intersects any interval"""
+        index = bisect_right(self.starts, end) - 1
+        return index >= 0 and self.ends[index] >= start
+
+    def __contains__(self, point: int) -> bool:
+        return self.overlaps(point, point)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(zip(self.starts, self.ends))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self)!r})"
+
+
+class SpanIndex:
+    """
+    Growing set of disjoint half-open spans [start, end)
+
+    Spans are kept sorted by start, so checking a new span against all
+    accepted ones is a binary search and accepting n spans is O(n log n)
+    comparisons. Used to keep edits from overlapping or nesting; positions
+    are anything ordered, e.g. byte offsets or (line, column) pairs.
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self):
+        self.starts: List[Any] = []
+        self.ends: List[Any] = []
+
+    def overlaps(self, start: Any, end: Any) -> bool:
+        """Check whether [start, end) intersects, contains or lies inside an accepted span"""
+        index = bisect_right(self.starts, start)
+        if index and self.ends[index - 1] > start:
+            return True
+        return index < len(self.starts) and self.starts[index] < end
+
+    def add(self, start: Any, end: Any) -> None:
+        """Accept a span; callers check overlaps() first"""
+        index = bisect_right(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
@@ -0,0 +1,85 @@
+"""
+Issue Record Module for CodePolice
+Compact, position-based representation of a detected issue
+"""
+
+from typing import Any, Dict, Optional, Union
+
+
+class Issue:
+    """
+    A single rule violation located by position rather than by CST node
+
+    Issues hold no reference to the syntax tree, so they are cheap to keep
+    around, picklable across processes and serializable to the result cache.
+    Code snippets are recovered on demand from the file's source buffer.
+    """
+
+    __slots__ = (
+        'rule', 'severity', 'message', 'suggestion', 'fix_type', 'file',
+        'line', 'column', 'end_line', 'end_column', 'start_offset', 'end_offset',
+        'ai_suggestion'
+    )
+
+    def __init__(
+            self,
+            rule: str,
+            severity: str,
+            message: str,
+            suggestion: str = "",
+            fix_type: Optional[str] = None,
+            file: Optional[str] = None,
+            line: int = 0,
+            column: int = 0,
+            end_line: int = 0,
+            end_column: int = 0,
+            start_offset: int = 0,
+            end_offset: int = 0,
+            ai_suggestion: Optional[str] = None
+    ):
+        self.rule = rule
+        self.severity = severity
+        self.message = message
+        self.suggestion = suggestion
+        self.fix_type = fix_type
+        self.file = file
+        self.line = line
+        self.column = column
+        self.end_line = end_line
+        self.end_column = end_column
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.ai_suggestion = ai_suggestion
+
+    def snippet(self, source: Union[bytes, str]) -> str:
+        """
+        Recover the code this issue points at
+        Args:
+            source: Raw bytes (or text) of the file the issue was found in
+        Returns:
+            The source text between the issue's byte offsets
+        """
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        return source[self.start_offset:self.end_offset].decode('utf-8', errors='replace')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize to a JSON-compatible dictionary"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        for optional in ('fix_type', 'file', 'ai_suggestion'):
+            if data[optional] is None:
+                del data[optional]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Issue":
+        """Rebuild an issue from to_dict() output"""
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Issue):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Issue({self.rule!r}, {self.file}:{self.line}:{self.column})"
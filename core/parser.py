@@ -4,8 +4,9 @@ Uses LibCST to parse Python code into AST and traverse nodes
 """
 
 import libcst as cst
+from libcst.metadata import MetadataWrapper, ProviderT
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
 
 class CodeParser:
@@ -13,10 +14,18 @@ class CodeParser:
     Handles parsing of Python code files into AST structures
     """
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, source: Optional[str] = None, module: Optional[cst.Module] = None):
         self.file_path = Path(file_path)
-        self.source_code = self._read_file()
-        self.module = self._parse_module()
+        if module is not None:
+            # Reuse an already-parsed (e.g. freshly fixed) module
+            self.source_code = source if source is not None else module.code
+            self.module = module
+        else:
+            self.source_code = source if source is not None else self._read_file()
+            self.module = self._parse_module()
+        self._wrapper: Optional[MetadataWrapper] = None
+        self._metadata: Dict[ProviderT, Mapping[cst.CSTNode, Any]] = {}
+        self.profiler = None  # Optional StageProfiler charged for metadata
 
     def _read_file(self) -> str:
         """Read source code from file"""
@@ -37,6 +46,34 @@ class CodeParser:
         """Return the parsed AST module"""
         return self.module
 
+    def get_metadata_wrapper(self) -> MetadataWrapper:
+        """
+        Return the metadata wrapper for the parsed module
+        The module is not copied, so node identities match get_ast()
+        """
+        if self._wrapper is None:
+            self._wrapper = MetadataWrapper(self.module, unsafe_skip_copy=True)
+        return self._wrapper
+
+    def resolve_metadata(self, provider: ProviderT) -> Mapping[cst.CSTNode, Any]:
+        """
+        Resolve a metadata provider for this file
+        Each provider is computed at most once, on first request
+        Args:
+            provider: LibCST metadata provider class (e.g. PositionProvider)
+        Returns:
+            Mapping from node to metadata value
+        """
+        resolved = self._metadata.get(provider)
+        if resolved is None:
+            if self.profiler is not None:
+                with self.profiler.stage('metadata'):
+                    resolved = self.get_metadata_wrapper().resolve(provider)
+            else:
+                resolved = self.get_metadata_wrapper().resolve(provider)
+            self._metadata[provider] = resolved
+        return resolved
+
     def traverse_nodes(self, visitor: cst.CSTVisitor) -> None:
         """
         Traverse AST nodes using provided visitor
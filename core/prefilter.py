@@ -0,0 +1,51 @@
+"""
+Lexical Prefilter Module for CodePolice
+Decides which rules can possibly fire on a file before it is parsed
+"""
+
+import re
+from typing import FrozenSet, Iterable, Set
+
+
+class LiteralPrefilter:
+    """
+    Multi-literal byte scanner
+
+    All literals are compiled into one case-insensitive alternation wrapped
+    in a lookahead, so a single pass over the buffer reports every literal
+    occurring at any position, including overlapping ones. At each position
+    the longest matching literal wins; shorter literals matching at the same
+    position are its prefixes and are recovered afterwards.
+    """
+
+    def __init__(self, literals: Iterable[bytes]):
+        self.literals: FrozenSet[bytes] = frozenset(literal.lower() for literal in literals if literal)
+        self._pattern = None
+        if self.literals:
+            alternation = b"|".join(
+                re.escape(literal) for literal in sorted(self.literals, key=len, reverse=True)
+            )
+            self._pattern = re.compile(b"(?=(" + alternation + b"))", re.IGNORECASE)
+
+    def scan(self, content: bytes) -> Set[bytes]:
+        """
+        Find which literals occur in content
+        Args:
+            content: Raw file bytes
+        Returns:
+            The (lowercased) literals present
+        """
+        found: Set[bytes] = set()
+        if self._pattern is None:
+            return found
+
+        for match in self._pattern.finditer(content):
+            found.add(match.group(1).lower())
+            if len(found) == len(self.literals):
+                return found
+
+        # Literals shadowed by a longer literal starting at the same offset
+        for literal in self.literals - found:
+            if any(longer.startswith(literal) for longer in found):
+                found.add(literal)
+        return found
@@ -0,0 +1,137 @@
+"""
+Profiling Module for CodePolice
+Collects per-stage, per-rule and per-file timings for a run
+"""
+
+import math
+import time
+import json
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an unsorted list (0.0 if empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class StageProfiler:
+    """
+    Accumulates wall-clock time spent in each stage of a run
+
+    Profilers are plain picklable containers: worker processes fill their
+    own and the parent merges them, so --profile works with --jobs.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.rules: Dict[str, float] = defaultdict(float)
+        self.files: List[Tuple[str, float, int]] = []
+        self.total_files = 0
+        self.total_bytes = 0
+        self._started = time.perf_counter()
+        self._finished = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under a stage name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def timed_iter(self, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+        """Charge the time spent producing each item of a lazy iterable to a stage"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.stages[name] += time.perf_counter() - start
+                return
+            self.stages[name] += time.perf_counter() - start
+            yield item
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stages[name] += seconds
+
+    def add_rule(self, rule_id: str, seconds: float) -> None:
+        self.rules[rule_id] += seconds
+
+    def add_file(self, path: str, seconds: float, size: int) -> None:
+        """Record the analysis cost of one file"""
+        self.files.append((path, seconds, size))
+
+    def count_file(self, size: int) -> None:
+        """Count a file towards throughput, whether analyzed or served from cache"""
+        self.total_files += 1
+        self.total_bytes += size
+
+    def merge(self, other: "StageProfiler") -> None:
+        """Fold a worker's profile into this one"""
+        for name, seconds in other.stages.items():
+            self.stages[name] += seconds
+        for rule_id, seconds in other.rules.items():
+            self.rules[rule_id] += seconds
+        self.files.extend(other.files)
+
+    def finish(self) -> None:
+        """Stop the wall clock"""
+        self._finished = time.perf_counter()
+
+    def to_dict(self, top: int = 10) -> Dict[str, Any]:
+        """Machine-readable profile"""
+        wall = (self._finished or time.perf_counter()) - self._started
+        latencies = [seconds for _, seconds, _ in self.files]
+        return {
+            'wall_seconds': wall,
+            'files': self.total_files,
+            'bytes': self.total_bytes,
+            'files_per_second': self.total_files / wall if wall else 0.0,
+            'bytes_per_second': self.total_bytes / wall if wall else 0.0,
+            'analyzed_files': len(self.files),
+            'file_latency': {
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+            },
+            'stages': dict(sorted(self.stages.items(), key=lambda item: -item[1])),
+            'slowest_rules': [
+                {'rule': rule_id, 'seconds': seconds}
+                for rule_id, seconds in sorted(self.rules.items(), key=lambda item: -item[1])[:top]
+            ],
+            'slowest_files': [
+                {'file': path, 'seconds': seconds, 'bytes': size}
+                for path, seconds, size in sorted(self.files, key=lambda item: -item[1])[:top]
+            ],
+        }
+
+    def format_summary(self, top: int = 10) -> str:
+        """Human-readable profile"""
+        data = self.to_dict(top)
+        latency = data['file_latency']
+        lines = [
+            "Profile:",
+            f"  Wall time: {data['wall_seconds']:.3f}s for {data['files']} files "
+            f"({data['files_per_second']:.1f} files/s, {data['bytes_per_second'] / 1024:.1f} KiB/s)",
+            f"  Per-file latency: p50 {latency['p50'] * 1000:.2f}ms, "
+            f"p95 {latency['p95'] * 1000:.2f}ms, p99 {latency['p99'] * 1000:.2f}ms",
+            "  Stages (summed across workers):",
+        ]
+        lines += [f"    {name:<12} {seconds:.3f}s" for name, seconds in data['stages'].items()]
+        lines.append("  Slowest rules:")
+        lines += [f"    {item['rule']:<28} {item['seconds']:.3f}s" for item in data['slowest_rules']]
+        lines.append("  Slowest files:")
+        lines += [f"    {item['seconds'] * 1000:8.2f}ms  {item['file']}" for item in data['slowest_files']]
+        return "\n".join(lines)
+
+    def write_json(self, path: str, top: int = 10) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(top), f, indent=2)
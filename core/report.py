@@ -0,0 +1,165 @@
+"""
+Report Module for CodePolice
+Writes check results incrementally, one file at a time
+"""
+
+import os
+import json
+import textwrap
+from abc import ABC, abstractmethod
+from typing import IO, List
+
+from core.issue import Issue
+
+
+class ReportWriter(ABC):
+    """
+    Base report writer
+
+    write_file() is called once per analyzed file, in scan order, as soon as
+    its issues are known; close() finishes the document. Streaming formats
+    write and flush immediately so memory stays flat and consumers see
+    results before the scan completes.
+    """
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.total = 0
+
+    def write_file(self, file_path: str, issues: List[Issue]) -> None:
+        self.total += len(issues)
+        if issues:
+            self._write(file_path, issues)
+            self.stream.flush()
+
+    @abstractmethod
+    def _write(self, file_path: str, issues: List[Issue]) -> None:
+        """Write the issues of one file (only called when it has some)"""
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class TextReportWriter(ReportWriter):
+    """Human-readable report, streamed"""
+
+    def __init__(self, stream: IO[str], color: bool = True):
+        super().__init__(stream)
+        self.color = color
+
+    def _write(self, file_path: str, issues: List[Issue]) -> None:
+        reset = "\033[0m" if self.color else ""
+        for issue in issues:
+            location = f"{issue.file}:{issue.line}:{issue.column}"
+            color = ("\033[91m" if issue.severity == 'error' else "\033[93m") if self.color else ""
+            self.stream.write(
+                f"{color}{issue.rule} ({location}){reset}\n"
+                f"  Message: {issue.message}\n"
+                f"  Suggestion: {issue.suggestion}\n"
+                + "-" * 50 + "\n"
+            )
+
+
+class NdjsonReportWriter(ReportWriter):
+    """One compact JSON object per issue per line, streamed"""
+
+    def _write(self, file_path: str, issues: List[Issue]) -> None:
+        self.stream.write("".join(
+            json.dumps(issue.to_dict(), separators=(',', ':')) + "\n" for issue in issues
+        ))
+
+
+class JsonReportWriter(ReportWriter):
+    """A single JSON array, streamed element by element"""
+
+    def __init__(self, stream: IO[str]):
+        super().__init__(stream)
+        self._separator = "[\n"
+
+    def _write(self, file_path: str, issues: List[Issue]) -> None:
+        for issue in issues:
+            self.stream.write(self._separator)
+            self._separator = ",\n"
+            self.stream.write(textwrap.indent(json.dumps(issue.to_dict(), indent=2), "  "))
+
+    def close(self) -> None:
+        self.stream.write("\n]\n" if self.total else "[]\n")
+        super().close()
+
+
+class HtmlReportWriter(ReportWriter):
+    """HTML report; the issue count heads the page, so the body is written at the end"""
+
+    TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>CodePolice Report</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; padding: 20px; }}
+        .issue {{ border: 1px solid #ddd; padding: 15px; margin-bottom: 15px; }}
+        .rule {{ font-weight: bold; color: #2c3e50; }}
+        .location {{ color: #7f8c8d; float: right; }}
+        .message {{ margin-top: 10px; }}
+        .suggestion {{ margin-top: 10px; color: #27ae60; }}
+    </style>
+</head>
+<body>
+    <h1>CodePolice Report</h1>
+    <p>Total Issues: {total}</p>
+
+    {issues}
+</body>
+</html>
+"""
+
+    ISSUE_TEMPLATE = """
+<div class="issue">
+    <div class="rule">{rule} <span class="location">{file} Line {line}:{column}</span></div>
+    <div class="message">{message}</div>
+    <div class="suggestion">Suggestion: {suggestion}</div>
+</div>
+"""
+
+    def __init__(self, stream: IO[str]):
+        super().__init__(stream)
+        self._parts: List[str] = []
+
+    def _write(self, file_path: str, issues: List[Issue]) -> None:
+        from html import escape
+
+        for issue in issues:
+            fields = {key: escape(str(value)) for key, value in issue.to_dict().items()}
+            fields.setdefault('file', '')
+            self._parts.append(self.ISSUE_TEMPLATE.format(**fields))
+
+    def close(self) -> None:
+        self.stream.write(self.TEMPLATE.format(total=self.total, issues="".join(self._parts)))
+        super().close()
+
+
+WRITERS = {
+    'text': TextReportWriter,
+    'json': JsonReportWriter,
+    'ndjson': NdjsonReportWriter,
+    'html': HtmlReportWriter,
+}
+
+
+def use_color(stream: IO[str]) -> bool:
+    """Color terminals only, unless NO_COLOR (https://no-color.org) is set"""
+    if os.environ.get('NO_COLOR'):
+        return False
+    isatty = getattr(stream, 'isatty', None)
+    return bool(isatty and isatty())
+
+
+def create_writer(format_name: str, stream: IO[str]) -> ReportWriter:
+    """Report writer for a --format value"""
+    try:
+        writer_cls = WRITERS[format_name]
+    except KeyError:
+        raise RuntimeError(f"Unknown report format: {format_name}")
+    if writer_cls is TextReportWriter:
+        return writer_cls(stream, color=use_color(stream))
+    return writer_cls(stream)
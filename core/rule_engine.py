@@ -1,66 +1,454 @@
 """
 Rule Engine Module for CodePolice
-Loads rules and applies them to AST nodes
+Loads rules and dispatches AST nodes to them in a single traversal
 """
 
+import re
+import json
+import time
+import hashlib
+import importlib
+import inspect
 import yaml
-from typing import Dict, List, Any
+import libcst as cst
+from libcst.metadata import PositionProvider, ProviderT
+from typing import Dict, FrozenSet, Iterable, List, Any, Optional, Sequence, Tuple, Type, Union
 from pathlib import Path
 from libcst import CSTNode
 
+from core.issue import Issue
+from core.parser import CodeParser
+from core.intervals import IntervalSet
+from core.prefilter import LiteralPrefilter
+
+
+# Bump when the engine changes in a way that alters reported issues
+ENGINE_VERSION = "1"
+
+# Built-in rule classes, instantiated once per engine
+BUILTIN_RULES = [
+    "rules.security.HardcodedSecretRule",
+    "rules.security.UnsafeEvalRule",
+    "rules.performance.NestedListComprehensionRule",
+    "rules.performance.RepeatedCalculationRule",
+    "rules.convention.NamingConventionRule",
+    "rules.convention.UnusedImportRule",
+]
+
+
+class RuleContext:
+    """
+    Per-file state shared by every rule during a traversal
+
+    Metadata is resolved through the file's CodeParser, so each provider is
+    computed at most once per file and only when some rule asks for it.
+    Positions in particular are only computed for files that have issues.
+    """
+
+    def __init__(
+            self,
+            parser: CodeParser,
+            file_path: Optional[str] = None,
+            providers: FrozenSet[ProviderT] = frozenset()
+    ):
+        self.parser = parser
+        self.providers = providers | {PositionProvider}
+        self.module = parser.get_ast()
+        self.file_path = file_path if file_path is not None else str(parser.file_path)
+        self._lines: Optional[List[str]] = None
+        self._line_byte_starts: Optional[List[int]] = None
+
+    def get_metadata(self, provider: ProviderT, node: CSTNode, default: Any = None) -> Any:
+        """
+        Look up metadata for a node, resolving the provider on first use
+        Args:
+            provider: LibCST metadata provider class
+            node: Node from this file's module
+            default: Value returned when the provider has nothing for node
+        """
+        if provider not in self.providers:
+            raise RuntimeError(f"{provider.__name__} is not declared in any enabled rule's METADATA_DEPENDENCIES")
+        return self.parser.resolve_metadata(provider).get(node, default)
+
+    def location(self, node: CSTNode) -> Tuple[int, int]:
+        """Return the (line, column) where node starts"""
+        start = self.get_metadata(PositionProvider, node).start
+        return start.line, start.column
+
+    def issue(self, rule: "RuleBase", node: CSTNode, message: str, **fields: Any) -> Issue:
+        """
+        Build an Issue located at node
+        Args:
+            rule: Rule reporting the issue
+            node: Offending node
+            message: Human-readable description
+            **fields: Extra Issue fields such as suggestion and fix_type
+        Returns:
+            Issue carrying line/column and byte offsets, not the node
+        """
+        code_range = self.get_metadata(PositionProvider, node)
+        start, end = code_range.start, code_range.end
+        return Issue(
+            rule=rule.rule_id,
+            severity=rule.severity,
+            message=message,
+            file=self.file_path,
+            line=start.line,
+            column=start.column,
+            end_line=end.line,
+            end_column=end.column,
+            start_offset=self._byte_offset(start.line, start.column),
+            end_offset=self._byte_offset(end.line, end.column),
+            **fields
+        )
+
+    def _byte_offset(self, line: int, column: int) -> int:
+        """Convert a 1-based line and character column into a UTF-8 byte offset"""
+        if self._lines is None:
+            source = self.parser.source_code
+            self._lines = re.split(r'(?<=\r\n)|(?<=\r)(?!\n)|(?<=\n)', source)
+            self._line_byte_starts = [0]
+            for text in self._lines:
+                self._line_byte_starts.append(self._line_byte_starts[-1] + len(text.encode('utf-8')))
+
+        index = min(line - 1, len(self._lines) - 1)
+        return self._line_byte_starts[index] + len(self._lines[index][:column].encode('utf-8'))
+
+
+class RuleBase:
+    """
+    Base class for all CodePolice rules
+
+    A rule lists the LibCST node classes it inspects in ``node_types``; the
+    engine hands it only nodes of those types, in document order.
+    """
+    rule_id: str = ""
+    severity: str = "warning"
+    version: str = "1"
+    node_types: Tuple[Type[CSTNode], ...] = ()
+
+    # Extra metadata providers used via RuleContext.get_metadata()
+    METADATA_DEPENDENCIES: Tuple[ProviderT, ...] = ()
+
+    # The rule can only fire if at least one of these byte strings occurs in
+    # the file (matched case-insensitively); empty means always run
+    required_literals: Tuple[bytes, ...] = ()
+
+    # Findings depend on the whole file (e.g. unused imports), so in diff
+    # mode the rule still sees unchanged code; only its report is filtered
+    whole_file: bool = False
+
+    def begin_module(self, context: RuleContext) -> None:
+        """Reset per-file state before a traversal starts"""
+
+    def visit(self, node: CSTNode, context: RuleContext) -> List[Issue]:
+        """
+        Inspect a single node
+        Args:
+            node: Node whose type is listed in node_types
+            context: Shared per-file context
+        Returns:
+            Issues found on this node
+        """
+        return []
+
+    def leave_module(self, context: RuleContext) -> List[Issue]:
+        """Report issues that need the whole file to be seen first"""
+        return []
+
+    def apply(self, node: cst.Module) -> List[Issue]:
+        """Run this rule alone against a module"""
+        return RuleEngine(rules=[self]).run_rules(node)
+
+
+class PatternRule(RuleBase):
+    """
+    Generic rule defined purely in configuration
+    Flags nodes whose string value contains one of the bad patterns
+    """
+
+    def __init__(self, rule_id: str, rule_config: Dict[str, Any]):
+        self.rule_id = rule_id
+        self.rule_config = rule_config
+        self.node_types = (getattr(cst, rule_config['node_type']),)
+        patterns = rule_config.get('options', {}).get('bad_pattern', [])
+        self.patterns = [patterns] if isinstance(patterns, str) else list(patterns)
+        self.required_literals = tuple(pattern.encode('utf-8') for pattern in self.patterns)
+
+    def visit(self, node: CSTNode, context: RuleContext) -> List[Issue]:
+        value = getattr(node, 'value', None)
+        if not isinstance(value, str):
+            return []
+
+        if not any(pattern in value for pattern in self.patterns):
+            return []
+
+        return [context.issue(
+            self, node, self.rule_config.get('message', self.rule_id),
+            suggestion=self.rule_config.get('fix', 'No fix available')
+        )]
+
+
+class _DispatchVisitor(cst.CSTVisitor):
+    """
+    Feeds every node to the rules registered for its type
+
+    With changed lines given, subtrees whose span misses every changed
+    interval are skipped outright or, when a whole-file rule is active,
+    walked for those rules only.
+    """
+
+    def __init__(
+            self,
+            engine: "RuleEngine",
+            context: RuleContext,
+            active: Optional[FrozenSet[RuleBase]],
+            lines: Optional[IntervalSet] = None
+    ):
+        super().__init__()
+        self.engine = engine
+        self.context = context
+        self.active = active
+        self.lines = lines
+        self.issues = []
+        if lines is not None:
+            self._positions = context.parser.resolve_metadata(PositionProvider)
+            self._whole_file = any(
+                rule.whole_file for rule in engine.rules if active is None or rule in active
+            )
+            self._outside: Optional[CSTNode] = None
+
+    def on_visit(self, node: CSTNode) -> bool:
+        rules = self.engine.rules_for(type(node), self.active)
+        if self.lines is None:
+            self._dispatch(node, rules)
+            return True
+
+        if self._outside is None:
+            code_range = self._positions.get(node)
+            if code_range is None or self.lines.overlaps(code_range.start.line, code_range.end.line):
+                self._dispatch(node, rules)
+                return True
+            if not self._whole_file:
+                return False
+            self._outside = node
+        self._dispatch(node, [rule for rule in rules if rule.whole_file])
+        return True
+
+    def on_leave(self, original_node: CSTNode) -> None:
+        if self.lines is not None and self._outside is original_node:
+            self._outside = None
+
+    def _dispatch(self, node: CSTNode, rules: List[RuleBase]) -> None:
+        for rule in rules:
+            self.issues.extend(rule.visit(node, self.context))
+
+
+class _ProfilingDispatchVisitor(_DispatchVisitor):
+    """Dispatch visitor that also charges time to each rule"""
+
+    def __init__(
+            self,
+            engine: "RuleEngine",
+            context: RuleContext,
+            active: Optional[FrozenSet[RuleBase]],
+            profiler,
+            lines: Optional[IntervalSet] = None
+    ):
+        super().__init__(engine, context, active, lines)
+        self.profiler = profiler
+
+    def _dispatch(self, node: CSTNode, rules: List[RuleBase]) -> None:
+        for rule in rules:
+            start = time.perf_counter()
+            self.issues.extend(rule.visit(node, self.context))
+            self.profiler.add_rule(rule.rule_id, time.perf_counter() - start)
+
 
 class RuleEngine:
     """
     Manages rule loading and execution against AST nodes
     """
 
-    def __init__(self, config_path: str = "codepolice.yaml"):
+    def __init__(self, config_path: str = "codepolice.yaml", rules: Optional[List[RuleBase]] = None):
         self.config_path = Path(config_path)
-        self.rules = self._load_rules()
-        self.issues = []  # Store detected issues
+        self.config = self._load_rules() if rules is None else {}
+        self.rules = self._create_rules() if rules is None else list(rules)
+        self._index = self._build_index()
+        self.metadata_dependencies = frozenset(
+            provider for rule in self.rules for provider in rule.METADATA_DEPENDENCIES
+        )
+        self._dispatch_caches: Dict[Optional[FrozenSet[RuleBase]], Dict[type, List[RuleBase]]] = {}
+        self._prefilter = LiteralPrefilter(
+            literal for rule in self.rules for literal in rule.required_literals
+        )
 
     def _load_rules(self) -> Dict[str, Any]:
         """Load rule configuration from YAML file"""
+        if not self.config_path.exists():
+            return {}
+
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f).get('rules', {})
+                return (yaml.safe_load(f) or {}).get('rules', {}) or {}
         except Exception as e:
             raise RuntimeError(f"Failed to load rules: {e}")
 
-    def apply_rules(self, node: CSTNode) -> None:
+    def _create_rules(self) -> List[RuleBase]:
+        """Instantiate built-in and configured rules"""
+        rules = []
+        for dotted_path in BUILTIN_RULES:
+            module_name, class_name = dotted_path.rsplit('.', 1)
+            rule_cls = getattr(importlib.import_module(module_name), class_name)
+            rule_config = self.config.get(rule_cls.rule_id, {}) or {}
+            if rule_config.get('enabled', True):
+                rules.append(self._instantiate(rule_cls, rule_config))
+
+        builtin_ids = {rule.rule_id for rule in rules}
+        for rule_name, rule_config in self.config.items():
+            if rule_name in builtin_ids or not rule_config or 'node_type' not in rule_config:
+                continue
+            if not rule_config.get('enabled', True):
+                continue
+            if not rule_config.get('options', {}).get('bad_pattern'):
+                continue
+            rule = PatternRule(rule_name, rule_config)
+            rule.severity = rule_config.get('level', rule.severity)
+            rules.append(rule)
+
+        return rules
+
+    def _instantiate(self, rule_cls: Type[RuleBase], rule_config: Dict[str, Any]) -> RuleBase:
+        """Create a rule, passing only the options its constructor accepts"""
+        options = rule_config.get('options', {}) or {}
+        accepted = inspect.signature(rule_cls.__init__).parameters
+        rule = rule_cls(**{k: v for k, v in options.items() if k in accepted})
+        rule.severity = rule_config.get('level', rule.severity)
+        return rule
+
+    def _build_index(self) -> Dict[type, List[RuleBase]]:
+        """Build the node type -> rules index used during traversal"""
+        index: Dict[type, List[RuleBase]] = {}
+        for rule in self.rules:
+            for node_type in rule.node_types:
+                index.setdefault(node_type, []).append(rule)
+        return index
+
+    def fingerprint(self) -> str:
         """
-        Apply all rules to the given AST node
+        Hash of everything besides file content that affects results:
+        engine version, rule configuration and each rule's implementation
+        """
+        digest = hashlib.sha256(ENGINE_VERSION.encode())
+        digest.update(json.dumps(self.config, sort_keys=True, default=str).encode())
+        for rule in self.rules:
+            rule_cls = type(rule)
+            digest.update(f"{rule.rule_id}:{rule_cls.__module__}.{rule_cls.__qualname__}:"
+                          f"{rule.version}:{rule.severity}".encode())
+            try:
+                digest.update(Path(inspect.getsourcefile(rule_cls)).read_bytes())
+            except (TypeError, OSError):
+                pass
+        return digest.hexdigest()
+
+    def rules_for(self, node_type: type, active: Optional[FrozenSet[RuleBase]] = None) -> List[RuleBase]:
+        """
+        Return the rules interested in a node class (resolved once per class)
         Args:
-            node: AST node to analyze
+            node_type: LibCST node class
+            active: Restrict to this subset of rules (None for all)
         """
-        for rule_name, rule_config in self.rules.items():
-            if 'node_type' not in rule_config:
-                continue
+        cache = self._dispatch_caches.get(active)
+        if cache is None:
+            cache = self._dispatch_caches[active] = {}
+
+        rules = cache.get(node_type)
+        if rules is None:
+            rules = []
+            for base in node_type.__mro__:
+                for rule in self._index.get(base, ()):
+                    if rule not in rules and (active is None or rule in active):
+                        rules.append(rule)
+            cache[node_type] = rules
+        return rules
 
-            # Convert node type string to LibCST class
-            node_type = getattr(cst, rule_config['node_type'])
+    def affected_rules(self, changed_types: Iterable[Type[CSTNode]]) -> List[RuleBase]:
+        """
+        Select the rules that must re-run after an edit
+        Args:
+            changed_types: Classes of the nodes an edit replaced or removed, ancestors included
+        Returns:
+            Enabled rules inspecting any of those node classes
+        """
+        changed = tuple(changed_types)
+        return [
+            rule for rule in self.rules
+            if any(issubclass(node_type, rule.node_types) for node_type in changed)
+        ]
 
-            if isinstance(node, node_type):
-                self._check_rule(node, rule_name, rule_config)
+    def live_rules(self, content: bytes) -> List[RuleBase]:
+        """
+        Select the rules that can possibly fire on a file
+        One pass over the raw bytes finds every rule's required literals
+        Args:
+            content: Raw file bytes
+        Returns:
+            Enabled rules whose required literals are present (or that have none)
+        """
+        found = self._prefilter.scan(content)
+        return [
+            rule for rule in self.rules
+            if not rule.required_literals
+            or any(literal.lower() in found for literal in rule.required_literals)
+        ]
 
-    def _check_rule(self, node: CSTNode, rule_name: str, rule_config: dict) -> None:
+    def run_rules(
+            self,
+            target: Union[CodeParser, cst.Module],
+            file_path: Optional[str] = None,
+            rules: Optional[Sequence[RuleBase]] = None,
+            profiler: Optional[Any] = None,
+            lines: Optional[IntervalSet] = None
+    ) -> List[Issue]:
         """
-        Execute rule checks on specific node
+        Run every enabled rule over a file in a single traversal
         Args:
-            node: AST node being analyzed
-            rule_name: Name of current rule
-            rule_config: Rule configuration dictionary
-        """
-        # Example implementation - should be replaced with actual rule logic
-        if hasattr(node, 'value') and isinstance(node.value, str):
-            if 'bad_pattern' in rule_config.get('options', {}):
-                if rule_config['options']['bad_pattern'] in node.value:
-                    issue = {
-                        'rule': rule_name,
-                        'message': rule_config['message'],
-                        'line': node.lineno,
-                        'column': node.col_offset,
-                        'severity': rule_config.get('level', 'warning'),
-                        'suggestion': rule_config.get('fix', 'No fix available')
-                    }
-                    self.issues.append(issue)
\ No newline at end of file
+            target: CodeParser for the file, or a bare parsed module
+            file_path: Optional path used to label issues
+            rules: Subset of this engine's rules to run (e.g. from live_rules)
+            profiler: Optional StageProfiler charged per rule and for metadata
+            lines: Only report issues whose reported line (e.g. a def's header,
+                not its body) is one of these 1-based lines; mostly only
+                analyze subtrees touching them
+        Returns:
+            List of detected issues
+        """
+        if isinstance(target, cst.Module):
+            target = CodeParser(file_path or "<module>", module=target)
+        if profiler is not None:
+            target.profiler = profiler
+        context = RuleContext(target, file_path, self.metadata_dependencies)
+        active = None if rules is None else frozenset(rules)
+        selected = self.rules if rules is None else [rule for rule in self.rules if rule in active]
+        for rule in selected:
+            rule.begin_module(context)
+
+        if profiler is None:
+            visitor = _DispatchVisitor(self, context, active, lines)
+        else:
+            visitor = _ProfilingDispatchVisitor(self, context, active, profiler, lines)
+        context.module.visit(visitor)
+
+        issues = visitor.issues
+        for rule in selected:
+            if profiler is None:
+                issues.extend(rule.leave_module(context))
+            else:
+                start = time.perf_counter()
+                issues.extend(rule.leave_module(context))
+                profiler.add_rule(rule.rule_id, time.perf_counter() - start)
+
+        if lines is not None:
+            # An edit inside a function body must not re-report the function's name
+            issues = [issue for issue in issues if issue.line in lines]
+        return issues
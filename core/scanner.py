@@ -0,0 +1,479 @@
+"""
+Scanner Module for CodePolice
+Distributes file analysis across a process pool
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from core.cache import content_digest
+from core.issue import Issue
+from core.parser import CodeParser
+from core.intervals import IntervalSet
+from core.profiler import StageProfiler
+from core.rule_engine import RuleEngine
+
+logger = logging.getLogger("CodePoliceScanner")
+
+# Marker for files that could not be read or parsed
+_FAILED = object()
+
+# Errors that fail one file without aborting the scan
+_FILE_ERRORS = (OSError, RuntimeError, UnicodeDecodeError)
+
+# Rule engine owned by each worker process, built once by _init_worker
+_worker_engine: Optional[RuleEngine] = None
+
+
+def _init_worker(config_path: str) -> None:
+    """Process pool initializer: compile rules once per worker"""
+    global _worker_engine
+    _worker_engine = RuleEngine(config_path)
+
+
+class _Profiled:
+    """Worker result bundled with the worker's profile for that file"""
+    __slots__ = ('value', 'profile')
+
+    def __init__(self, value: Any, profile: StageProfiler):
+        self.value = value
+        self.profile = profile
+
+
+class FixResult:
+    """
+    Fixes for one file
+
+    When the worker wrote the file itself, fixed_code is dropped rather than
+    shipped back; temp names the staged file of a transactional write and
+    error says why writing failed. deferred holds issues whose fixes were
+    held back by a conflicting edit and need another pass.
+    """
+    __slots__ = ('fixed_code', 'diff', 'deferred', 'temp', 'error')
+
+    def __init__(self, fixed_code: Optional[str], diff: str, deferred: List[Issue]):
+        self.fixed_code = fixed_code
+        self.diff = diff
+        self.deferred = deferred
+        self.temp: Optional[str] = None
+        self.error: Optional[str] = None
+
+
+def _run_rules_profiled(
+        engine: RuleEngine,
+        parser: CodeParser,
+        file_path: str,
+        rules: Optional[List[Any]],
+        profiler: StageProfiler,
+        lines: Optional[IntervalSet] = None
+) -> List[Issue]:
+    """Run rules, charging metadata and rule time to separate stages"""
+    metadata_before = profiler.stages['metadata']
+    start = time.perf_counter()
+    issues = engine.run_rules(parser, file_path, rules, profiler, lines)
+    metadata = profiler.stages['metadata'] - metadata_before
+    profiler.add_stage('rules', time.perf_counter() - start - metadata)
+    return issues
+
+
+def analyze_source(
+        engine: RuleEngine,
+        file_path: str,
+        content: bytes,
+        profiler: Optional[StageProfiler] = None,
+        lines: Optional[IntervalSet] = None
+) -> List[Issue]:
+    """
+    Parse source and run all rules over it
+    Args:
+        engine: Rule engine to use
+        file_path: Path used to label parse errors
+        content: Raw file content
+        profiler: Optional StageProfiler to charge
+        lines: Only analyze and report these changed lines
+    Returns:
+        Detected issues
+    """
+    if profiler is None:
+        # Skip parsing entirely when no rule can fire on this file
+        rules = engine.live_rules(content)
+        if not rules:
+            return []
+
+        parser = CodeParser(file_path, source=content.decode('utf-8'))
+        return engine.run_rules(parser, file_path, rules, lines=lines)
+
+    start = time.perf_counter()
+    with profiler.stage('prefilter'):
+        rules = engine.live_rules(content)
+    issues = []
+    if rules:
+        with profiler.stage('parse'):
+            parser = CodeParser(file_path, source=content.decode('utf-8'))
+        issues = _run_rules_profiled(engine, parser, file_path, rules, profiler, lines)
+    profiler.add_file(file_path, time.perf_counter() - start, len(content))
+    return issues
+
+
+def fix_file(
+        engine: RuleEngine,
+        file_path: str,
+        only: Optional[str] = None,
+        profiler: Optional[StageProfiler] = None,
+        max_passes: int = 1
+) -> Optional[Tuple[str, str, List[Issue]]]:
+    """
+    Analyze a file and apply automatic fixes
+    Args:
+        engine: Rule engine to use
+        file_path: Path of the file being fixed
+        only: Restrict fixes to a single rule id
+        profiler: Optional StageProfiler to charge
+        max_passes: Fix passes allowed; later passes re-check the fixed module
+            with only the rules its edits can affect, until nothing changes
+    Returns:
+        (fixed code, unified diff, deferred issues) or None when no fix changes
+        the file; deferred issues are fixes the last pass held back
+    """
+    from libcst.metadata import PositionProvider
+    from core.fixer import CodeFixer
+
+    profiler = profiler or StageProfiler()
+    start = time.perf_counter()
+    with profiler.stage('parse'):
+        parser = CodeParser(file_path)
+    module = parser.get_ast()
+    original = parser.source_code
+    size = len(original.encode('utf-8'))
+    issues = _run_rules_profiled(engine, parser, file_path, None, profiler)
+    if not issues:
+        profiler.add_file(file_path, time.perf_counter() - start, size)
+        return None
+
+    parsed = module
+    for fix_pass in range(max(1, max_passes)):
+        if fix_pass:
+            # Re-check the fixed module in memory: no re-read, no re-parse
+            parser = CodeParser(file_path, module=module)
+            issues = _run_rules_profiled(engine, parser, file_path, rules, profiler)
+
+        # Filter issues if --only specified
+        if only:
+            issues = [i for i in issues if i.rule == only]
+
+        with profiler.stage('fix'):
+            fixer = CodeFixer(module, parser.resolve_metadata(PositionProvider))
+            module = fixer.apply_fixes(issues)
+        if not fixer.changes:
+            break
+
+        # Rules seeing none of the edited nodes would report what they already
+        # did; deferred fixes need their rules re-run for fresh positions
+        deferred = {issue.rule for issue in fixer.deferred}
+        affected = set(engine.affected_rules(fixer.changed_types))
+        rules = [
+            rule for rule in engine.rules
+            if (rule in affected or rule.rule_id in deferred) and (not only or rule.rule_id == only)
+        ]
+        if not rules:
+            break
+
+    result = None
+    # The last pass usually fixes nothing; any earlier one may have
+    if module is not parsed:
+        fixed_code = module.code
+        # Fixes can cancel out; identical output needs no diff
+        if fixed_code != original:
+            with profiler.stage('diff'):
+                diff = fixer.generate_diff(original, os.path.relpath(file_path))
+            result = fixed_code, diff, fixer.deferred
+    profiler.add_file(file_path, time.perf_counter() - start, size)
+    return result
+
+
+def fix_and_write(
+        engine: RuleEngine,
+        file_path: str,
+        only: Optional[str] = None,
+        profiler: Optional[StageProfiler] = None,
+        max_passes: int = 1,
+        write: Optional[str] = None
+) -> Optional[FixResult]:
+    """
+    fix_file, then write the result where the fix was computed
+    Args:
+        write: None to leave the file alone, 'apply' to replace it atomically,
+            'stage' to write a temporary file for a FixTransaction to commit
+    Returns:
+        FixResult, or None when no fix changes the file
+    """
+    from core.atomic_write import atomic_write, stage_file
+
+    profiler = profiler or StageProfiler()
+    fixed = fix_file(engine, file_path, only, profiler, max_passes)
+    if fixed is None:
+        return None
+    result = FixResult(*fixed)
+    if write:
+        with profiler.stage('write'):
+            try:
+                if write == 'stage':
+                    result.temp = stage_file(file_path, result.fixed_code)
+                else:
+                    atomic_write(file_path, result.fixed_code)
+                result.fixed_code = None
+            except (OSError, UnicodeError, SyntaxError) as e:
+                # SyntaxError: the original's coding cookie is invalid
+                result.error = f"Failed to write {file_path}: {e}"
+    return result
+
+
+def _analyze_task(file_path: str, content: bytes, profile: bool, lines: Optional[IntervalSet] = None) -> Any:
+    """Worker entry point for check"""
+    if not profile:
+        return analyze_source(_worker_engine, file_path, content, lines=lines)
+    profiler = StageProfiler()
+    return _Profiled(analyze_source(_worker_engine, file_path, content, profiler, lines), profiler)
+
+
+def _fix_task(file_path: str, only: Optional[str], profile: bool, max_passes: int = 1, write: Optional[str] = None) -> Any:
+    """Worker entry point for fix"""
+    if not profile:
+        return fix_and_write(_worker_engine, file_path, only, max_passes=max_passes, write=write)
+    profiler = StageProfiler()
+    return _Profiled(fix_and_write(_worker_engine, file_path, only, profiler, max_passes, write), profiler)
+
+
+class Scanner:
+    """
+    Analyzes files with an optional result cache, file-state index and
+    process pool
+
+    Results are yielded in input order regardless of which worker finishes
+    first, so output is deterministic for any --jobs value.
+    """
+
+    def __init__(
+            self,
+            engine: RuleEngine,
+            cache: Optional[Any] = None,
+            jobs: int = 1,
+            index: Optional[Any] = None,
+            profiler: Optional[StageProfiler] = None,
+            changed: Optional[Dict[str, IntervalSet]] = None
+    ):
+        self.engine = engine
+        self.cache = cache
+        self.index = index
+        self.profiler = profiler
+        # Changed lines per file label; results for a diff are partial, so
+        # they are never cached or indexed
+        self.changed = changed
+        if changed is not None:
+            self.cache = self.index = None
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.failures: List[str] = []  # Files that could not be read, parsed or fixed
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "Scanner":
+        if self.jobs > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_init_worker,
+                initargs=(str(self.engine.config_path),)
+            )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def scan(self, files: Iterable[Path]) -> Iterator[Tuple[Path, List[Issue]]]:
+        """
+        Analyze files, yielding (path, issues) in input order
+        Args:
+            files: Files to analyze
+        """
+        for py_file, state, result in self._ordered(files, self._submit_check):
+            if state is not None:
+                self._record(py_file, state, result)
+            for issue in result or []:
+                issue.file = str(py_file)
+            yield py_file, result or []
+
+    def scan_sources(self, sources: Iterable[Tuple[str, str, Callable[[], bytes]]]) -> Iterator[Tuple[str, List[Issue]]]:
+        """
+        Analyze content that does not come from the working tree (e.g. git blobs)
+        Args:
+            sources: (label, content digest, loader) triples; loader is only
+                called on a cache miss
+        Yields:
+            (label, issues) in input order
+        """
+        def submit(source: Tuple[str, str, Callable[[], bytes]]) -> Tuple[str, Any, Any]:
+            label, digest, load = source
+            key = self.cache.key_for_digest(digest) if self.cache else None
+            if self.cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return label, None, cached
+            content = load()
+            lines = self._lines_for(label)
+            if self._executor is not None:
+                return label, (key, None, digest), self._executor.submit(_analyze_task, label, content, False, lines)
+            return label, (key, None, digest), self._call(
+                analyze_source, label, self.engine, label, content, None, lines
+            )
+
+        for label, state, result in self._ordered(sources, submit):
+            if state is not None and state[0] is not None:
+                self.cache.put(state[0], result)
+            for issue in result or []:
+                issue.file = label
+            yield label, result or []
+
+    def fix(
+            self,
+            files: Iterable[Path],
+            only: Optional[str] = None,
+            max_passes: int = 1,
+            write: Optional[str] = None
+    ) -> Iterator[Tuple[Path, Optional[FixResult]]]:
+        """
+        Compute fixes for files, yielding (path, FixResult or None) in input order
+        Args:
+            files: Files to fix
+            only: Restrict fixes to a single rule id
+            max_passes: Fix passes allowed per file (see fix_file)
+            write: Write fixed files in the workers (see fix_and_write)
+        """
+        def submit(py_file: Path) -> Tuple[Path, Any, Any]:
+            if self.profiler is not None:
+                self.profiler.count_file(os.stat(py_file).st_size)
+            if self._executor is not None:
+                profile = self.profiler is not None
+                return py_file, None, self._executor.submit(_fix_task, str(py_file), only, profile, max_passes, write)
+            return py_file, None, self._call(
+                fix_and_write, py_file, self.engine, str(py_file), only, self.profiler, max_passes, write
+            )
+
+        for py_file, _, result in self._ordered(files, submit):
+            yield py_file, result
+
+    def _ordered(self, files: Iterable[Path], submit) -> Iterator[Tuple[Path, Any, Any]]:
+        """Run submit over files, resolving results in input order"""
+        # Keep a bounded window of in-flight files so memory stays flat
+        window = self.jobs * 4
+        pending: Deque[Tuple[Path, Any, Any]] = deque()
+
+        for py_file in files:
+            try:
+                pending.append(submit(py_file))
+            except OSError as e:
+                # Missing, unreadable, or deleted since discovery
+                pending.append((py_file, None, self._fail(py_file, e)))
+            while len(pending) >= window:
+                yield self._resolve(*pending.popleft())
+
+        while pending:
+            yield self._resolve(*pending.popleft())
+
+    def _submit_check(self, py_file: Path) -> Tuple[Path, Any, Any]:
+        """
+        Start analysis of one file
+        Returns:
+            (path, state to record or None, issues or future)
+        """
+        profiler = self.profiler
+        stat = None
+        if self.index is not None:
+            stat = os.stat(py_file)
+            known = self.index.lookup_stat(str(py_file), stat)
+            if known is not None:
+                if profiler is not None:
+                    profiler.count_file(stat.st_size)
+                return py_file, None, known
+
+        if profiler is not None:
+            with profiler.stage('read'):
+                content = py_file.read_bytes()
+            profiler.count_file(len(content))
+            with profiler.stage('hash'):
+                digest = content_digest(content)
+        else:
+            content = py_file.read_bytes()
+            digest = content_digest(content)
+        if self.index is not None:
+            known = self.index.lookup_digest(str(py_file), digest)
+            if known is not None:
+                return py_file, (None, stat, digest), known
+
+        key = self.cache.key_for_digest(digest) if self.cache else None
+        if self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return py_file, (None, stat, digest), cached
+
+        lines = self._lines_for(str(py_file))
+        if self._executor is not None:
+            return py_file, (key, stat, digest), self._executor.submit(
+                _analyze_task, str(py_file), content, profiler is not None, lines
+            )
+
+        return py_file, (key, stat, digest), self._call(
+            analyze_source, py_file, self.engine, str(py_file), content, profiler, lines
+        )
+
+    def _lines_for(self, label: str) -> Optional[IntervalSet]:
+        """Changed lines of a file in diff mode (empty if it has none), else None"""
+        if self.changed is None:
+            return None
+        return self.changed.get(label, IntervalSet())
+
+    def _record(self, py_file: Path, state: Tuple, issues: List[Issue]) -> None:
+        """Store fresh results in the result cache and file-state index"""
+        key, stat, digest = state
+        if key is not None:
+            self.cache.put(key, issues)
+        if self.index is not None:
+            self.index.put(str(py_file), stat, digest, issues)
+
+    def _fail(self, path: Any, error: Exception) -> Any:
+        """Record a per-file failure; callers report them and exit non-zero"""
+        message = f"Failed to read {path}: {error.strerror or error}" if isinstance(error, OSError) else str(error)
+        logger.error(message)
+        self.failures.append(message)
+        return _FAILED
+
+    def _call(self, func, path: Any, *args) -> Any:
+        """Run func(*args) inline for path, recording per-file failures instead of aborting the scan"""
+        try:
+            return func(*args)
+        except _FILE_ERRORS as e:
+            return self._fail(path, e)
+
+    def _resolve(self, py_file: Path, state: Any, result: Any) -> Tuple[Path, Any, Any]:
+        """Wait for a submitted file; failed files yield no result and record nothing"""
+        if isinstance(result, Future):
+            try:
+                result = result.result()
+            except BrokenProcessPool as e:
+                # Every remaining file would fail the same way
+                raise RuntimeError(f"Worker process died, scan aborted: {e}") from e
+            except _FILE_ERRORS as e:
+                result = self._fail(py_file, e)
+
+        if isinstance(result, _Profiled):
+            self.profiler.merge(result.profile)
+            result = result.value
+
+        if result is _FAILED:
+            return py_file, None, None
+        return py_file, state, result
@@ -0,0 +1,326 @@
+"""
+Analysis Daemon for CodePolice
+Keeps rules compiled and results warm behind a local Unix socket
+"""
+
+import os
+import sys
+import json
+import stat
+import socket
+import hashlib
+import logging
+import tempfile
+import threading
+import socketserver
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("CodePoliceDaemon")
+
+
+def _is_private(directory: str) -> bool:
+    """Real directory owned by this user that no one else can enter"""
+    try:
+        info = os.lstat(directory)
+    except OSError:
+        return False
+    return stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and not info.st_mode & 0o077
+
+
+def runtime_directory() -> str:
+    """
+    Per-user directory for daemon sockets
+    $XDG_RUNTIME_DIR when set, otherwise a 0700 directory under the temp dir.
+    Sockets in a shared directory could be squatted by another local user
+    who then answers every check with "no issues".
+    Raises:
+        RuntimeError: the directory exists but is not private to this user
+    """
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and _is_private(runtime):
+        return runtime
+
+    directory = os.path.join(tempfile.gettempdir(), f"codepolice-{os.getuid()}")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    if not _is_private(directory):
+        raise RuntimeError(f"Refusing to use {directory} for the daemon socket: not a private directory")
+    return directory
+
+
+def default_socket_path(workdir: Optional[str] = None) -> str:
+    """Socket path for the daemon serving a given working directory"""
+    workdir = os.path.abspath(workdir or os.getcwd())
+    digest = hashlib.sha1(workdir.encode()).hexdigest()[:12]
+    return os.path.join(runtime_directory(), f"codepolice-{digest}.sock")
+
+
+class DaemonClient:
+    """
+    Thin client for the analysis daemon
+    Only depends on the standard library so it starts quickly
+    """
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 30.0):
+        if socket_path is None:
+            try:
+                socket_path = default_socket_path()
+            except RuntimeError as e:
+                # Never talk to a socket someone else could have planted
+                logger.warning(str(e))
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _request(self, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Send one request and yield response lines as they arrive"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            with sock.makefile('rb') as stream:
+                for line in stream:
+                    yield json.loads(line)
+
+    def is_running(self) -> bool:
+        """Check whether a daemon answers on the socket"""
+        if not self.socket_path or not os.path.exists(self.socket_path):
+            return False
+        try:
+            return any(reply.get('ok') for reply in self._request({'command': 'ping'}))
+        except OSError:
+            return False
+
+    def check(self, files: List[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze files in the daemon
+        Yields one {'file': ..., 'issues': [...]} record per file as it completes
+        """
+        paths = [os.path.abspath(path) for path in files]
+        yield from self._records({'command': 'check', 'files': paths})
+
+    def check_blobs(self, root: str, blobs: List[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze staged content in the daemon
+        Only blob SHAs are sent; the daemon reads a blob from the repository
+        at root only when it has no result for that SHA yet
+        Args:
+            root: Repository top-level directory
+            blobs: (repository-relative path, blob SHA) pairs
+        """
+        request = {'command': 'check_blobs', 'root': os.path.abspath(root), 'blobs': [list(blob) for blob in blobs]}
+        yield from self._records(request)
+
+    def _records(self, request: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Per-file records of a check request, up to its end marker"""
+        for reply in self._request(request):
+            if 'error' in reply and 'file' not in reply:
+                raise RuntimeError(reply['error'])
+            if reply.get('done'):
+                return
+            yield reply
+
+    def shutdown(self) -> None:
+        """Ask the daemon to exit"""
+        for _ in self._request({'command': 'shutdown'}):
+            pass
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one newline-delimited JSON request per connection"""
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            self.server.daemon.dispatch(request, self._send)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-stream; nothing left to report to
+            pass
+        except Exception as e:
+            logger.error(f"Request failed: {e}")
+            self._send({'error': str(e)})
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+        self.wfile.flush()
+
+
+class _UnixServer(socketserver.UnixStreamServer):
+    """Single-threaded server: rules keep per-file state and are not thread-safe"""
+
+    def __init__(self, socket_path: str, daemon: "AnalysisDaemon"):
+        self.daemon = daemon
+        super().__init__(socket_path, _RequestHandler)
+
+
+class AnalysisDaemon:
+    """
+    Long-lived analysis server
+
+    Holds one compiled RuleEngine and an in-memory LRU of results keyed by
+    content digest, so repeated checks of unchanged files cost one hash.
+    The engine is rebuilt when the rule configuration file changes.
+    """
+
+    def __init__(
+            self,
+            socket_path: Optional[str] = None,
+            config_path: str = "codepolice.yaml",
+            max_entries: int = 50000
+    ):
+        self.socket_path = socket_path or default_socket_path()
+        self.config_path = Path(config_path).resolve()
+        self.max_entries = max_entries
+        self.results: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self.engine = None
+        self._config_mtime = None
+        self._server: Optional[_UnixServer] = None
+        self._load_engine()
+
+    def _config_state(self) -> Optional[int]:
+        try:
+            return self.config_path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def _load_engine(self) -> None:
+        """(Re)build the rule engine if the configuration changed"""
+        from core.rule_engine import RuleEngine
+
+        state = self._config_state()
+        if self.engine is None or state != self._config_mtime:
+            self.engine = RuleEngine(str(self.config_path))
+            self._config_mtime = state
+            self.results.clear()
+
+    def serve_forever(self) -> None:
+        """Listen on the socket until a shutdown request arrives"""
+        if os.path.exists(self.socket_path):
+            if DaemonClient(self.socket_path).is_running():
+                raise RuntimeError(f"Daemon already running on {self.socket_path}")
+            os.unlink(self.socket_path)
+
+        self._server = _UnixServer(self.socket_path, self)
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"CodePolice daemon listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def dispatch(self, request: Dict[str, Any], send) -> None:
+        """Execute a request, streaming replies through send"""
+        command = request.get('command')
+        if command == 'ping':
+            send({'ok': True, 'pid': os.getpid()})
+        elif command == 'shutdown':
+            send({'ok': True})
+            # shutdown() blocks until serve_forever returns, so run it off-thread
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+        elif command == 'check':
+            self._load_engine()
+            for path in request.get('files', []):
+                self._send_check(send, path, lambda: self.check_file(path))
+            send({'done': True})
+        elif command == 'check_blobs':
+            from contextlib import ExitStack
+            from integrations.git_hook import GitBlobReader
+
+            self._load_engine()
+            with ExitStack() as stack:
+                readers = []
+
+                def read(sha: str) -> bytes:
+                    # git cat-file is only started for the first blob not seen before
+                    if not readers:
+                        readers.append(stack.enter_context(GitBlobReader(Path(request['root']))))
+                    return readers[0].read(sha)
+
+                for path, sha in request.get('blobs', []):
+                    self._send_check(
+                        send, path, lambda: self.check_source(path, f"git-blob:{sha}", lambda: read(sha))
+                    )
+            send({'done': True})
+        else:
+            send({'error': f"Unknown command: {command}"})
+
+    @staticmethod
+    def _send_check(send, path: str, check: Callable[[], List[Any]]) -> None:
+        """Send one file's issues, or an error record if it cannot be analyzed"""
+        try:
+            send({'file': path, 'issues': [issue.to_dict() for issue in check()]})
+        except (OSError, RuntimeError, UnicodeDecodeError) as e:
+            logger.error(str(e))
+            send({'file': path, 'issues': [], 'error': str(e)})
+
+    def check_file(self, path: str) -> List[Any]:
+        """
+        Analyze one file, reusing results for previously seen content
+        Raises:
+            OSError, RuntimeError, UnicodeDecodeError: the file cannot be read or parsed
+        """
+        from core.cache import content_digest
+
+        content = Path(path).read_bytes()
+        return self.check_source(path, content_digest(content), lambda: content)
+
+    def check_source(self, label: str, key: str, load: Callable[[], bytes]) -> List[Any]:
+        """
+        Analyze content identified by key, loading it only on a miss
+        Args:
+            label: File name for the issues
+            key: Content digest, or another content identity such as a blob SHA
+            load: Returns the content
+        """
+        from core.scanner import analyze_source
+
+        issues = self.results.get(key)
+        if issues is not None:
+            self.results.move_to_end(key)
+        else:
+            issues = analyze_source(self.engine, label, load())
+            self.results[key] = issues
+            if len(self.results) > self.max_entries:
+                self.results.popitem(last=False)
+
+        for issue in issues:
+            issue.file = label
+        return issues
+
+
+# Thin command line client: python -m integrations.daemon check FILE...
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CodePolice daemon client")
+    parser.add_argument("command", choices=["check", "status", "stop"])
+    parser.add_argument("files", nargs="*")
+    args = parser.parse_args()
+
+    client = DaemonClient()
+    if not client.is_running():
+        print("CodePolice daemon is not running", file=sys.stderr)
+        sys.exit(3)
+
+    if args.command == "status":
+        print(f"CodePolice daemon running on {client.socket_path}")
+        sys.exit(0)
+    if args.command == "stop":
+        client.shutdown()
+        sys.exit(0)
+
+    found = 0
+    for record in client.check(args.files):
+        if 'error' in record:
+            found += 1
+            print(f"{record['file']}: {record['error']}", file=sys.stderr)
+        for issue in record['issues']:
+            found += 1
+            print(f"{record['file']}:{issue['line']}:{issue['column']}: "
+                  f"{issue['rule']} [{issue['severity']}] {issue['message']}")
+    sys.exit(1 if found else 0)
@@ -4,10 +4,215 @@ Implements pre-commit hook to enforce code quality checks
 """
 
 import os
+import re
 import sys
 import subprocess
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.intervals import IntervalSet
+
+# Hash of git's empty tree, diffed against before the first commit
+EMPTY_TREE = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+# Regular and executable files; symlinks and submodules have no source to check
+BLOB_MODES = ("100644", "100755")
+
+
+def _git(args: List[str], cwd: Optional[Path] = None) -> bytes:
+    """Run a git command and return its stdout"""
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        detail = getattr(e, "stderr", b"") or b""
+        raise RuntimeError(f"git {args[0]} failed: {detail.decode(errors='replace').strip() or e}")
+
+
+def repository_root() -> Path:
+    """Top-level directory of the current git work tree"""
+    return Path(os.fsdecode(_git(["rev-parse", "--show-toplevel"]).strip()))
+
+
+def staged_blobs(root: Path, suffixes: Tuple[str, ...] = (".py",)) -> Iterator[Tuple[str, str]]:
+    """
+    List staged files as they are in the index, not the working tree
+    Args:
+        root: Repository top-level directory
+        suffixes: File name suffixes to keep
+    Returns:
+        (repository-relative path, blob SHA) for each added, copied or modified file
+    """
+    try:
+        _git(["rev-parse", "--verify", "-q", "HEAD"], cwd=root)
+        base = "HEAD"
+    except RuntimeError:
+        base = EMPTY_TREE
+
+    output = _git(["diff-index", "--cached", "-z", "--no-renames", "--diff-filter=ACM", base], cwd=root)
+    yield from _raw_blobs(output, suffixes)
+
+
+def _raw_blobs(output: bytes, suffixes: Tuple[str, ...]) -> Iterator[Tuple[str, str]]:
+    """(path, new-side SHA) of regular files in `git diff --raw -z` output"""
+    fields = output.split(b"\0")
+    # -z output alternates ":<old mode> <new mode> <old sha> <new sha> <status>" and path
+    for header, path in zip(fields[0::2], fields[1::2]):
+        _, mode, _, sha, _ = header.decode().split(" ")
+        name = os.fsdecode(path)
+        if mode in BLOB_MODES and name.endswith(suffixes):
+            yield name, sha
+
+
+def _diff_args(rev_range: Optional[str], staged: bool) -> List[str]:
+    args = ["--no-color", "--no-ext-diff", "--no-renames"]
+    if staged:
+        args.append("--cached")
+    if rev_range:
+        args.append(rev_range)
+    return args + ["--"]
+
+
+def diff_blobs(
+        root: Path,
+        rev_range: Optional[str] = None,
+        staged: bool = False,
+        suffixes: Tuple[str, ...] = (".py",)
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    List the new side of every file a diff adds, copies or modifies
+    Args:
+        root: Repository top-level directory
+        rev_range: Revision or range passed to git diff, as for changed_lines
+        staged: Diff the index against HEAD instead
+        suffixes: File name suffixes to keep
+    Returns:
+        (repository-relative path, blob SHA), the SHA being None when the new
+        side is the file in the working tree
+    """
+    args = ["diff", "--raw", "-z", "--no-abbrev", "--diff-filter=ACM", *_diff_args(rev_range, staged)]
+    output = _git(args, cwd=root)
+    for name, sha in _raw_blobs(output, suffixes):
+        # git reports working tree content it has not hashed as an all-zero SHA
+        yield name, sha if sha.strip("0") else None
+
+
+_HUNK_HEADER = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+# Escapes git uses in C-style quoted path names (core.quotePath)
+_QUOTED_ESCAPES = {
+    b"a": b"\a", b"b": b"\b", b"t": b"\t", b"n": b"\n", b"v": b"\v", b"f": b"\f", b"r": b"\r",
+    b'"': b'"', b"\\": b"\\",
+}
+
+
+def _diff_path(raw: bytes) -> Optional[bytes]:
+    """
+    Path from a ---/+++ line of a diff run with --no-prefix, or None for /dev/null
+    Git ends names containing a space with a tab, and quotes names holding
+    special or non-ASCII bytes C-style.
+    """
+    if raw.endswith(b"\t"):
+        raw = raw[:-1]
+    if raw.startswith(b'"') and raw.endswith(b'"'):
+        path = bytearray()
+        i = 1
+        while i < len(raw) - 1:
+            char = raw[i:i + 1]
+            if char != b"\\":
+                path += char
+                i += 1
+            elif raw[i + 1:i + 2].isdigit():
+                path.append(int(raw[i + 1:i + 4], 8))
+                i += 4
+            else:
+                path += _QUOTED_ESCAPES.get(raw[i + 1:i + 2], raw[i + 1:i + 2])
+                i += 2
+        return bytes(path)
+    return None if raw == b"/dev/null" else raw
+
+
+def changed_lines(
+        root: Path,
+        rev_range: Optional[str] = None,
+        staged: bool = False,
+        suffixes: Tuple[str, ...] = (".py",)
+) -> Dict[str, IntervalSet]:
+    """
+    Collect the new-side line ranges touched by a diff
+    Args:
+        root: Repository top-level directory
+        rev_range: Revision or range passed to git diff (e.g. origin/main...HEAD)
+        staged: Diff the index against HEAD instead
+        suffixes: File name suffixes to keep
+    Returns:
+        Repository-relative path -> changed 1-based lines; deleted files are omitted
+    """
+    # --no-prefix overrides diff.noprefix and diff.mnemonicPrefix alike
+    output = _git(["diff", "-U0", "--no-prefix", *_diff_args(rev_range, staged)], cwd=root)
+
+    hunks: Dict[str, List[Tuple[int, int]]] = {}
+    current: Optional[List[Tuple[int, int]]] = None
+    header = False  # Between "diff --git" and the first hunk, where an added "++ x" line cannot be
+    for line in output.split(b"\n"):
+        if line.startswith(b"diff "):
+            header = True
+            current = None
+        elif header and line.startswith(b"+++ "):
+            header = False
+            target = _diff_path(line[4:])
+            name = os.fsdecode(target) if target is not None else None
+            current = hunks.setdefault(name, []) if name and name.endswith(suffixes) else None
+        elif current is not None and line.startswith(b"@@"):
+            match = _HUNK_HEADER.match(line)
+            if match is None:
+                continue
+            start = int(match.group(1))
+            count = int(match.group(2)) if match.group(2) is not None else 1
+            if count:
+                current.append((start, start + count - 1))
+            else:
+                # Pure deletion after line `start`: the code on both sides is affected
+                current.append((max(start, 1), start + 1))
+    return {name: IntervalSet(ranges) for name, ranges in hunks.items()}
+
+
+class GitBlobReader:
+    """
+    Reads blobs through one long-lived `git cat-file --batch` process
+
+    Spawning git per file dominates hook time on large commits; a single
+    batch pipe serves any number of lookups.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = root
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "GitBlobReader":
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=self.root, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process.wait()
+            self._process = None
+
+    def read(self, sha: str) -> bytes:
+        """Return the content of a blob"""
+        self._process.stdin.write(sha.encode() + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            raise RuntimeError(f"Cannot read blob {sha} from git")
+        content = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # Trailing newline after each object
+        return content
 
 
 class GitHookManager:
@@ -59,15 +264,9 @@ class GitHookManager:
 # CodePolice Git Pre-commit Hook
 
 echo "🔍 Running CodePolice pre-commit check..."
-# Get staged Python files
-FILES=$(git diff --cached --name-only | grep -E '\\.py$')
-
-if [ -z "$FILES" ]; then
-    exit 0
-fi
-
-# Run code police check
-codepolice check $FILES
+# Check the staged Python blobs themselves, not the working tree copies;
+# a running `codepolice daemon` does the work if there is one
+codepolice hook run
 
 # Check result
 RESULT=$?
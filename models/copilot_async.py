@@ -0,0 +1,435 @@
+"""
+Async Copilot Client for CodePolice
+Pooled keep-alive HTTP on asyncio streams, with request coalescing and batching
+"""
+
+import ssl
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+from urllib.parse import SplitResult, unquote, urlsplit
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from models.snippet_normalizer import normalize_snippet
+
+logger = logging.getLogger("CopilotProxy")
+
+
+def _parse_size(value, base: int) -> int:
+    """Content-Length or chunk size, or ConnectionError: the response cannot be framed"""
+    try:
+        size = int(value.strip(), base)
+    except ValueError:
+        raise ConnectionError(f"Malformed response length: {value!r}") from None
+    if size < 0:
+        raise ConnectionError(f"Malformed response length: {value!r}")
+    return size
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+        self.used = False
+
+    async def request(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, bytes]:
+        self.used = True
+        head = f"{method} {target} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        self.writer.write(head.encode('latin-1') + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        fields = status_line.split()
+        if len(fields) < 2 or not fields[0].startswith(b"HTTP/") or not fields[1].isdigit():
+            raise ConnectionError(f"Malformed status line: {status_line[:80]!r}")
+        status = int(fields[1])
+
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = await self._read_chunked()
+        elif 'content-length' in response_headers:
+            data = await self.reader.readexactly(_parse_size(response_headers['content-length'], 10))
+        else:
+            data = await self.reader.read()
+            self.reusable = False
+
+        if response_headers.get('connection', '').lower() == 'close':
+            self.reusable = False
+        return status, data
+
+    async def _read_chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = _parse_size((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Skip trailers up to the blank line
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self) -> None:
+        self.writer.close()
+
+    async def wait_closed(self) -> None:
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[SplitResult]:
+    """Proxy from HTTPS_PROXY/HTTP_PROXY for a host, unless NO_PROXY exempts it"""
+    from urllib.request import getproxies_environment, proxy_bypass_environment
+
+    proxies = getproxies_environment()
+    proxy = proxies.get(scheme)
+    if not proxy or proxy_bypass_environment(host, proxies):
+        return None
+    return urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+
+class ConnectionPool:
+    """
+    Bounded pool of keep-alive connections to one origin
+
+    At most `size` requests are in flight; idle connections are reused, and
+    a request that fails on a reused (possibly server-closed) connection is
+    retried once on a fresh one. HTTPS_PROXY, HTTP_PROXY and NO_PROXY are
+    honored: HTTPS goes through a CONNECT tunnel, plain HTTP is sent to the
+    proxy with absolute URLs. Only http:// proxies are supported.
+    """
+
+    def __init__(self, url: str, size: int = 8):
+        parts = urlsplit(url.strip())
+        self.host = parts.hostname or "localhost"
+        self.secure = parts.scheme == "https"
+        self.port = parts.port or (443 if self.secure else 80)
+        self.path = parts.path or "/"
+        if parts.query:
+            self.path += f"?{parts.query}"
+        self.proxy = _proxy_for(parts.scheme, self.host)
+        self._proxy_headers: Dict[str, str] = {}
+        if self.proxy is not None:
+            if self.proxy.username:
+                credentials = f"{unquote(self.proxy.username)}:{unquote(self.proxy.password or '')}"
+                self._proxy_headers["Proxy-Authorization"] = f"Basic {base64.b64encode(credentials.encode()).decode()}"
+            if not self.secure:
+                self.path = f"http://{self.host}:{self.port}{self.path}"
+        self.size = size
+        self.connections_opened = 0
+        self._idle: List[_Connection] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> _Connection:
+        context = ssl.create_default_context() if self.secure else None
+        if self.proxy is None:
+            reader, writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        else:
+            if self.proxy.scheme != "http":
+                raise ConnectionError(f"Unsupported proxy scheme: {self.proxy.scheme}")
+            reader, writer = await asyncio.open_connection(self.proxy.hostname, self.proxy.port or 80)
+            if self.secure:
+                await self._tunnel(reader, writer)
+                await writer.start_tls(context, server_hostname=self.host)
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def _tunnel(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Open a CONNECT tunnel through the proxy to the origin"""
+        if not hasattr(writer, 'start_tls'):
+            writer.close()
+            raise ConnectionError("HTTPS through a proxy needs Python 3.11 or newer")
+        target = f"{self.host}:{self.port}"
+        head = f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in self._proxy_headers.items())
+        writer.write(f"{head}\r\n".encode('latin-1'))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        fields = status_line.split()
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if len(fields) < 2 or fields[1] != b"200":
+            writer.close()
+            raise ConnectionError(f"Proxy refused tunnel: {status_line.decode(errors='replace').strip()}")
+
+    async def post(self, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        """POST body to the pool's URL"""
+        headers = {"Host": self.host, "Connection": "keep-alive", **headers}
+        if self.proxy is not None and not self.secure:
+            headers.update(self._proxy_headers)
+        async with self._slots:
+            for attempt in range(2):
+                connection = self._idle.pop() if self._idle else await self._connect()
+                reused = connection.used
+                try:
+                    status, data = await connection.request("POST", self.path, headers, body)
+                except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                    connection.close()
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    # Cancelled or timed out mid-response: the stream is unusable
+                    connection.close()
+                    raise
+                if connection.reusable:
+                    self._idle.append(connection)
+                else:
+                    connection.close()
+                return status, data
+        raise ConnectionError("unreachable")
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._idle.pop().wait_closed()
+
+
+class _Pending:
+    """One prompt waiting for a suggestion"""
+    __slots__ = ('key', 'prompt', 'future', 'started')
+
+    def __init__(self, key: str, prompt: str, future: asyncio.Future):
+        self.key = key
+        self.prompt = prompt
+        self.future = future
+        self.started = time.perf_counter()
+
+
+class AsyncCopilotClient:
+    """
+    Concurrent Copilot suggestion client
+
+    Identical snippets already in flight share one request. With
+    `batch_size` above 1, snippets arriving within `batch_window` seconds
+    of each other are packed into a single completion request carrying a
+    list of prompts, which the endpoint must support; by default each
+    request carries one prompt string. Up to `concurrency` requests run at
+    once over pooled keep-alive connections. Failures degrade to the
+    fallback suggestion.
+    With `normalize`, snippets are canonicalized first so equivalent ones
+    (renamed, reformatted, different literals) flagged by the same rule
+    share a request and a cache entry.
+    """
+
+    def __init__(
+            self,
+            config: Any,
+            build_prompt: Callable[[str, Optional[Dict]], str],
+            fallback: Callable[[str], str],
+            cache: Optional[Any] = None,
+            rate_limiter: Optional[Any] = None,
+            concurrency: int = 8,
+            batch_size: int = 1,
+            batch_window: float = 0.005,
+            retries: int = 1,
+            normalize: bool = False
+    ):
+        self.config = config
+        self.build_prompt = build_prompt
+        self.fallback = fallback
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.retries = retries
+        self.normalize = normalize
+        self.pool = ConnectionPool(config.api_endpoint, concurrency)
+        self.requests = 0
+        self.failed_requests = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+        self.latencies: List[float] = []
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._senders: Set[asyncio.Task] = set()
+        self._started = time.perf_counter()
+
+    async def __aenter__(self) -> "AsyncCopilotClient":
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._collect_batches())
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self, cancel: bool = False) -> None:
+        """Wait for requests in flight (or abandon them with cancel) and close connections"""
+        if self._senders:
+            if cancel:
+                for sender in self._senders:
+                    sender.cancel()
+            await asyncio.gather(*self._senders, return_exceptions=True)
+        if self._batcher is not None:
+            self._batcher.cancel()
+            self._batcher = None
+        await self.pool.close()
+
+    async def suggest(self, snippet: str, context: Optional[Dict] = None, rule: Optional[str] = None) -> str:
+        """Get a suggestion for one snippet, optionally naming the rule that flagged it"""
+        normalized = normalize_snippet(snippet) if self.normalize else None
+        if normalized is not None:
+            prompt = self.build_prompt(normalized.canonical, context)
+            key = normalized.key(rule, repr(sorted(context.items())) if context else "")
+        else:
+            prompt = self.build_prompt(snippet, context)
+            key = hashlib.sha256(snippet.encode()).hexdigest() if not context else \
+                hashlib.sha256(prompt.encode()).hexdigest()
+
+        text = self.cache.get(key) if self.cache is not None else None
+        if text:
+            self.cache_hits += 1
+        else:
+            text = await self._fetch(key, prompt)
+        if not text:
+            return self.fallback(snippet)
+        return normalized.restore(text) if normalized is not None else text
+
+    async def _fetch(self, key: str, prompt: str) -> Optional[str]:
+        """Response text for a prompt, shared with identical requests in flight"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        await self._queue.put(_Pending(key, prompt, future))
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+
+    async def suggest_many(
+            self,
+            snippets: List[str],
+            context: Optional[Dict] = None,
+            rules: Optional[List[str]] = None
+    ) -> List[str]:
+        """Get suggestions for many snippets concurrently, in input order"""
+        rules = rules or [None] * len(snippets)
+        return list(await asyncio.gather(*(
+            self.suggest(snippet, context, rule) for snippet, rule in zip(snippets, rules)
+        )))
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            sender = asyncio.create_task(self._send(batch))
+            self._senders.add(sender)
+            sender.add_done_callback(self._senders.discard)
+
+    async def _send(self, batch: List[_Pending]) -> None:
+        texts: List[Optional[str]] = [None] * len(batch)
+        try:
+            if await self._acquire_token():
+                texts = await self._request([item.prompt for item in batch])
+            else:
+                logger.warning("GitHub Copilot rate limit exceeded - using fallback suggestions")
+        except Exception as e:
+            logger.error(f"Copilot request failed: {e!r}")
+        finally:
+            # Every caller waiting on this batch gets an answer, even on errors or cancellation
+            finished = time.perf_counter()
+            for item, text in zip(batch, texts):
+                self.latencies.append(finished - item.started)
+                if text and self.cache is not None:
+                    self.cache.put(item.key, text)
+                # Callers substitute their own fallback for a missing text
+                if not item.future.done():
+                    item.future.set_result(text or None)
+
+    async def _acquire_token(self) -> bool:
+        """Take a rate-limit token, waiting up to config.rate_wait seconds for one"""
+        if self.rate_limiter is None:
+            return True
+        wait = getattr(self.config, 'rate_wait', 0)
+        if wait <= 0:
+            return self.rate_limiter.try_acquire()
+        return await self.rate_limiter.acquire_async(deadline=time.monotonic() + wait)
+
+    async def _request(self, prompts: List[str]) -> List[Optional[str]]:
+        """One completion request for a list of prompts; None marks a failed prompt"""
+        headers = {
+            "Authorization": f"Bearer {self.config.auth_token}",
+            "Content-Type": "application/json",
+            "User-Agent": "CodePolice/1.0",
+        }
+        # Lists are only sent when batching was opted into
+        body = json.dumps({"prompt": prompts if len(prompts) > 1 else prompts[0]}).encode()
+
+        for attempt in range(self.retries + 1):
+            self.requests += 1
+            try:
+                status, data = await asyncio.wait_for(self.pool.post(body, headers), self.config.timeout)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+                self.failed_requests += 1
+                logger.error(f"Connection error: {e!r}")
+                continue
+
+            if status == 200:
+                texts: List[Optional[str]] = [None] * len(prompts)
+                try:
+                    for position, choice in enumerate(json.loads(data).get("choices", [])):
+                        index = choice.get("index", position)
+                        if 0 <= index < len(prompts):
+                            texts[index] = choice.get("text", "")
+                except (ValueError, AttributeError) as e:
+                    logger.warning(f"Copilot API returned malformed JSON: {e}")
+                return texts
+
+            self.failed_requests += 1
+            logger.warning(f"Copilot API error: {status} - {data[:200].decode(errors='replace')}")
+            # Client errors will not succeed on retry
+            if status < 500 and status != 429:
+                break
+            await asyncio.sleep(0.05 * (attempt + 1))
+        return [None] * len(prompts)
+
+    def metrics(self) -> Dict[str, float]:
+        """Throughput and latency achieved so far"""
+        from core.profiler import percentile
+
+        elapsed = time.perf_counter() - self._started
+        return {
+            'requests': self.requests,
+            'failed_requests': self.failed_requests,
+            'suggestions': len(self.latencies),
+            'coalesced': self.coalesced,
+            'cache_hits': self.cache_hits,
+            'connections': self.pool.connections_opened,
+            'requests_per_second': self.requests / elapsed if elapsed else 0.0,
+            'suggestions_per_second': len(self.latencies) / elapsed if elapsed else 0.0,
+            'latency_p50': percentile(self.latencies, 0.50),
+            'latency_p95': percentile(self.latencies, 0.95),
+            'latency_max': max(self.latencies, default=0.0),
+        }
@@ -5,20 +5,19 @@ Provides AI-powered code fix suggestions using GitHub Copilot API
 
 import os
 import time
+import asyncio
+import threading
 import hashlib
 import json
 import logging
+from concurrent.futures import Future
 from typing import Dict, List, Optional, Union
 from pathlib import Path
 from dataclasses import dataclass
 
-# Optional dependencies
-try:
-    import requests
-
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
+from models.copilot_async import AsyncCopilotClient
+from models.rate_limiter import create_rate_limiter
+from models.suggestion_cache import SuggestionCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,32 +30,19 @@ class CopilotConfig:
     api_endpoint: str = "https://api.github.com/copilot_internal "
     auth_token: str = os.getenv("COPILOT_TOKEN")
     cache_dir: Path = Path(".copilot_cache")
+    cache_ttl: int = 86400  # Seconds a cached suggestion stays valid
+    cache_max_entries: int = 100000
     rate_limit: int = 10  # Requests per minute
+    rate_burst: int = 10  # Requests allowed back to back
+    rate_wait: float = 0.0  # Seconds to wait for the limiter before falling back
+    rate_shared: bool = True  # One budget for all processes sharing cache_dir
     timeout: int = 10  # Seconds
+    concurrency: int = 8  # Requests in flight, one pooled connection each
+    batch_size: int = 1  # Prompts per request; above 1 the endpoint must accept a prompt list
+    normalize_snippets: bool = False  # Share suggestions between equivalent snippets
     enabled: bool = True
 
 
-class CopilotRateLimiter:
-    """Simple rate limiter for API requests"""
-
-    def __init__(self, max_calls: int, period: int = 60):
-        self.max_calls = max_calls
-        self.period = period
-        self.calls = []
-
-    def allow_request(self) -> bool:
-        """Check if request is allowed based on rate limit"""
-        now = time.time()
-        # Remove old calls
-        self.calls = [t for t in self.calls if t > now - self.period]
-
-        if len(self.calls) >= self.max_calls:
-            return False
-
-        self.calls.append(now)
-        return True
-
-
 class CopilotFixer:
     """
     GitHub Copilot API Proxy for code fix suggestions
@@ -65,14 +51,22 @@ class CopilotFixer:
 
     def __init__(self, config: Optional[CopilotConfig] = None):
         self.config = config or CopilotConfig()
-        self.cache = {}
-        self.rate_limiter = CopilotRateLimiter(self.config.rate_limit)
-        self._init_cache()
-
-    def _init_cache(self) -> None:
-        """Initialize cache directory"""
-        if not self.config.cache_dir.exists():
-            self.config.cache_dir.mkdir(parents=True)
+        self.rate_limiter = create_rate_limiter(
+            self.config.rate_limit,
+            self.config.rate_burst,
+            self.config.cache_dir / "ratelimit.state" if self.config.rate_shared else None
+        )
+        # The store creates its directory on first use
+        self.cache = SuggestionCache(
+            self.config.cache_dir,
+            ttl=self.config.cache_ttl,
+            max_entries=self.config.cache_max_entries
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[AsyncCopilotClient] = None
+        self._expired = False
+        self._warned = False
 
     def _get_cache_key(self, code_snippet: str) -> str:
         """Generate cache key for code snippet"""
@@ -80,34 +74,37 @@ class CopilotFixer:
 
     def _load_from_cache(self, key: str) -> Optional[str]:
         """Load cached response if exists and valid"""
-        cache_file = self.config.cache_dir / f"{key}.json"
-
-        if not cache_file.exists():
-            return None
-
-        try:
-            with open(cache_file, 'r') as f:
-                data = json.load(f)
-
-            # Check expiration (24 hours)
-            if time.time() - data.get("timestamp", 0) < 86400:
-                return data.get("response")
-        except Exception as e:
-            logger.warning(f"Cache load error: {e}")
-            return None
+        return self.cache.get(key)
 
     def _save_to_cache(self, key: str, response: str) -> None:
         """Save response to cache"""
-        cache_file = self.config.cache_dir / f"{key}.json"
-
-        try:
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    "timestamp": time.time(),
-                    "response": response
-                }, f)
-        except Exception as e:
-            logger.warning(f"Cache save error: {e}")
+        self.cache.put(key, response)
+
+    def close(self) -> None:
+        """Close pooled connections, stop the event loop and flush buffered cache writes"""
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = self._client = None
+        self.rate_limiter.close()
+        self.cache.close()
+
+    async def _shutdown(self) -> None:
+        if self._client is not None:
+            # Past a deadline nobody is waiting for the stragglers
+            await self._client.close(cancel=self._expired)
+
+    def _available(self) -> bool:
+        if not self.config.enabled:
+            return False
+        if not self.config.auth_token:
+            if not self._warned:
+                logger.warning("GitHub Copilot token not configured - using fallback suggestions")
+                self._warned = True
+            return False
+        return True
 
     def get_suggestion(
             self,
@@ -118,55 +115,96 @@ class CopilotFixer:
         Get AI-powered code suggestion from GitHub Copilot
         Returns fallback suggestion if Copilot is unavailable
         """
-        if not self.config.enabled:
-            return self._fallback_suggestion(code_snippet)
-
-        if not REQUESTS_AVAILABLE:
-            logger.warning("Requests library not available - using fallback suggestions")
-            return self._fallback_suggestion(code_snippet)
+        return self.get_suggestions([code_snippet], context)[0]
 
-        if not self.config.auth_token:
-            logger.warning("GitHub Copilot token not configured - using fallback suggestions")
-            return self._fallback_suggestion(code_snippet)
-
-        cache_key = self._get_cache_key(code_snippet)
-        cached = self._load_from_cache(cache_key)
-
-        if cached:
-            return cached
-
-        if not self.rate_limiter.allow_request():
-            logger.warning("GitHub Copilot rate limit exceeded - using fallback suggestions")
-            return self._fallback_suggestion(code_snippet)
-
-        # Prepare request
-        headers = {
-            "Authorization": f"Bearer {self.config.auth_token}",
-            "Content-Type": "application/json",
-            "User-Agent": "CodePolice/1.0"
-        }
-
-        prompt = self._build_prompt(code_snippet, context)
-
-        try:
-            response = requests.post(
-                self.config.api_endpoint,
-                headers=headers,
-                json={"prompt": prompt},
-                timeout=self.config.timeout
+    def get_suggestions(
+            self,
+            code_snippets: List[str],
+            context: Optional[Dict] = None,
+            rules: Optional[List[str]] = None
+    ) -> List[str]:
+        """Get suggestions for several snippets at once, in input order"""
+        return self.submit_suggestions(code_snippets, context, rules=rules).result()
+
+    def submit_suggestions(
+            self,
+            code_snippets: List[str],
+            context: Optional[Dict] = None,
+            deadline: Optional[float] = None,
+            rules: Optional[List[str]] = None
+    ) -> "Future[List[str]]":
+        """
+        Start fetching suggestions without waiting for them
+        Requests run concurrently and batched on a background event loop
+        whose connection pool stays open between calls.
+        Args:
+            code_snippets: Snippets to fix
+            context: Extra prompt context shared by all snippets
+            deadline: time.monotonic() value after which unanswered snippets get fallback suggestions
+            rules: Rule id of each snippet, keying normalized snippets
+        Returns:
+            Future of the suggestions, in input order
+        """
+        if not self._available() or (deadline is not None and time.monotonic() >= deadline):
+            future: Future = Future()
+            future.set_result([self._fallback_suggestion(snippet) for snippet in code_snippets])
+            return future
+        return asyncio.run_coroutine_threadsafe(
+            self._suggest_all(code_snippets, context, deadline, rules), self._event_loop()
+        )
+
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name="copilot", daemon=True)
+            self._thread.start()
+        return self._loop
+
+    async def _suggest_all(
+            self,
+            code_snippets: List[str],
+            context: Optional[Dict],
+            deadline: Optional[float],
+            rules: Optional[List[str]]
+    ) -> List[str]:
+        if not code_snippets:
+            return []
+        if self._client is None:
+            self._client = AsyncCopilotClient(
+                self.config,
+                build_prompt=self._build_prompt,
+                fallback=self._fallback_suggestion,
+                cache=self.cache,
+                rate_limiter=self.rate_limiter,
+                concurrency=self.config.concurrency,
+                batch_size=self.config.batch_size,
+                normalize=self.config.normalize_snippets
             )
-
-            if response.status_code == 200:
-                suggestion = response.json().get("choices", [{}])[0].get("text", "")
-                self._save_to_cache(cache_key, suggestion)
-                return suggestion
+            await self._client.__aenter__()
+
+        rules = rules or [None] * len(code_snippets)
+        tasks = [
+            asyncio.ensure_future(self._client.suggest(snippet, context, rule))
+            for snippet, rule in zip(code_snippets, rules)
+        ]
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            self._expired = True
+            for task in pending:
+                task.cancel()
+
+        suggestions = []
+        for snippet, task in zip(code_snippets, tasks):
+            if task in pending or task.exception() is not None:
+                suggestions.append(self._fallback_suggestion(snippet))
             else:
-                logger.warning(f"Copilot API error: {response.status_code} - {response.text}")
-                return self._fallback_suggestion(code_snippet)
+                suggestions.append(task.result())
+        return suggestions
 
-        except Exception as e:
-            logger.error(f"Connection error: {e}")
-            return self._fallback_suggestion(code_snippet)
+    def metrics(self) -> Dict[str, float]:
+        """Request throughput and suggestion latency so far"""
+        return self._client.metrics() if self._client is not None else {}
 
     def _build_prompt(self, code_snippet: str, context: Optional[Dict] = None) -> str:
         """Build prompt for Copilot based on code and context"""
@@ -202,6 +240,10 @@ class CopilotFixer:
 def load_copilot_config() -> CopilotConfig:
     """Load configuration from environment variables or config file"""
     return CopilotConfig(
+        api_endpoint=os.getenv("COPILOT_ENDPOINT", CopilotConfig.api_endpoint),
+        rate_wait=float(os.getenv("COPILOT_RATE_WAIT", CopilotConfig.rate_wait)),
+        normalize_snippets=os.getenv("COPILOT_NORMALIZE", "false").lower() == "true",
+        batch_size=int(os.getenv("COPILOT_BATCH_SIZE", CopilotConfig.batch_size)),
         auth_token=os.getenv("COPILOT_TOKEN"),
         enabled=os.getenv("COPILOT_ENABLED", "true").lower() == "true"
     )
@@ -217,8 +259,9 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    copilot = CopilotFixer()
+    copilot = CopilotFixer(load_copilot_config())
     suggestion = copilot.get_suggestion(args.code, args.context)
+    copilot.close()
 
     print("AI Suggestion:")
     print(suggestion)
\ No newline at end of file
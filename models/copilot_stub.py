@@ -0,0 +1,247 @@
+"""
+Copilot Stand-in Server for CodePolice
+Local keep-alive HTTP server simulating Copilot latency and errors, plus a client benchmark
+
+Usage:
+    python -m models.copilot_stub serve --port 8765 --latency 0.05 --error-rate 0.1
+    python -m models.copilot_stub bench --snippets 500 --latency 0.05 --error-rate 0.05
+"""
+
+import ssl
+import json
+import random
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger("CopilotProxy")
+
+
+class StubCopilotServer:
+    """
+    Stand-in for the Copilot completion endpoint
+
+    Answers each request after `latency` seconds (plus up to `jitter`),
+    failing a fraction `error_rate` of them with 503. Accepts a single
+    prompt or a list of prompts and returns one choice per prompt, with
+    `chunked` in a chunked-encoded body. A `fault` breaks every response
+    in one of the ways listed in FAULTS. With an `ssl_context` it serves
+    HTTPS.
+    """
+
+    FAULTS = {
+        'garbage': "reply with a line that is not HTTP and hang up",
+        'bad_chunk': "send a chunked body with a chunk size that is not hex",
+        'bad_json': "answer 200 with a body that is not JSON",
+        'short': "answer 200 with a choice for the first prompt only",
+        'hang_up': "close each keep-alive connection right after answering",
+    }
+
+    def __init__(
+            self,
+            latency: float = 0.05,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            seed: Optional[int] = None,
+            chunked: bool = False,
+            fault: Optional[str] = None,
+            ssl_context: Optional[ssl.SSLContext] = None
+    ):
+        if fault is not None and fault not in self.FAULTS:
+            raise ValueError(f"Unknown fault: {fault}")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.chunked = chunked
+        self.fault = fault
+        self.ssl_context = ssl_context
+        self.requests = 0
+        self.prompts = 0
+        self.errors = 0
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.ssl_context is not None else "http"
+        return f"{scheme}://{self.host}:{self.port}/v1/completions"
+
+    async def start(self) -> str:
+        """Start listening; returns the endpoint URL"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, ssl=self.ssl_context)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Let handlers see their clients hang up rather than be cancelled at shutdown
+            if self._handlers:
+                await asyncio.wait(self._handlers, timeout=1)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._respond(body)
+                if self.fault == 'garbage':
+                    writer.write(b"garbage\r\n")
+                    await writer.drain()
+                    break
+                head = f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: application/json\r\n"
+                data = b"{not json" if self.fault == 'bad_json' else json.dumps(payload).encode()
+                writer.write(head.encode() + self._frame(data))
+                await writer.drain()
+                if self.fault == 'hang_up' or headers.get('connection', '').lower() == 'close':
+                    break
+        except (OSError, asyncio.IncompleteReadError):
+            # Client hung up, or a TLS handshake failed
+            pass
+        finally:
+            writer.close()
+            self._handlers.discard(handler)
+
+    def _frame(self, data: bytes) -> bytes:
+        """Remaining headers and the body, chunked or with a Content-Length"""
+        if self.fault == 'bad_chunk':
+            return b"Transfer-Encoding: chunked\r\n\r\nzz\r\n" + data + b"\r\n0\r\n\r\n"
+        if not self.chunked:
+            return f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+        # Two chunks, so clients have to join them
+        half = len(data) // 2
+        chunks = b"".join(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n" for chunk in (data[:half], data[half:]) if chunk)
+        return b"Transfer-Encoding: chunked\r\n\r\n" + chunks + b"0\r\n\r\n"
+
+    async def _respond(self, body: bytes) -> tuple:
+        self.requests += 1
+        await asyncio.sleep(self.latency + self._random.uniform(0, self.jitter))
+        if self._random.random() < self.error_rate:
+            self.errors += 1
+            return 503, {"error": "simulated failure"}
+
+        try:
+            prompt = json.loads(body).get("prompt", "")
+        except (ValueError, AttributeError):
+            return 400, {"error": "invalid JSON"}
+        prompts = prompt if isinstance(prompt, list) else [prompt]
+        self.prompts += len(prompts)
+        if self.fault == 'short':
+            prompts = prompts[:1]
+        # Echo the first code line of each prompt, so callers can see what was asked
+        return 200, {"choices": [
+            {"index": index, "text": f"# stub suggestion\n{(text.split(chr(10)) + ['', ''])[1]}"}
+            for index, text in enumerate(prompts)
+        ]}
+
+
+async def run_benchmark(
+        snippets: int = 200,
+        distinct: int = 150,
+        latency: float = 0.05,
+        error_rate: float = 0.0,
+        concurrency: int = 8,
+        batch_size: int = 8
+) -> Dict[str, float]:
+    """
+    Drive AsyncCopilotClient against a local stub server
+    Args:
+        snippets: Number of suggestions requested
+        distinct: Number of distinct snippets among them (the rest coalesce)
+    Returns:
+        Client metrics with the server's request and connection counts
+    """
+    from models.copilot_async import AsyncCopilotClient
+    from models.copilot_proxy import CopilotConfig, CopilotFixer
+
+    server = StubCopilotServer(latency=latency, error_rate=error_rate, seed=0)
+    url = await server.start()
+    config = CopilotConfig(api_endpoint=url, auth_token="stub", rate_limit=10 ** 9)
+    # Build prompts and fallbacks like the real fixer, without touching its cache
+    fixer = CopilotFixer.__new__(CopilotFixer)
+    try:
+        async with AsyncCopilotClient(
+                config,
+                build_prompt=fixer._build_prompt,
+                fallback=fixer._fallback_suggestion,
+                concurrency=concurrency,
+                batch_size=batch_size
+        ) as client:
+            await client.suggest_many([f"x_{i % distinct} = eval(data)" for i in range(snippets)])
+        metrics = client.metrics()
+    finally:
+        await server.stop()
+    metrics['server_requests'] = server.requests
+    metrics['server_connections'] = server.connections
+    return metrics
+
+
+def main() -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Copilot stand-in server")
+    parser.add_argument('mode', choices=['serve', 'bench'])
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random seconds per request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--chunked', action='store_true', help='serve: send chunked response bodies')
+    parser.add_argument('--fault', choices=sorted(StubCopilotServer.FAULTS), help='serve: break every response')
+    parser.add_argument('--snippets', type=int, default=200, help='bench: suggestions to request')
+    parser.add_argument('--distinct', type=int, default=150, help='bench: distinct snippets')
+    parser.add_argument('--concurrency', type=int, default=8, help='bench: requests in flight')
+    parser.add_argument('--batch-size', type=int, default=8, help='bench: prompts per request')
+    args = parser.parse_args()
+
+    if args.mode == 'serve':
+        server = StubCopilotServer(
+            args.latency, args.jitter, args.error_rate, args.host, args.port, chunked=args.chunked, fault=args.fault
+        )
+
+        async def serve() -> None:
+            print(f"Serving Copilot stand-in at {await server.start()}")
+            await asyncio.Event().wait()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    metrics = asyncio.run(run_benchmark(
+        args.snippets, args.distinct, args.latency, args.error_rate, args.concurrency, args.batch_size
+    ))
+    print(f"Suggestions:   {metrics['suggestions']} ({metrics['coalesced']} coalesced)")
+    print(f"Requests:      {metrics['requests']} ({metrics['failed_requests']} failed) "
+          f"over {metrics['server_connections']} connections")
+    print(f"Throughput:    {metrics['requests_per_second']:.1f} req/s, "
+          f"{metrics['suggestions_per_second']:.1f} suggestions/s")
+    print(f"Latency:       p50 {metrics['latency_p50'] * 1000:.1f}ms, "
+          f"p95 {metrics['latency_p95'] * 1000:.1f}ms, max {metrics['latency_max'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.ERROR)
+    main()
@@ -0,0 +1,178 @@
+"""
+Rate Limiter for CodePolice
+Token buckets for Copilot requests, per process or shared through a locked file
+"""
+
+import os
+import time
+import struct
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+
+# Optional dependencies
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger("CopilotProxy")
+
+_STATE = struct.Struct("dd")  # tokens, last refill (wall clock)
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` tokens per second, holding at most `burst`
+
+    Every operation is O(1). try_acquire() never waits; acquire() and
+    acquire_async() wait for tokens until an optional deadline (a
+    time.monotonic() value) and give up early if it cannot be met.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        if rate <= 0 or burst < 1:
+            raise RuntimeError(f"Invalid rate limit: rate={rate}, burst={burst}")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+
+    def _take(self, tokens: float) -> float:
+        """
+        Take tokens if available
+        Returns:
+            0.0 if taken, otherwise seconds until enough tokens accumulate
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def _check(self, tokens: float) -> None:
+        if tokens > self.burst:
+            raise RuntimeError(f"Cannot acquire {tokens} tokens from a bucket of {self.burst}")
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Take tokens without waiting"""
+        self._check(tokens)
+        return self._take(tokens) == 0.0
+
+    def allow_request(self) -> bool:
+        """Check if request is allowed based on rate limit"""
+        return self.try_acquire()
+
+    def acquire(self, tokens: float = 1, deadline: Optional[float] = None) -> bool:
+        """Block until tokens are taken; False if that would pass the deadline"""
+        self._check(tokens)
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1, deadline: Optional[float] = None) -> bool:
+        """acquire() for event loops: waits without blocking other tasks"""
+        self._check(tokens)
+        while True:
+            wait = self._take(tokens)
+            if wait == 0.0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    def close(self) -> None:
+        pass
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a small file shared by all processes
+
+    Each take locks the file with flock, updates 16 bytes of state in place
+    and unlocks, so any number of workers and CLI invocations draw from one
+    global budget without routing requests through a single process.
+    """
+
+    def __init__(self, path: Path, rate: float, burst: float):
+        super().__init__(rate, burst)
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+        self._shared = True
+
+    def _descriptor(self) -> int:
+        # Reopen in forked children so each process holds its own lock
+        if self._fd is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _take(self, tokens: float) -> float:
+        if not self._shared:
+            return super()._take(tokens)
+        try:
+            fd = self._descriptor()
+        except OSError as e:
+            logger.warning(f"Shared rate limit unavailable, limiting per process: {e}")
+            self._shared = False
+            return super()._take(tokens)
+
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            data = os.pread(fd, _STATE.size, 0)
+            now = time.time()
+            if len(data) == _STATE.size:
+                stored, last = _STATE.unpack(data)
+                # A clock stepped backwards must not mint tokens
+                available = min(self.burst, stored + max(0.0, now - last) * self.rate)
+            else:
+                available = float(self.burst)
+
+            if available >= tokens:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - available) / self.rate
+            os.pwrite(fd, _STATE.pack(available, now), 0)
+            return wait
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        if self._fd is not None and self._pid == os.getpid():
+            os.close(self._fd)
+        self._fd = None
+
+
+def create_rate_limiter(
+        requests_per_minute: float,
+        burst: float,
+        state_file: Optional[Path] = None
+) -> TokenBucket:
+    """
+    Rate limiter for Copilot requests
+    Args:
+        requests_per_minute: Sustained request rate
+        burst: Requests allowed back to back after an idle period
+        state_file: Share the budget across processes through this file
+    Returns:
+        SharedTokenBucket when state_file is given and file locking is available,
+        otherwise a per-process TokenBucket
+    """
+    rate = requests_per_minute / 60.0
+    if state_file is not None:
+        if FCNTL_AVAILABLE:
+            return SharedTokenBucket(state_file, rate, burst)
+        logger.warning("File locking not available - rate limit applies per process")
+    return TokenBucket(rate, burst)
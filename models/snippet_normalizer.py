@@ -0,0 +1,119 @@
+"""
+Snippet Normalizer for CodePolice
+Canonical forms of code snippets, so equivalent issues share one Copilot suggestion
+"""
+
+import io
+import re
+import keyword
+import builtins
+import hashlib
+import textwrap
+import tokenize
+from typing import Dict, List, Optional, Tuple
+
+# Names that carry meaning and are never renamed
+_KEEP = frozenset(keyword.kwlist) | frozenset(getattr(keyword, 'softkwlist', ())) | frozenset(dir(builtins))
+
+_PLACEHOLDER = re.compile(r"\b_[vsn]\d+_\b")
+
+_SKIPPED = (tokenize.COMMENT, tokenize.NL, tokenize.ENCODING)
+
+
+class NormalizedSnippet:
+    """
+    Canonical snippet plus the placeholder mapping needed to undo it
+
+    Comments and layout are dropped, indentation is rebuilt at four spaces
+    per level, and local identifiers, strings and numbers become numbered
+    placeholders (_v1_, _s1_, _n1_) in order of first appearance.
+    """
+
+    __slots__ = ('canonical', 'mapping')
+
+    def __init__(self, canonical: str, mapping: Dict[str, str]):
+        self.canonical = canonical
+        self.mapping = mapping
+
+    def key(self, rule: Optional[str] = None, extra: str = "") -> str:
+        """Cache key: equivalent snippets flagged by the same rule share it"""
+        return hashlib.sha256(f"{rule or ''}\0{self.canonical}\0{extra}".encode()).hexdigest()
+
+    def restore(self, text: str) -> str:
+        """Substitute this snippet's identifiers and literals back into a canonical-space text"""
+        return _PLACEHOLDER.sub(lambda match: self.mapping.get(match.group(0), match.group(0)), text)
+
+
+def _tokens(snippet: str) -> Optional[List[tokenize.TokenInfo]]:
+    for text in (snippet, textwrap.dedent(snippet)):
+        try:
+            return [
+                token for token in tokenize.generate_tokens(io.StringIO(text).readline)
+                if token.type not in _SKIPPED
+            ]
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            continue
+    return None
+
+
+def normalize_snippet(snippet: str) -> Optional[NormalizedSnippet]:
+    """
+    Canonicalize a snippet
+    Args:
+        snippet: Source text an issue points at
+    Returns:
+        NormalizedSnippet, or None if the snippet cannot be tokenized
+    """
+    tokens = _tokens(snippet)
+    if tokens is None:
+        return None
+
+    placeholders: Dict[Tuple[str, str], str] = {}
+    mapping: Dict[str, str] = {}
+    counts = {'v': 0, 's': 0, 'n': 0}
+
+    def placeholder(kind: str, original: str) -> str:
+        name = placeholders.get((kind, original))
+        if name is None:
+            counts[kind] += 1
+            name = f"_{kind}{counts[kind]}_"
+            placeholders[(kind, original)] = name
+            mapping[name] = original
+        return name
+
+    lines: List[Tuple[int, str]] = []
+    line: List[str] = []
+    depth = line_depth = 0
+    for index, token in enumerate(tokens):
+        if token.type == tokenize.INDENT:
+            depth += 1
+            continue
+        if token.type == tokenize.DEDENT:
+            depth -= 1
+            continue
+        if token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            if line:
+                lines.append((line_depth, " ".join(line)))
+                line = []
+            continue
+
+        text = token.string
+        if token.type == tokenize.NAME and text not in _KEEP:
+            # Attribute names and the objects they hang off stay, so os.system is not os.getenv
+            before = tokens[index - 1].string if index else ""
+            after = tokens[index + 1].string if index + 1 < len(tokens) else ""
+            if before != "." and after != ".":
+                text = placeholder('v', text)
+        elif token.type == tokenize.STRING:
+            text = placeholder('s', text)
+        elif token.type == tokenize.NUMBER:
+            text = placeholder('n', text)
+
+        if not line:
+            line_depth = depth
+        line.append(text)
+
+    # A snippet cut from a nested block is the same code at top level
+    base = min((line_depth for line_depth, _ in lines), default=0)
+    canonical = "\n".join("    " * (line_depth - base) + text for line_depth, text in lines)
+    return NormalizedSnippet(canonical, mapping)
@@ -0,0 +1,192 @@
+"""
+Suggestion Cache for CodePolice
+Single-file SQLite store for Copilot responses with an in-memory LRU front
+"""
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger("CopilotProxy")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestions (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS suggestions_accessed ON suggestions (accessed);
+"""
+
+
+class SuggestionCache:
+    """
+    Persistent suggestion cache shared by all CodePolice processes
+
+    Reads hit an in-memory LRU first and fall back to one indexed SQLite
+    file (WAL mode, so concurrent readers never block on a writer). Writes
+    and access-time updates are buffered and committed in batches, after
+    which expired entries are dropped and the store is trimmed to
+    max_entries by least recent access.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Path,
+            ttl: float = 86400,
+            max_entries: int = 100000,
+            memory_entries: int = 1024,
+            batch_size: int = 64
+    ):
+        self.path = Path(cache_dir) / "suggestions.sqlite"
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.batch_size = batch_size
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._pending: List[Tuple[str, str, float, float]] = []
+        self._touched: List[Tuple[float, str]] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._disabled = False
+        atexit.register(self.close)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Open the database on first use (and again in a forked child)"""
+        if self._disabled:
+            return None
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Opened on the Copilot event-loop thread but flushed on exit from
+            # the main thread; callers never use the cache concurrently
+            conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Suggestion cache disabled: {e}")
+            self._disabled = True
+            return None
+
+        # A connection inherited through fork must not be used by the child
+        self._conn, self._pid = conn, os.getpid()
+        self._migrate_legacy_files()
+        return conn
+
+    def _migrate_legacy_files(self) -> None:
+        """Import and remove the one-JSON-file-per-snippet cache of older versions"""
+        legacy = list(self.path.parent.glob("*.json"))
+        if not legacy:
+            return
+
+        rows = []
+        for cache_file in legacy:
+            try:
+                with open(cache_file, 'r') as f:
+                    data = json.load(f)
+                timestamp = float(data.get("timestamp", 0))
+                if time.time() - timestamp < self.ttl and data.get("response"):
+                    rows.append((cache_file.stem, data["response"], timestamp, timestamp))
+                cache_file.unlink()
+            except (OSError, ValueError, AttributeError):
+                continue
+        self._write(rows, [])
+        logger.info(f"Migrated {len(rows)} cached suggestions into {self.path}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response, or None"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, created = entry
+            if now - created < self.ttl:
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                return response
+            del self._memory[key]
+
+        for pending_key, response, created, _ in reversed(self._pending):
+            if pending_key == key:
+                return response
+
+        conn = self._connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT response, created FROM suggestions WHERE key = ? AND created > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache load error: {e}")
+            return None
+
+        if row is None:
+            return None
+        self._remember(key, row[0], row[1])
+        self._touch(key, now)
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """Store a response; it is written with the next batch"""
+        now = time.time()
+        self._remember(key, response, now)
+        self._pending.append((key, response, now, now))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def _remember(self, key: str, response: str, created: float) -> None:
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key: str, now: float) -> None:
+        self._touched.append((now, key))
+        if len(self._touched) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit buffered writes and evict expired or excess entries"""
+        if not self._pending and not self._touched:
+            return
+        pending, touched = self._pending, self._touched
+        self._pending, self._touched = [], []
+        self._write(pending, touched)
+
+    def _write(self, rows: List[Tuple[str, str, float, float]], touched: List[Tuple[float, str]]) -> None:
+        conn = self._connection()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO suggestions (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                conn.executemany("UPDATE suggestions SET accessed = ? WHERE key = ?", touched)
+                conn.execute("DELETE FROM suggestions WHERE created <= ?", (time.time() - self.ttl,))
+                conn.execute(
+                    "DELETE FROM suggestions WHERE key IN ("
+                    "SELECT key FROM suggestions ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Cache save error: {e}")
+
+    def close(self) -> None:
+        """Flush and close the database"""
+        self.flush()
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
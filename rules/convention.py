@@ -3,10 +3,13 @@ Coding Convention Rules Module
 Enforces PEP8 and project-specific style guidelines
 """
 
+import re
 import libcst as cst
 from libcst import matchers as m
-from typing import List, Dict, Any
-from core.rule_engine import RuleBase
+from libcst.helpers import get_full_name_for_node
+from typing import List
+from core.issue import Issue
+from core.rule_engine import RuleBase, RuleContext
 
 
 class NamingConventionRule(RuleBase):
@@ -14,58 +17,44 @@ class NamingConventionRule(RuleBase):
     Enforces snake_case naming for functions and variables
     """
 
+    rule_id = 'naming_convention'
+    node_types = (cst.Assign, cst.FunctionDef)
+
     def __init__(self):
         self.snake_case_pattern = r'^[a-z_][a-z0-9_]*$'
         self.camel_case_pattern = r'^[A-Z][a-zA-Z0-9]*$'
 
-    def apply(self, node: cst.Module) -> List[Dict[str, Any]]:
-        issues = []
-
         # Match variable and function definitions
-        var_matcher = m.Assign(
+        self.var_matcher = m.Assign(
             targets=[m.AssignTarget(target=m.Name())]
         ) & m.MatchIfTrue(lambda n: not self._is_snake_case(n.targets[0].target.value))
 
-        func_matcher = m.FunctionDef(
+        self.func_matcher = m.FunctionDef(
             name=m.Name()
         ) & m.MatchIfTrue(lambda n: not self._is_snake_case(n.name.value))
 
+    def visit(self, node: cst.CSTNode, context: RuleContext) -> List[Issue]:
         # Check variables
-        for match in m.findall(node, var_matcher):
-            issues.append({
-                'rule': 'naming_convention',
-                'message': f"Variable name '{match.targets[0].target.value}' should be snake_case",
-                'line': match.lineno,
-                'column': match.col_offset,
-                'severity': 'warning',
-                'fix_type': 'rename',
-                'suggestion': self._to_snake_case(match.targets[0].target.value),
-                'node': match
-            })
-
+        if isinstance(node, cst.Assign) and m.matches(node, self.var_matcher):
+            kind, name = "Variable", node.targets[0].target.value
         # Check functions
-        for match in m.findall(node, func_matcher):
-            issues.append({
-                'rule': 'naming_convention',
-                'message': f"Function name '{match.name.value}' should be snake_case",
-                'line': match.lineno,
-                'column': match.col_offset,
-                'severity': 'warning',
-                'fix_type': 'rename',
-                'suggestion': self._to_snake_case(match.name.value),
-                'node': match
-            })
+        elif isinstance(node, cst.FunctionDef) and m.matches(node, self.func_matcher):
+            kind, name = "Function", node.name.value
+        else:
+            return []
 
-        return issues
+        return [context.issue(
+            self, node, f"{kind} name '{name}' should be snake_case",
+            fix_type='rename',
+            suggestion=self._to_snake_case(name)
+        )]
 
     def _is_snake_case(self, name: str) -> bool:
         """Check if name follows snake_case convention"""
-        import re
         return bool(re.match(self.snake_case_pattern, name))
 
     def _to_snake_case(self, name: str) -> str:
         """Convert camelCase/PascalCase to snake_case"""
-        import re
         return re.sub(r'(?<!^)(?=[A-Z])', '_', name).lower()
 
 
@@ -74,42 +63,48 @@ class UnusedImportRule(RuleBase):
     Detects unused imports in Python modules
     """
 
-    def apply(self, node: cst.Module) -> List[Dict[str, Any]]:
-        issues = []
+    rule_id = 'unused_import'
+    node_types = (cst.Import, cst.ImportFrom, cst.Name)
+    required_literals = (b'import',)
+    whole_file = True  # A usage anywhere in the file keeps an import alive
 
+    def begin_module(self, context: RuleContext) -> None:
         # Track all imports and their usage
-        imports = {}
-        used_names = set()
-
-        # First collect all imports
-        for imp in m.findall(node, m.Import() | m.ImportFrom()):
-            if m.matches(imp, m.Import()):
-                for name in imp.names:
-                    alias = name.asname.name.value if name.asname else name.name.value
-                    imports[alias] = imp
+        self.imports = {}
+        self.used_names = set()
+        self.import_name_ids = set()
+
+    def visit(self, node: cst.CSTNode, context: RuleContext) -> List[Issue]:
+        if isinstance(node, cst.Name):
+            # Names inside the import statement itself are not usages
+            if id(node) not in self.import_name_ids:
+                self.used_names.add(node.value)
+            return []
+
+        self.import_name_ids.update(id(n) for n in m.findall(node, m.Name()))
+        if isinstance(node.names, cst.ImportStar):
+            return []
+
+        for name in node.names:
+            if name.asname:
+                alias = name.asname.name.value
+            elif isinstance(node, cst.Import):
+                alias = get_full_name_for_node(name.name).split('.')[0]
             else:
-                module = imp.module.value if imp.module else ""
-                for name in imp.names:
-                    full_name = f"{module}.{name.name.value}"
-                    alias = name.asname.name.value if name.asname else name.name.value
-                    imports[alias] = imp
+                alias = name.name.value
+            self.imports[alias] = node
+        return []
 
-        # Then collect all used names
-        for name_node in m.findall(node, m.Name()):
-            used_names.add(name_node.value)
+    def leave_module(self, context: RuleContext) -> List[Issue]:
+        issues = []
 
         # Find unused imports
-        for alias, imp in imports.items():
-            if alias not in used_names:
-                issues.append({
-                    'rule': 'unused_import',
-                    'message': f"Unused import: {alias}",
-                    'line': imp.lineno,
-                    'column': imp.col_offset,
-                    'severity': 'warning',
-                    'fix_type': 'remove',
-                    'suggestion': "Remove this unused import",
-                    'node': imp
-                })
-
-        return issues
\ No newline at end of file
+        for alias, imp in self.imports.items():
+            if alias not in self.used_names:
+                issues.append(context.issue(
+                    self, imp, f"Unused import: {alias}",
+                    fix_type='remove',
+                    suggestion="Remove this unused import"
+                ))
+
+        return issues
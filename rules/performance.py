@@ -5,8 +5,9 @@ Identifies inefficient code patterns in Python
 
 import libcst as cst
 from libcst import matchers as m
-from typing import List, Dict, Any
-from core.rule_engine import RuleBase
+from typing import List
+from core.issue import Issue
+from core.rule_engine import RuleBase, RuleContext
 
 
 class NestedListComprehensionRule(RuleBase):
@@ -15,44 +16,46 @@ class NestedListComprehensionRule(RuleBase):
     Example: [[x*y for x in range(10)] for y in range(10)]
     """
 
-    def __init__(self, max_depth=2):
-        self.max_depth = max_depth
-
-    def apply(self, node: cst.Module) -> List[Dict[str, Any]]:
-        issues = []
+    rule_id = 'nested_list_comprehension'
+    node_types = (cst.ListComp,)
+    required_literals = (b'for',)
 
-        # Match list comprehensions with nested structure
-        nested_list_matcher = m.ListComp(
-            for_in=m.Comprehension(
-                iter=m.Comprehension()
-            )
+    # Match list comprehensions with nested structure
+    nested_list_matcher = m.ListComp(
+        for_in=m.CompFor(
+            inner_for_in=m.CompFor()
         )
+    ) | m.ListComp(
+        elt=m.ListComp()
+    )
 
-        for match in m.findall(node, nested_list_matcher):
-            # Count nesting depth
-            depth = self._count_nesting(match)
+    def __init__(self, max_depth=2):
+        self.max_depth = max_depth
 
-            if depth > self.max_depth:
-                issues.append({
-                    'rule': 'nested_list_comprehension',
-                    'message': f"Nested list comprehension with depth {depth} (max allowed: {self.max_depth})",
-                    'line': match.lineno,
-                    'column': match.col_offset,
-                    'severity': 'warning',
-                    'fix_type': 'refactor',
-                    'suggestion': "Refactor into regular loops for better readability",
-                    'node': match
-                })
+    def visit(self, node: cst.CSTNode, context: RuleContext) -> List[Issue]:
+        if not m.matches(node, self.nested_list_matcher):
+            return []
 
-        return issues
+        # Count nesting depth
+        depth = self._count_nesting(node)
+        if depth <= self.max_depth:
+            return []
+
+        return [context.issue(
+            self, node, f"Nested list comprehension with depth {depth} (max allowed: {self.max_depth})",
+            fix_type='refactor',
+            suggestion="Refactor into regular loops for better readability"
+        )]
 
     def _count_nesting(self, node: cst.ListComp) -> int:
         """Calculate nesting depth of list comprehension"""
         count = 0
         current = node.for_in
-        while hasattr(current, 'iter') and isinstance(current.iter, cst.Comprehension):
+        while isinstance(current.inner_for_in, cst.CompFor):
             count += 1
-            current = current.iter
+            current = current.inner_for_in
+        if isinstance(node.elt, cst.ListComp):
+            count += self._count_nesting(node.elt)
         return count + 1
 
 
@@ -62,27 +65,26 @@ class RepeatedCalculationRule(RuleBase):
     Example: [expensive_func() for _ in range(100)]
     """
 
-    def apply(self, node: cst.Module) -> List[Dict[str, Any]]:
-        issues = []
-
-        # Match list comprehensions with function calls
-        repeated_call_matcher = m.ListComp(
-            element=m.Call()
-        )
-
-        for match in m.findall(node, repeated_call_matcher):
-            # Check if same function is called multiple times
-            func_name = getattr(match.element.func, 'value', None)
-            if func_name:
-                issues.append({
-                    'rule': 'repeated_calculation',
-                    'message': f"Repeated call to {func_name} in list comprehension",
-                    'line': match.lineno,
-                    'column': match.col_offset,
-                    'severity': 'warning',
-                    'fix_type': 'refactor',
-                    'suggestion': "Move the calculation outside the loop",
-                    'node': match
-                })
-
-        return issues
\ No newline at end of file
+    rule_id = 'repeated_calculation'
+    node_types = (cst.ListComp,)
+    required_literals = (b'for',)
+
+    # Match list comprehensions with function calls
+    repeated_call_matcher = m.ListComp(
+        elt=m.Call()
+    )
+
+    def visit(self, node: cst.CSTNode, context: RuleContext) -> List[Issue]:
+        if not m.matches(node, self.repeated_call_matcher):
+            return []
+
+        # Check if same function is called multiple times
+        func_name = getattr(node.elt.func, 'value', None)
+        if not func_name:
+            return []
+
+        return [context.issue(
+            self, node, f"Repeated call to {func_name} in list comprehension",
+            fix_type='refactor',
+            suggestion="Move the calculation outside the loop"
+        )]
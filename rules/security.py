@@ -5,8 +5,9 @@ Detects security vulnerabilities in Python code
 
 import libcst as cst
 from libcst import matchers as m
-from typing import List, Dict, Any
-from core.rule_engine import RuleBase
+from typing import List
+from core.issue import Issue
+from core.rule_engine import RuleBase, RuleContext
 
 
 class HardcodedSecretRule(RuleBase):
@@ -15,34 +16,32 @@ class HardcodedSecretRule(RuleBase):
     Example: password = "123456"
     """
 
+    rule_id = 'hardcoded_secret'
+    severity = 'error'
+    node_types = (cst.Assign,)
+
     def __init__(self):
         self.secrets_keywords = ['password', 'secret', 'token', 'key']
-
-    def apply(self, node: cst.Module) -> List[Dict[str, Any]]:
-        issues = []
+        self.required_literals = tuple(keyword.encode() for keyword in self.secrets_keywords)
 
         # Define matcher for assignment with string value
-        secret_matcher = m.Assign(
+        self.secret_matcher = m.Assign(
+            targets=[m.AssignTarget(target=m.Name()), m.ZeroOrMore()],
             value=m.SimpleString()
         ) & m.MatchIfTrue(lambda n: any(
-            keyword in getattr(n.targets[0].target, 'value', '').lower()
+            keyword in n.targets[0].target.value.lower()
             for keyword in self.secrets_keywords
         ))
 
-        # Find all matches in AST
-        for match in m.findall(node, secret_matcher):
-            issues.append({
-                'rule': 'hardcoded_secret',
-                'message': f"Hardcoded secret detected in {match.targets[0].target.value}",
-                'line': match.lineno,
-                'column': match.col_offset,
-                'severity': 'error',
-                'fix_type': 'replace',
-                'suggestion': 'Use environment variables instead (os.getenv)',
-                'node': match
-            })
+    def visit(self, node: cst.CSTNode, context: RuleContext) -> List[Issue]:
+        if not m.matches(node, self.secret_matcher):
+            return []
 
-        return issues
+        return [context.issue(
+            self, node, f"Hardcoded secret detected in {node.targets[0].target.value}",
+            fix_type='replace',
+            suggestion='Use environment variables instead (os.getenv)'
+        )]
 
 
 class UnsafeEvalRule(RuleBase):
@@ -51,24 +50,22 @@ class UnsafeEvalRule(RuleBase):
     Example: eval(input("Enter code: "))
     """
 
-    def apply(self, node: cst.Module) -> List[Dict[str, Any]]:
-        issues = []
+    rule_id = 'unsafe_eval'
+    severity = 'error'
+    node_types = (cst.Call,)
+    required_literals = (b'eval',)
 
-        # Match eval function calls
-        eval_matcher = m.Call(
-            func=m.Name("eval")
-        )
+    # Match eval function calls
+    eval_matcher = m.Call(
+        func=m.Name("eval")
+    )
 
-        for match in m.findall(node, eval_matcher):
-            issues.append({
-                'rule': 'unsafe_eval',
-                'message': "Potential code execution vulnerability through eval()",
-                'line': match.lineno,
-                'column': match.col_offset,
-                'severity': 'error',
-                'fix_type': 'remove',
-                'suggestion': "Replace with ast.literal_eval() or input validation",
-                'node': match
-            })
+    def visit(self, node: cst.CSTNode, context: RuleContext) -> List[Issue]:
+        if not m.matches(node, self.eval_matcher):
+            return []
 
-        return issues
\ No newline at end of file
+        return [context.issue(
+            self, node, "Potential code execution vulnerability through eval()",
+            fix_type='remove',
+            suggestion="Replace with ast.literal_eval() or input validation"
+        )]
@@ -0,0 +1,133 @@
+"""
+Behavior tests for atomic file writes and all-or-nothing fix transactions
+
+Run with: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import stat
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.atomic_write import FixTransaction, atomic_write, encode_like, stage_file
+
+
+class AtomicWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_encode_like_keeps_line_endings_and_encoding(self):
+        self.assertEqual(encode_like("a\nb\n", b"x\r\ny\r\n"), b"a\r\nb\r\n")
+        self.assertEqual(encode_like("\ufeffa\n", b"\xef\xbb\xbfx\n"), b"\xef\xbb\xbfa\n")
+        latin = "# -*- coding: latin-1 -*-\nname = 'café'\n"
+        self.assertEqual(encode_like(latin, latin.encode('latin-1')), latin.encode('latin-1'))
+
+    def test_atomic_write_keeps_mode_and_leaves_no_temp_files(self):
+        path = self.root / "a.py"
+        path.write_text("old\n")
+        os.chmod(path, 0o640)
+        atomic_write(str(path), "new\n")
+        self.assertEqual(path.read_text(), "new\n")
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o640)
+        self.assertEqual(os.listdir(self.root), ["a.py"])
+
+    def test_atomic_write_follows_symlinks(self):
+        target = self.root / "target.py"
+        target.write_text("old\n")
+        link = self.root / "link.py"
+        os.symlink(target, link)
+        atomic_write(str(link), "new\n")
+        self.assertTrue(link.is_symlink())
+        self.assertEqual(target.read_text(), "new\n")
+
+
+class FixTransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.paths = []
+        for name in ("a.py", "b.py", "c.py"):
+            path = self.root / name
+            path.write_text(f"old {name}\n")
+            self.paths.append(path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def stage_all(self) -> FixTransaction:
+        transaction = FixTransaction()
+        for path in self.paths:
+            transaction.add(str(path), stage_file(str(path), f"new {path.name}\n"))
+        return transaction
+
+    def contents(self):
+        return [path.read_text() for path in self.paths]
+
+    def test_commit_replaces_every_file(self):
+        self.stage_all().commit()
+        self.assertEqual(self.contents(), ["new a.py\n", "new b.py\n", "new c.py\n"])
+        self.assertEqual(sorted(os.listdir(self.root)), ["a.py", "b.py", "c.py"])
+
+    def test_abort_changes_nothing(self):
+        self.stage_all().abort()
+        self.assertEqual(self.contents(), ["old a.py\n", "old b.py\n", "old c.py\n"])
+        self.assertEqual(sorted(os.listdir(self.root)), ["a.py", "b.py", "c.py"])
+
+    def test_failure_part_way_rolls_back_replaced_files(self):
+        transaction = self.stage_all()
+        # The last file cannot be replaced once the first two have been
+        os.unlink(transaction.staged[-1][1])
+        with self.assertRaises(RuntimeError):
+            transaction.commit()
+        self.assertEqual(self.contents(), ["old a.py\n", "old b.py\n", "old c.py\n"])
+        self.assertEqual(sorted(os.listdir(self.root)), ["a.py", "b.py", "c.py"])
+
+
+class TransactionalFixCommandTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "fixable.py").write_text("import os\nx = 1\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def fix(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(ROOT / "cli.py"), "fix", ".", "--no-git", "--jobs", "1", *args],
+            cwd=self.root, capture_output=True, text=True, timeout=120
+        )
+
+    def test_unparsable_file_aborts_the_transaction(self):
+        (self.root / "broken.py").write_text("def broken(:\n")
+        result = self.fix("--apply", "--transactional")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("no files were changed", result.stdout)
+        self.assertEqual((self.root / "fixable.py").read_text(), "import os\nx = 1\n")
+
+    def test_transaction_applies_when_every_file_fixes(self):
+        result = self.fix("--apply", "--transactional")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual((self.root / "fixable.py").read_text(), "x = 1\n")
+
+    def test_transactional_requires_apply(self):
+        result = self.fix("--transactional")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--transactional requires --apply", result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Behavior tests for the content-addressed result cache and the file-state index
+
+Run with: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import itertools
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.cache import RACY_WINDOW_NS, FileStateIndex, ResultCache
+from core.issue import Issue
+
+
+def _issues(name: str):
+    return [Issue(name, 'error', f"{name} found", file=f"{name}.py", line=3, column=4, start_offset=10, end_offset=20)]
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_round_trip_drops_file_paths(self):
+        cache = ResultCache(self.cache_dir, "rules-a")
+        key = cache.key_for(b"x = eval(data)\n")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, _issues("unsafe_eval"))
+        cache.close()
+
+        cache = ResultCache(self.cache_dir, "rules-a")
+        cached = cache.get(cache.key_for(b"x = eval(data)\n"))
+        cache.close()
+        expected = _issues("unsafe_eval")
+        expected[0].file = None
+        self.assertEqual(cached, expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_fingerprints_sharing_a_directory_keep_their_entries(self):
+        content = b"x = 1\n"
+        for fingerprint in ("rules-a", "rules-b"):
+            cache = ResultCache(self.cache_dir, fingerprint)
+            cache.put(cache.key_for(content), _issues(fingerprint))
+            cache.close()
+
+        for fingerprint in ("rules-a", "rules-b"):
+            cache = ResultCache(self.cache_dir, fingerprint)
+            self.assertEqual(cache.get(cache.key_for(content))[0].rule, fingerprint)
+            cache.close()
+
+    def test_close_trims_least_recently_used_entries(self):
+        keys = []
+        with mock.patch('core.cache.time.time', side_effect=itertools.count(1000)):
+            cache = ResultCache(self.cache_dir, "rules", max_entries=3)
+            for index in range(3):
+                keys.append(cache.key_for(f"x = {index}\n".encode()))
+                cache.put(keys[-1], [])
+            cache.close()
+
+        # A later run uses the oldest entry, then stores a fourth one
+        with mock.patch('core.cache.time.time', return_value=2000):
+            cache = ResultCache(self.cache_dir, "rules", max_entries=3)
+            self.assertEqual(cache.get(keys[0]), [])
+            keys.append(cache.key_for(b"x = 3\n"))
+            cache.put(keys[-1], [])
+            cache.close()
+
+        cache = ResultCache(self.cache_dir, "rules")
+        kept = [key for key in keys if cache.get(key) is not None]
+        cache.close()
+        self.assertEqual(kept, [keys[0], keys[2], keys[3]])
+
+    def test_unusable_directory_disables_the_cache(self):
+        blocker = self.cache_dir / "file"
+        blocker.write_text("")
+        with self.assertLogs("CodePoliceCache", "WARNING"):
+            cache = ResultCache(blocker / "cache", "rules")
+        cache.put("key", [])
+        self.assertIsNone(cache.get("key"))
+        cache.close()
+
+
+class FileStateIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.cache_dir = self.root / "cache"
+        self.path = self.root / "a.py"
+        self.path.write_text("x = eval(data)\n")
+        # Pretend the file was last modified long before it was indexed
+        os.utime(self.path, ns=(10 ** 18, 10 ** 18))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def record(self, checked_ns: int, fingerprint: str = "rules") -> None:
+        index = FileStateIndex(self.cache_dir, fingerprint)
+        with mock.patch('core.cache.time.time_ns', return_value=checked_ns):
+            index.put(str(self.path), os.stat(self.path), "digest-a", _issues("unsafe_eval"))
+        index.close()
+
+    def test_unchanged_stat_skips_reading(self):
+        self.record(10 ** 18 + RACY_WINDOW_NS)
+        index = FileStateIndex(self.cache_dir, "rules")
+        self.assertEqual(index.lookup_stat(str(self.path), os.stat(self.path))[0].rule, "unsafe_eval")
+        index.close()
+        self.assertEqual(index.stat_hits, 1)
+
+    def test_racy_entry_falls_back_to_the_digest(self):
+        # Recorded within the racy window: a same-size write in the same tick would keep the stat data
+        self.record(10 ** 18 + RACY_WINDOW_NS - 1)
+        index = FileStateIndex(self.cache_dir, "rules")
+        self.assertIsNone(index.lookup_stat(str(self.path), os.stat(self.path)))
+        self.assertIsNone(index.lookup_digest(str(self.path), "digest-b"))
+        self.assertEqual(index.lookup_digest(str(self.path), "digest-a")[0].rule, "unsafe_eval")
+        index.close()
+        self.assertEqual((index.stat_hits, index.hash_hits, index.misses), (0, 1, 1))
+
+    def test_changed_stat_is_not_trusted(self):
+        self.record(10 ** 18 + RACY_WINDOW_NS)
+        self.path.write_text("x = eval(data)  # edited\n")
+        os.utime(self.path, ns=(10 ** 18, 10 ** 18))
+        index = FileStateIndex(self.cache_dir, "rules")
+        self.assertIsNone(index.lookup_stat(str(self.path), os.stat(self.path)))
+        index.close()
+
+    def test_new_fingerprint_forgets_everything(self):
+        self.record(10 ** 18 + RACY_WINDOW_NS)
+        index = FileStateIndex(self.cache_dir, "other-rules")
+        self.assertIsNone(index.lookup_stat(str(self.path), os.stat(self.path)))
+        self.assertIsNone(index.lookup_digest(str(self.path), "digest-a"))
+        index.close()
+
+    def test_prune_forgets_unseen_files_under_root_only(self):
+        outside = self.root.parent / f"{self.root.name}-outside.py"
+        self.record(10 ** 18 + RACY_WINDOW_NS)
+        index = FileStateIndex(self.cache_dir, "rules")
+        index.put(str(outside), os.stat(self.path), "digest-o", [])
+        index.put(str(self.root / "b.py"), os.stat(self.path), "digest-b", [])
+        index.prune(str(self.root), [str(self.root / "b.py")])
+        self.assertIsNone(index.lookup_digest(str(self.path), "digest-a"))
+        self.assertEqual(index.lookup_digest(str(self.root / "b.py"), "digest-b"), [])
+        self.assertEqual(index.lookup_digest(str(outside), "digest-o"), [])
+        index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
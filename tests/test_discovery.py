@@ -0,0 +1,132 @@
+"""
+Behavior tests for file discovery and ignore-file semantics
+
+Run with: python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.discovery import FileDiscovery, IgnoreFile, IgnoreRules
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+        cwd=root, check=True, capture_output=True
+    )
+
+
+class IgnoreFileTest(unittest.TestCase):
+
+    def test_gitignore_semantics(self):
+        ignore = IgnoreFile([
+            "# comment",
+            "*.gen.py",
+            "!keep.gen.py",
+            "out/",
+            "/top.py",
+            "docs/**/*.py",
+        ])
+        self.assertTrue(ignore.match("a/b/x.gen.py", False))
+        self.assertFalse(ignore.match("a/keep.gen.py", False))
+        self.assertTrue(ignore.match("a/out", True))
+        # Directory-only patterns never match files
+        self.assertIsNone(ignore.match("a/out", False))
+        self.assertTrue(ignore.match("top.py", False))
+        # Anchored patterns only match beside the ignore file
+        self.assertIsNone(ignore.match("a/top.py", False))
+        self.assertTrue(ignore.match("docs/x.py", False))
+        self.assertTrue(ignore.match("docs/a/b/x.py", False))
+        self.assertIsNone(ignore.match("src/x.py", False))
+
+
+class _DiscoveryCase(unittest.TestCase):
+    """Temporary tree helpers"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name).resolve()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, relative: str, text: str = "x = 1\n") -> Path:
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+        return path
+
+    def discover(self, *paths: Path, use_git: bool = True):
+        return sorted(path.relative_to(self.root).as_posix() for path in FileDiscovery(paths, use_git=use_git))
+
+
+class WalkDiscoveryTest(_DiscoveryCase):
+
+    def test_walk_honors_ignore_files_and_default_exclusions(self):
+        self.write("pkg/a.py")
+        self.write("pkg/skip.py")
+        self.write("pkg/deep/nested/b.py")
+        self.write("build/lib/c.py")
+        self.write("__pycache__/d.py")
+        self.write("env/pyvenv.cfg", "")
+        self.write("env/lib/e.py")
+        self.write("notes.txt")
+        self.write(".gitignore", "skip.py\n")
+        self.write("pkg/deep/.codepoliceignore", "nested/\n")
+        self.assertEqual(self.discover(self.root, use_git=False), ["pkg/a.py"])
+
+    def test_named_files_are_always_yielded(self):
+        self.write(".gitignore", "*.py\n")
+        path = self.write("ignored.py")
+        self.assertEqual(self.discover(path, use_git=False), ["ignored.py"])
+
+    def test_files_reached_twice_are_yielded_once(self):
+        self.write("pkg/a.py")
+        os.symlink(self.root / "pkg" / "a.py", self.root / "pkg" / "link.py")
+        self.assertEqual(self.discover(self.root, self.root / "pkg", use_git=False), ["pkg/a.py"])
+
+
+@unittest.skipUnless(shutil.which('git'), "git is not installed")
+class GitDiscoveryTest(_DiscoveryCase):
+    """Git-backed discovery: git applies .gitignore, .codepoliceignore applies to everything"""
+
+    def setUp(self):
+        super().setUp()
+        _git(self.root, 'init', '-q')
+        self.write(".gitignore", "gen/\n")
+        self.write("gen/tracked.py")
+        self.write("gen/untracked.py")
+        self.write("src/a.py")
+        self.write("build/b.py")
+        _git(self.root, 'add', '.gitignore', 'src/a.py', 'build/b.py')
+        _git(self.root, 'add', '-f', 'gen/tracked.py')
+        _git(self.root, 'commit', '-q', '-m', 'init')
+
+    def test_tracked_files_under_gitignored_directories_are_listed(self):
+        self.write("src/new.py")
+        self.assertEqual(
+            self.discover(self.root),
+            ["build/b.py", "gen/tracked.py", "src/a.py", "src/new.py"]
+        )
+
+    def test_codepoliceignore_excludes_tracked_files(self):
+        self.write(".codepoliceignore", "gen/\nbuild/\n")
+        self.assertEqual(self.discover(self.root), ["src/a.py"])
+
+    def test_git_rules_read_only_codepoliceignore(self):
+        rules = IgnoreRules.for_git(self.root)
+        self.assertFalse(rules.is_ignored(self.root / "gen" / "tracked.py"))
+        self.write(".codepoliceignore", "tracked.py\n")
+        self.assertTrue(IgnoreRules.for_git(self.root).is_ignored(self.root / "gen" / "tracked.py"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Behavior tests for `codepolice fix --until-stable`
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+CLI = Path(__file__).resolve().parent.parent / "cli.py"
+sys.path.insert(0, str(CLI.parent))
+
+import libcst as cst
+from libcst import matchers as m
+
+import core.fixer
+from core.fixer import CodeFixer
+from core.rule_engine import RuleBase, RuleEngine
+from core.scanner import fix_file
+from rules.convention import UnusedImportRule
+
+# Removing the unused import frees `my_value`, which only then lets the
+# local `myValue` be renamed: a fix unlocked by the previous pass
+MULTI_PASS = (
+    "def load():\n"
+    "    import my_value\n"
+    "    myValue = 1\n"
+    "    return myValue\n"
+)
+
+
+class FixUntilStableTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.path = self.root / "sample.py"
+        self.path.write_text(MULTI_PASS)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def fix(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, str(CLI), "fix", self.path.name, "--no-git", "--jobs", "1", *args],
+            cwd=self.root, capture_output=True, text=True, timeout=120
+        )
+
+    def test_single_pass_stops_after_first_fix(self):
+        result = self.fix("--apply")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(self.path.read_text(), (
+            "def load():\n"
+            "    myValue = 1\n"
+            "    return myValue\n"
+        ))
+
+    def test_until_stable_applies_unlocked_fixes(self):
+        result = self.fix("--apply", "--until-stable")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(self.path.read_text(), (
+            "def load():\n"
+            "    my_value = 1\n"
+            "    return my_value\n"
+        ))
+
+    def test_until_stable_reports_combined_diff(self):
+        result = self.fix("--until-stable")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("-    import my_value\n", result.stdout)
+        self.assertIn("+    my_value = 1\n", result.stdout)
+        # Dry run leaves the file alone
+        self.assertEqual(self.path.read_text(), MULTI_PASS)
+
+    def test_max_passes_bounds_the_loop(self):
+        result = self.fix("--apply", "--until-stable", "--max-passes", "1")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertNotIn("my_value = 1", self.path.read_text())
+
+
+
+class AliasCaseRule(RuleBase):
+    """Synthetic rule: import aliases should be lowercase"""
+
+    rule_id = 'alias_case'
+    node_types = (cst.Import,)
+
+    def visit(self, node, context):
+        return [
+            context.issue(
+                self, alias.asname.name, f"Alias '{alias.asname.name.value}' should be lowercase",
+                fix_type='rename_alias', suggestion=f"{alias.asname.name.value.lower()}_mod"
+            )
+            for alias in node.names if alias.asname and not alias.asname.name.value.islower()
+        ]
+
+
+class AliasRenamingFixer(CodeFixer):
+    """Synthetic fixer whose renames rewrite a Name inside an import statement"""
+
+    def _plan_rename_alias(self, issue, plan):
+        old = issue.message.split("'")[1]
+        names = m.findall(self.module, m.Name(old))
+        plan.renames[(0, old)] = (issue.suggestion, [issue], names)
+
+
+class OverlappingEditsTest(unittest.TestCase):
+    """
+    Removing `os` claims the whole import statement, which holds the alias
+    the synthetic fixer renames: the lower-priority rename must be deferred
+    """
+
+    SOURCE = (
+        "import os, json as JSON\n"
+        "print(JSON.dumps(1))\n"
+    )
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "sample.py"
+        self.path.write_text(self.SOURCE)
+        self.engine = RuleEngine(rules=[UnusedImportRule(), AliasCaseRule()])
+        patcher = mock.patch.object(core.fixer, 'CodeFixer', AliasRenamingFixer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_overlapping_edit_is_deferred(self):
+        fixed_code, diff, deferred = fix_file(self.engine, str(self.path))
+        self.assertEqual(fixed_code, "import json as JSON\nprint(JSON.dumps(1))\n")
+        self.assertEqual([issue.rule for issue in deferred], ['alias_case'])
+
+    def test_until_stable_applies_the_deferred_edit(self):
+        fixed_code, diff, deferred = fix_file(self.engine, str(self.path), max_passes=10)
+        self.assertEqual(fixed_code, "import json as json_mod\nprint(json_mod.dumps(1))\n")
+        self.assertEqual(deferred, [])
+        self.assertIn("-import os, json as JSON\n", diff)
+
+
+if __name__ == "__main__":
+    unittest.main()
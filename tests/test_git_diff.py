@@ -0,0 +1,103 @@
+"""
+Behavior tests for diff-restricted checks (check --diff / --staged)
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import json
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from integrations.git_hook import _diff_path, changed_lines, diff_blobs
+
+
+def _git(root: Path, *args: str) -> str:
+    return subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+        cwd=root, check=True, capture_output=True, text=True
+    ).stdout
+
+
+class DiffPathTest(unittest.TestCase):
+
+    def test_plain_and_tab_terminated_names(self):
+        self.assertEqual(_diff_path(b"pkg/a.py"), b"pkg/a.py")
+        self.assertEqual(_diff_path(b"with space.py\t"), b"with space.py")
+        self.assertIsNone(_diff_path(b"/dev/null"))
+
+    def test_quoted_names(self):
+        self.assertEqual(_diff_path(b'"na\\303\\257ve.py"'), "naïve.py".encode())
+        self.assertEqual(_diff_path(b'"a \\"b\\".py"\t'), b'a "b".py')
+        self.assertEqual(_diff_path(b'"tab\\there.py"'), b"tab\there.py")
+
+
+@unittest.skipUnless(shutil.which('git'), "git is not installed")
+class ChangedLinesTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name).resolve()
+        _git(self.root, 'init', '-q')
+        self.write("m.py", "a = 1\n")
+        self.write("na ïve.py", "x = 1\n")
+        self.commit("A")
+        self.write("m.py", "a = 1\nb = eval(data)\n")
+        self.write("na ïve.py", "x = 1\ny = eval(data)\n")
+        self.commit("B")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, name: str, text: str) -> None:
+        (self.root / name).write_text(text)
+
+    def commit(self, message: str) -> None:
+        _git(self.root, 'add', '-A')
+        _git(self.root, 'commit', '-q', '-m', message)
+
+    def test_quoted_names_and_prefix_settings(self):
+        for setting in (None, 'diff.noprefix', 'diff.mnemonicPrefix'):
+            with self.subTest(setting=setting):
+                if setting:
+                    _git(self.root, 'config', setting, 'true')
+                lines = changed_lines(self.root, "HEAD~1..HEAD")
+                self.assertEqual(sorted(lines), ["m.py", "na ïve.py"])
+                self.assertTrue(lines["na ïve.py"].overlaps(2, 2))
+                self.assertFalse(lines["na ïve.py"].overlaps(1, 1))
+
+    def test_added_lines_that_look_like_headers(self):
+        self.write("m.py", "a = 1\nb = eval(data)\n++ not a header\n")
+        lines = changed_lines(self.root)
+        self.assertEqual(sorted(lines), ["m.py"])
+        self.assertTrue(lines["m.py"].overlaps(3, 3))
+
+    def test_new_side_blobs(self):
+        self.write("m.py", "# moved\n" * 3 + "a = 1\nb = eval(data)\n")
+        # A range between commits names blobs; a diff against the working tree does not
+        self.assertTrue(all(dict(diff_blobs(self.root, "HEAD~1..HEAD")).values()))
+        self.assertEqual(dict(diff_blobs(self.root, "HEAD")), {"m.py": None})
+
+    def test_range_checks_the_new_side_not_the_working_tree(self):
+        # Shift every line in the working tree; HEAD still has eval on line 2
+        self.write("m.py", "# moved\n" * 3 + "a = 1\nb = eval(data)\n")
+        result = subprocess.run(
+            [sys.executable, str(ROOT / "cli.py"), "check", "--diff", "HEAD~1..HEAD", "--format", "json"],
+            cwd=self.root, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 1, result.stderr)
+        issues = json.loads(result.stdout)
+        self.assertEqual(
+            sorted((issue['file'], issue['line']) for issue in issues if issue['rule'] == 'unsafe_eval'),
+            [("m.py", 2), ("na ïve.py", 2)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
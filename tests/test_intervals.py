@@ -0,0 +1,69 @@
+"""
+Behavior tests for interval sets and span indexes
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import random
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.intervals import IntervalSet, SpanIndex
+
+
+class IntervalSetTest(unittest.TestCase):
+
+    def test_overlapping_and_adjacent_intervals_merge(self):
+        intervals = IntervalSet([(10, 12), (1, 3), (4, 5), (2, 2), (20, 19)])
+        self.assertEqual(list(intervals), [(1, 5), (10, 12)])
+        self.assertEqual(len(intervals), 2)
+
+    def test_overlap_queries_at_the_edges(self):
+        intervals = IntervalSet([(3, 5), (10, 10)])
+        for start, end, expected in (
+                (1, 2, False), (1, 3, True), (5, 9, True), (6, 9, False),
+                (10, 10, True), (11, 40, False), (0, 100, True), (4, 4, True)
+        ):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(intervals.overlaps(start, end), expected)
+        self.assertIn(10, intervals)
+        self.assertNotIn(6, intervals)
+        self.assertFalse(IntervalSet().overlaps(1, 100))
+
+    def test_matches_brute_force(self):
+        generator = random.Random(7)
+        for _ in range(200):
+            ranges = [(start, start + generator.randint(-1, 4)) for start in generator.sample(range(50), 6)]
+            intervals = IntervalSet(ranges)
+            covered = {line for start, end in ranges for line in range(start, end + 1)}
+            start = generator.randint(0, 55)
+            end = start + generator.randint(0, 5)
+            self.assertEqual(intervals.overlaps(start, end), any(line in covered for line in range(start, end + 1)))
+
+
+class SpanIndexTest(unittest.TestCase):
+
+    def test_overlapping_nested_and_touching_spans(self):
+        spans = SpanIndex()
+        spans.add(10, 20)
+        for start, end, expected in (
+                (0, 10, False), (20, 30, False), (5, 11, True), (19, 25, True),
+                (12, 15, True), (0, 40, True), (10, 20, True)
+        ):
+            with self.subTest(start=start, end=end):
+                self.assertEqual(spans.overlaps(start, end), expected)
+
+    def test_positions_can_be_tuples(self):
+        spans = SpanIndex()
+        spans.add((1, 0), (1, 9))
+        spans.add((3, 4), (4, 0))
+        self.assertEqual(len(spans), 2)
+        self.assertFalse(spans.overlaps((1, 9), (3, 4)))
+        self.assertTrue(spans.overlaps((2, 0), (3, 5)))
+
+
+if __name__ == "__main__":
+    unittest.main()
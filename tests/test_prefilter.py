@@ -0,0 +1,81 @@
+"""
+Behavior tests for the lexical literal prefilter
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.parser import CodeParser
+from core.prefilter import LiteralPrefilter
+from core.rule_engine import RuleEngine
+
+# Sources on which some rule fires, written the ways a literal can hide
+SOURCES = {
+    'upper_case_name': 'DB_PASSWORD = "hunter2"\n',
+    'mixed_case_name': 'apiToken = "abc"\n',
+    'secret_in_attribute_chain': 'settings.Secret_Key = "abc"\nmy_key = "x"\n',
+    'eval_after_newline_continuation': 'x = \\\n    eval(data)\n',
+    'eval_in_nested_call': 'print(len(eval(data)))\n',
+    'nested_comprehension': 'grid = [[i * j for j in range(3)] for i in range(3)]\n',
+    'call_in_comprehension': 'sizes = [len(x) for x in items]\n',
+    'unused_import': 'import os, sys\nprint(sys)\n',
+    'from_import': 'from os import path\n',
+    'camel_case_function': 'def DoThing():\n    pass\n',
+    'bom_and_crlf': '\ufeffPassword = "x"\r\nresult = EVAL(data)\r\n',
+    'nothing': 'x = 1\n',
+}
+
+
+class LiteralPrefilterTest(unittest.TestCase):
+
+    def test_overlapping_and_prefix_literals(self):
+        prefilter = LiteralPrefilter([b"eval", b"evaluate", b"value", b"val"])
+        self.assertEqual(prefilter.scan(b"evaluate(values)"), {b"eval", b"evaluate", b"value", b"val"})
+        self.assertEqual(prefilter.scan(b"eval(x)"), {b"eval", b"val"})
+        self.assertEqual(prefilter.scan(b"x = 1"), set())
+
+    def test_case_insensitive(self):
+        prefilter = LiteralPrefilter([b"Token", b"SECRET"])
+        self.assertEqual(prefilter.literals, {b"token", b"secret"})
+        self.assertEqual(prefilter.scan(b"API_TOKEN = my_secret"), {b"token", b"secret"})
+
+    def test_no_literals(self):
+        prefilter = LiteralPrefilter([b""])
+        self.assertEqual(prefilter.scan(b"anything"), set())
+
+
+class LiveRulesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = RuleEngine(str(ROOT / "config.yaml"))
+
+    def run_rules(self, name: str, source: str, rules=None):
+        parser = CodeParser(f"{name}.py", source=source)
+        return self.engine.run_rules(parser, f"{name}.py", rules)
+
+    def test_skipped_rules_never_fire(self):
+        fired = set()
+        for name, source in SOURCES.items():
+            with self.subTest(name=name):
+                live = self.engine.live_rules(source.encode('utf-8'))
+                issues = self.run_rules(name, source)
+                self.assertEqual(self.run_rules(name, source, live), issues)
+                fired.update(issue.rule for issue in issues)
+        # The corpus exercises every rule the prefilter can skip
+        self.assertLessEqual({rule.rule_id for rule in self.engine.rules if rule.required_literals}, fired)
+
+    def test_rules_are_skipped_without_their_literals(self):
+        live = {rule.rule_id for rule in self.engine.live_rules(b"x = 1\n")}
+        self.assertNotIn('unsafe_eval', live)
+        self.assertEqual(live, {rule.rule_id for rule in self.engine.rules if not rule.required_literals})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Behavior tests for the Copilot token buckets
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import asyncio
+import tempfile
+import unittest
+import multiprocessing
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.rate_limiter import FCNTL_AVAILABLE, SharedTokenBucket, TokenBucket, create_rate_limiter
+
+
+def _drain(path: str, attempts: int, granted) -> None:
+    """Child process: take as many tokens as the shared bucket allows"""
+    bucket = SharedTokenBucket(Path(path), rate=0.001, burst=20)
+    taken = sum(bucket.try_acquire() for _ in range(attempts))
+    bucket.close()
+    with granted.get_lock():
+        granted.value += taken
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_burst_then_refill(self):
+        with mock.patch('models.rate_limiter.time.monotonic', return_value=100.0) as clock:
+            bucket = TokenBucket(rate=2, burst=3)
+            self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+            clock.return_value = 100.5
+            self.assertTrue(bucket.try_acquire())
+            self.assertFalse(bucket.try_acquire())
+            # Idle time never stores more than the burst
+            clock.return_value = 1000.0
+            self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+
+    def test_acquire_gives_up_when_the_deadline_cannot_be_met(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        self.assertTrue(bucket.acquire())
+        with mock.patch('models.rate_limiter.time.sleep') as sleep:
+            self.assertFalse(bucket.acquire(deadline=bucket._last + 0.5))
+            sleep.assert_not_called()
+
+    def test_acquire_async_waits_for_a_token(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(asyncio.run(bucket.acquire_async()))
+
+    def test_invalid_limits(self):
+        with self.assertRaises(RuntimeError):
+            TokenBucket(rate=0, burst=1)
+        with self.assertRaises(RuntimeError):
+            TokenBucket(rate=1, burst=2).try_acquire(3)
+
+
+@unittest.skipUnless(FCNTL_AVAILABLE, "file locking is not available")
+class SharedTokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "limits" / "copilot.bucket"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_instances_share_one_budget(self):
+        first = create_rate_limiter(0.06, 3, self.path)
+        second = create_rate_limiter(0.06, 3, self.path)
+        self.assertIsInstance(first, SharedTokenBucket)
+        taken = [bucket.try_acquire() for bucket in (first, second, first, second)]
+        first.close()
+        second.close()
+        self.assertEqual(taken, [True, True, True, False])
+
+    def test_processes_never_exceed_the_burst(self):
+        context = multiprocessing.get_context('fork')
+        granted = context.Value('i', 0)
+        workers = [context.Process(target=_drain, args=(str(self.path), 15, granted)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(granted.value, 20)
+
+    def test_clock_stepping_back_mints_no_tokens(self):
+        bucket = SharedTokenBucket(self.path, rate=1, burst=2)
+        with mock.patch('models.rate_limiter.time.time', return_value=5000.0) as clock:
+            self.assertTrue(bucket.try_acquire(2))
+            clock.return_value = 4000.0
+            self.assertFalse(bucket.try_acquire())
+            clock.return_value = 4001.0
+            self.assertTrue(bucket.try_acquire())
+        bucket.close()
+
+    def test_unusable_state_file_limits_per_process(self):
+        blocker = Path(self._tmp.name) / "file"
+        blocker.write_text("")
+        bucket = SharedTokenBucket(blocker / "copilot.bucket", rate=0.001, burst=1)
+        with self.assertLogs("CopilotProxy", "WARNING"):
+            self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        bucket.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
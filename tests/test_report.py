@@ -0,0 +1,98 @@
+"""
+Behavior tests for the streaming report writers
+
+Run with: python -m unittest discover -s tests
+"""
+
+import io
+import os
+import sys
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.issue import Issue
+from core.report import ReportWriter, create_writer
+
+
+class _Terminal(io.StringIO):
+
+    def isatty(self) -> bool:
+        return True
+
+
+def _issues(file: str = "a.py"):
+    return [
+        Issue('unsafe_eval', 'error', "eval <used>", "Use ast.literal_eval", file=file, line=1, column=4),
+        Issue('naming_convention', 'warning', "bad name", "snake_case", file=file, line=3),
+    ]
+
+
+class ReportWriterTest(unittest.TestCase):
+
+    def test_base_writer_is_abstract(self):
+        with self.assertRaises(TypeError):
+            ReportWriter(io.StringIO())
+
+    def test_text_color_only_on_terminals(self):
+        with mock.patch.dict(os.environ, {'NO_COLOR': ''}):
+            for stream, colored in ((io.StringIO(), False), (_Terminal(), True)):
+                writer = create_writer('text', stream)
+                writer.write_file("a.py", _issues())
+                writer.close()
+                self.assertEqual("\033[" in stream.getvalue(), colored)
+                self.assertIn("unsafe_eval (a.py:1:4)", stream.getvalue())
+
+    def test_no_color_disables_color_on_terminals(self):
+        stream = _Terminal()
+        with mock.patch.dict(os.environ, {'NO_COLOR': '1'}):
+            writer = create_writer('text', stream)
+        writer.write_file("a.py", _issues())
+        self.assertNotIn("\033[", stream.getvalue())
+
+    def test_results_are_written_as_each_file_finishes(self):
+        for format_name in ('text', 'json', 'ndjson'):
+            with self.subTest(format_name=format_name):
+                stream = io.StringIO()
+                writer = create_writer(format_name, stream)
+                writer.write_file("a.py", _issues())
+                self.assertIn("unsafe_eval", stream.getvalue())
+
+    def test_json_is_one_valid_array(self):
+        for files in ([], [("a.py", [])], [("a.py", _issues()), ("b.py", []), ("c.py", _issues("c.py"))]):
+            with self.subTest(files=len(files)):
+                stream = io.StringIO()
+                writer = create_writer('json', stream)
+                for name, issues in files:
+                    writer.write_file(name, issues)
+                writer.close()
+                data = json.loads(stream.getvalue())
+                self.assertEqual(len(data), sum(len(issues) for _, issues in files))
+                self.assertEqual(writer.total, len(data))
+
+    def test_ndjson_writes_one_object_per_line(self):
+        stream = io.StringIO()
+        writer = create_writer('ndjson', stream)
+        writer.write_file("a.py", _issues())
+        writer.close()
+        lines = stream.getvalue().splitlines()
+        self.assertEqual([json.loads(line)['rule'] for line in lines], ['unsafe_eval', 'naming_convention'])
+
+    def test_html_escapes_and_counts(self):
+        stream = io.StringIO()
+        writer = create_writer('html', stream)
+        writer.write_file("a.py", _issues())
+        writer.close()
+        self.assertIn("Total Issues: 2", stream.getvalue())
+        self.assertIn("eval &lt;used&gt;", stream.getvalue())
+
+    def test_unknown_format(self):
+        with self.assertRaises(RuntimeError):
+            create_writer('xml', io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
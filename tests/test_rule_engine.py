@@ -0,0 +1,84 @@
+"""
+Behavior tests for single-traversal rule dispatch
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import libcst as cst
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.parser import CodeParser
+from core.rule_engine import RuleBase, RuleEngine
+
+SOURCE = '''import os, sys
+DB_PASSWORD = "hunter2"
+
+def LoadData(path):
+    grid = [[len(x) for x in row] for row in path]
+    return eval(grid)
+'''
+
+
+class _RecordingRule(RuleBase):
+    """Records the nodes it is handed"""
+
+    rule_id = 'recording'
+
+    def __init__(self, *node_types):
+        self.node_types = node_types
+        self.seen = []
+        self.begun = self.left = 0
+
+    def begin_module(self, context):
+        self.begun += 1
+
+    def visit(self, node, context):
+        self.seen.append(node)
+        return []
+
+    def leave_module(self, context):
+        self.left += 1
+        return []
+
+
+class RuleDispatchTest(unittest.TestCase):
+
+    def test_one_traversal_matches_each_rule_alone(self):
+        engine = RuleEngine(str(ROOT / "config.yaml"))
+        module = cst.parse_module(SOURCE)
+        together = engine.run_rules(CodeParser("m.py", source=SOURCE), "m.py")
+        alone = [issue for rule in engine.rules for issue in rule.apply(module)]
+        key = lambda issue: (issue.rule, issue.line, issue.column, issue.message)
+        self.assertEqual(sorted(map(key, together)), sorted(map(key, alone)))
+        self.assertEqual(
+            {issue.rule for issue in together},
+            {'unused_import', 'hardcoded_secret', 'naming_convention', 'nested_list_comprehension',
+             'repeated_calculation', 'unsafe_eval'}
+        )
+
+    def test_rules_see_only_their_node_types_in_document_order(self):
+        calls = _RecordingRule(cst.Call)
+        names = _RecordingRule(cst.BaseExpression)
+        RuleEngine(rules=[calls, names]).run_rules(cst.parse_module(SOURCE))
+        self.assertEqual([node.func.value for node in calls.seen], ["len", "eval"])
+        # Base classes dispatch every subclass, each node once
+        self.assertIn(calls.seen[0], names.seen)
+        self.assertEqual(len(names.seen), len(set(map(id, names.seen))))
+        self.assertEqual((calls.begun, calls.left, names.begun, names.left), (1, 1, 1, 1))
+
+    def test_inactive_rules_are_not_called(self):
+        calls = _RecordingRule(cst.Call)
+        other = _RecordingRule(cst.Call)
+        RuleEngine(rules=[calls, other]).run_rules(cst.parse_module(SOURCE), rules=[calls])
+        self.assertEqual(len(calls.seen), 2)
+        self.assertEqual(other.seen, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
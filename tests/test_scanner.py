@@ -0,0 +1,83 @@
+"""
+Behavior tests for Scanner per-file failure handling
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from core.profiler import StageProfiler
+from core.rule_engine import RuleEngine
+from core.scanner import Scanner
+
+
+class ScannerFailureTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = RuleEngine(str(ROOT / "config.yaml"))
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.good = self.root / "good.py"
+        self.good.write_text("result = eval(data)\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def scan(self, files, jobs: int = 1):
+        """Scan expecting failures, which are logged as errors"""
+        with self.assertLogs("CodePoliceScanner", "ERROR"), Scanner(self.engine, jobs=jobs) as scanner:
+            results = {path.name: issues for path, issues in scanner.scan(files)}
+        return results, scanner.failures
+
+    def test_missing_file_is_recorded_and_skipped(self):
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                results, failures = self.scan([self.root / "nope.py", self.good], jobs)
+                self.assertEqual(len(failures), 1)
+                self.assertIn("nope.py", failures[0])
+                self.assertEqual(results["nope.py"], [])
+                self.assertTrue(results["good.py"])
+
+    def test_file_deleted_after_discovery(self):
+        doomed = self.root / "doomed.py"
+        doomed.write_text("x = 1\n")
+
+        def files():
+            yield self.good
+            doomed.unlink()
+            yield doomed
+
+        results, failures = self.scan(files())
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(results["good.py"])
+
+    def test_syntax_error_is_recorded(self):
+        broken = self.root / "broken.py"
+        broken.write_text("def broken(:\n")
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                results, failures = self.scan([broken, self.good], jobs)
+                self.assertEqual(len(failures), 1)
+                self.assertIn("broken.py", failures[0])
+                self.assertTrue(results["good.py"])
+
+    def test_missing_file_fix_with_profiler(self):
+        # --profile stats each file before fixing it
+        profiler = StageProfiler()
+        with self.assertLogs("CodePoliceScanner", "ERROR"), Scanner(self.engine, profiler=profiler) as scanner:
+            results = list(scanner.fix([self.root / "nope.py"]))
+        self.assertEqual(results, [(self.root / "nope.py", None)])
+        self.assertEqual(len(scanner.failures), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Behavior tests for Copilot snippet normalization
+
+Run with: python -m unittest discover -s tests
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.snippet_normalizer import normalize_snippet
+
+
+def _key(snippet: str, rule: str = 'unsafe_eval') -> str:
+    return normalize_snippet(snippet).key(rule)
+
+
+class NormalizeSnippetTest(unittest.TestCase):
+
+    def test_equivalent_snippets_share_a_key(self):
+        snippets = (
+            'result = eval(user_input)',
+            'value = eval(data)  # parse it',
+            'value  =  eval( data )\n',
+            '        value = eval(\n            data\n        )\n',
+        )
+        self.assertEqual(len({_key(snippet) for snippet in snippets}), 1)
+
+    def test_literals_become_placeholders(self):
+        self.assertEqual(_key('password = "hunter2"'), _key("token = 'abc'"))
+        self.assertEqual(_key('retries = 3'), _key('limit = 0x10'))
+        self.assertNotEqual(_key('x = "3"'), _key('x = 3'))
+
+    def test_meaningful_names_are_kept(self):
+        self.assertNotEqual(_key('x = eval(data)'), _key('x = exec(data)'))
+        self.assertNotEqual(_key('os.system(cmd)'), _key('os.getenv(cmd)'))
+        self.assertNotEqual(_key('os.system(cmd)'), _key('subprocess.system(cmd)'))
+        self.assertNotEqual(_key('for x in y: pass'), _key('while x: pass'))
+
+    def test_structure_is_kept(self):
+        self.assertNotEqual(_key('a = f(a)'), _key('a = f(b)'))
+        self.assertNotEqual(_key('if x:\n    y()\nz()\n'), _key('if x:\n    y()\n    z()\n'))
+
+    def test_key_depends_on_rule_and_extra(self):
+        normalized = normalize_snippet('x = eval(data)')
+        self.assertNotEqual(normalized.key('unsafe_eval'), normalized.key('naming_convention'))
+        self.assertNotEqual(normalized.key('unsafe_eval'), normalized.key('unsafe_eval', extra="model-b"))
+
+    def test_restore_maps_placeholders_back(self):
+        normalized = normalize_snippet('result = eval(user_input, "ctx")')
+        self.assertEqual(normalized.canonical, '_v1_ = eval ( _v2_ , _s1_ )')
+        suggestion = 'import ast\n_v1_ = ast.literal_eval(_v2_)  # was _s1_; _v9_ is unknown'
+        self.assertEqual(
+            normalized.restore(suggestion),
+            'import ast\nresult = ast.literal_eval(user_input)  # was "ctx"; _v9_ is unknown'
+        )
+
+    def test_indentation_is_rebuilt(self):
+        normalized = normalize_snippet('if ok:\n\tcall()\nelse:\n\tpass\n')
+        self.assertEqual(normalized.canonical, 'if _v1_ :\n    _v2_ ( )\nelse :\n    pass')
+
+    def test_untokenizable_snippets(self):
+        self.assertIsNone(normalize_snippet('x = """never closed'))
+        self.assertIsNone(normalize_snippet('call(\n'))
+
+
+if __name__ == "__main__":
+    unittest.main()